@@ -0,0 +1,345 @@
+"""Performance benchmarks for the extraction and analysis pipeline.
+
+The benchmarks run fully offline against a synthetic OpenML stand-in.
+Every stage is timed and memory-profiled, the results are saved as JSON
+and compared to a stored baseline:
+
+    python -m benchmarks.run_benchmarks --output results.json
+
+A stage that is slower or uses more memory than the baseline allows
+makes the script exit with an error. The times are compared relative to
+a fixed calibration workload that is timed on the same machine, so that a
+baseline measured on another machine stays meaningful.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.backend import set_backend
+from src.evaluations import set_cache
+from src.operations import (
+    get_evaluation_report,
+    get_tasks_by_best_score,
+    get_tasks_by_measure,
+    get_tasks_by_minima_region,
+    get_tasks_by_minima_region_sweep
+)
+from src.result_extractor import ResultExtractor
+from src.synthetic import SyntheticBackend
+from src.util import aggregate_results_by_family, aggregate_results_for_flow
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def _stages(config):
+    """Get the benchmarked stages.
+
+    Parameters
+    ----------
+    config: dict
+        Size of the synthetic grid.
+
+    Returns
+    -------
+    list
+        Tuples of (name, setup, run). setup prepares the
+        input of the stage and is not measured, run is
+        measured and receives the prepared input.
+    """
+    backend = SyntheticBackend(
+        n_tasks=config['tasks'],
+        n_flows=config['flows'],
+        runs_per_cell=config['runs'],
+        seed=config['seed']
+    )
+    set_backend(backend)
+    set_cache(None)
+
+    flow_ids = set(backend.flow_ids.tolist())
+    results = ResultExtractor(*flow_ids).results
+
+    return [
+        (
+            'build_data_frame',
+            lambda: None,
+            lambda _: ResultExtractor(*flow_ids)
+        ),
+        (
+            'results_min_task_flow',
+            lambda: ResultExtractor(*flow_ids, min_task_flow=2),
+            lambda result_extractor: result_extractor.results
+        ),
+        (
+            'results_min_task_flow_sweep',
+            lambda: ResultExtractor(*flow_ids),
+            lambda result_extractor: [
+                result_extractor.get_results(lower_limit)
+                for lower_limit in range(2 * config['runs'])
+            ]
+        ),
+        (
+            'get_tasks_by_measure',
+            lambda: results,
+            lambda data_frame: get_tasks_by_measure(data_frame)
+        ),
+        (
+            'get_tasks_by_best_score',
+            lambda: results,
+            lambda data_frame: get_tasks_by_best_score(data_frame)
+        ),
+        (
+            'get_tasks_by_minima_region',
+            lambda: results,
+            lambda data_frame: get_tasks_by_minima_region(
+                data_frame,
+                flow_ids,
+                detailed='Yes'
+            )
+        ),
+        (
+            'get_tasks_by_minima_region_sparse',
+            lambda: ResultExtractor(*flow_ids).results_index,
+            lambda run_index: get_tasks_by_minima_region(
+                run_index,
+                flow_ids,
+                detailed='Yes',
+                sparse=True
+            )
+        ),
+        (
+            'get_tasks_by_minima_region_sweep',
+            lambda: results,
+            lambda data_frame: get_tasks_by_minima_region_sweep(
+                data_frame,
+                flow_ids,
+                thresholds=[0.001, 0.005, 0.01, 0.05, 0.1]
+            )
+        ),
+        (
+            'get_evaluation_report',
+            lambda: results,
+            lambda data_frame: get_evaluation_report(
+                data_frame,
+                measures=['predictive_accuracy', 'kappa'],
+                aggregations=['mean', 'best', 'std', 'count']
+            )
+        ),
+        (
+            'aggregate_results_for_flow',
+            lambda: get_tasks_by_minima_region(
+                results,
+                flow_ids,
+                detailed='Yes'
+            ),
+            lambda random_results: aggregate_results_for_flow(
+                random_results,
+                'synthetic'
+            )
+        ),
+        (
+            'aggregate_results_by_family',
+            lambda: get_tasks_by_minima_region(
+                results,
+                flow_ids,
+                detailed='Yes'
+            ),
+            # five versions of every synthetic flow
+            lambda random_results: aggregate_results_by_family(
+                random_results,
+                {flow_id: (flow_id - 1) // 5 for flow_id in flow_ids}
+            )
+        ),
+    ]
+
+
+def calibrate(repeats=3):
+    """Time a fixed workload of NumPy and
+    Python operations.
+
+    Parameters
+    ----------
+    repeats: int
+        Number of timed runs, the fastest one is kept.
+
+    Returns
+    -------
+    float
+        The time in seconds.
+    """
+    values = np.random.RandomState(0).random_sample(10 ** 6)
+    times = list()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        np.sort(values)
+        sum(value * value for value in values[:10 ** 5].tolist())
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def run_benchmarks(config, repeats=3):
+    """Time and memory-profile every stage.
+
+    Parameters
+    ----------
+    config: dict
+        Size of the synthetic grid.
+    repeats: int
+        Number of timed runs, the fastest one is kept.
+
+    Returns
+    -------
+    dict
+        The time in seconds and the peak memory
+        in bytes of every stage.
+    """
+    results = dict()
+
+    for name, setup, run in _stages(config):
+        times = list()
+        for _ in range(repeats):
+            stage_input = setup()
+            start = time.perf_counter()
+            run(stage_input)
+            times.append(time.perf_counter() - start)
+
+        stage_input = setup()
+        tracemalloc.start()
+        run(stage_input)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {'time': min(times), 'peak_memory': peak_memory}
+
+    return results
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance, time_scale=1.0):
+    """Compare the results to the baseline.
+
+    Parameters
+    ----------
+    results: dict
+        The results of the benchmarks.
+    baseline: dict
+        The results of the baseline.
+    time_tolerance: float
+        Allowed relative increase of the time.
+    memory_tolerance: float
+        Allowed relative increase of the peak memory.
+    time_scale: float
+        Speed of the machine of the baseline relative
+        to this one, the baseline times are multiplied
+        by it.
+
+    Returns
+    -------
+    list
+        Descriptions of the regressions.
+    """
+    regressions = list()
+
+    for name, baseline_result in baseline.items():
+        if name not in results:
+            continue
+        result = results[name]
+        baseline_time = baseline_result['time'] * time_scale
+        if result['time'] > baseline_time * (1 + time_tolerance):
+            regressions.append(
+                '%s: time %.3fs, scaled baseline %.3fs'
+                % (name, result['time'], baseline_time)
+            )
+        if result['peak_memory'] > \
+                baseline_result['peak_memory'] * (1 + memory_tolerance):
+            regressions.append(
+                '%s: peak memory %d bytes, baseline %d bytes'
+                % (name, result['peak_memory'], baseline_result['peak_memory'])
+            )
+
+    return regressions
+
+
+def _save(output, path):
+
+    with open(path, 'w') as file:
+        json.dump(output, file, indent=2)
+        file.write('\n')
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Performance benchmarks')
+    parser.add_argument('--tasks', default=1000, type=int)
+    parser.add_argument('--flows', default=20, type=int)
+    parser.add_argument('--runs', default=5, type=int,
+                        help='Average number of runs per task and flow.')
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--repeats', default=3, type=int)
+    parser.add_argument('--output', default=None, type=str,
+                        help='Path where the results will be saved.')
+    parser.add_argument('--baseline', default=BASELINE, type=str)
+    parser.add_argument('--time_tolerance', default=1.0, type=float)
+    parser.add_argument('--memory_tolerance', default=0.25, type=float)
+    parser.add_argument('--update_baseline', action='store_true',
+                        help='Save the results as the new baseline.')
+    arguments = parser.parse_args()
+
+    config = {
+        'tasks': arguments.tasks,
+        'flows': arguments.flows,
+        'runs': arguments.runs,
+        'seed': arguments.seed
+    }
+    output = {
+        'config': config,
+        'calibration': calibrate(arguments.repeats),
+        'results': run_benchmarks(config, arguments.repeats)
+    }
+
+    print('%-36s %10.4fs' % ('calibration', output['calibration']))
+    for name, result in output['results'].items():
+        print(
+            '%-36s %10.4fs %12d bytes'
+            % (name, result['time'], result['peak_memory'])
+        )
+    if arguments.output is not None:
+        _save(output, arguments.output)
+
+    if arguments.update_baseline:
+        _save(output, arguments.baseline)
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        return 0
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    if baseline['config'] != config:
+        print(
+            'The baseline was measured for a different grid %s, '
+            'the comparison is skipped.' % baseline['config']
+        )
+        return 0
+
+    # baselines without a calibration are compared as they are
+    time_scale = output['calibration'] / baseline['calibration'] \
+        if 'calibration' in baseline else 1.0
+    regressions = compare(
+        output['results'],
+        baseline['results'],
+        arguments.time_tolerance,
+        arguments.memory_tolerance,
+        time_scale
+    )
+    for regression in regressions:
+        print('REGRESSION %s' % regression)
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
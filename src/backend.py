@@ -0,0 +1,774 @@
+import abc
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import openml
+from openml import exceptions
+
+from src.transport import OpenMLTransport, find_text, tag
+
+# Keys of a run listing that are kept.
+RUN_KEYS = ('run_id', 'task_id', 'setup_id', 'flow_id', 'uploader')
+# Keys of a flow listing that are kept.
+FLOW_KEYS = ('id', 'full_name', 'name', 'version', 'external_version', 'uploader')
+# Calls whose responses are memoized by default. The
+# run listings are not, so that updates see new runs.
+MEMOIZED_METHODS = (
+    'list_flows',
+    'list_tasks',
+    'get_run',
+    'get_task',
+    'get_dataset',
+    'get_study'
+)
+
+
+class Backend(object, metaclass=abc.ABCMeta):
+    """Interface for the OpenML access of the package.
+
+    All the responses are plain Python data, so that
+    they can be recorded and served again offline.
+    """
+
+    @abc.abstractmethod
+    def list_runs(self, offset=None, size=None, **restrictions):
+        """List runs.
+
+        Parameters
+        ----------
+        offset: int | None
+            Number of runs to skip.
+        size: int | None
+            Maximal number of runs.
+        restrictions: dict
+            Restrictions of openml.runs.list_runs,
+            e.g. flow, uploader, task_type or tag.
+
+        Returns
+        -------
+        dict
+            Runs keyed by run id, every run is a dict
+            with the run_id, task_id, setup_id, flow_id
+            and uploader keys.
+        """
+
+    @abc.abstractmethod
+    def list_evaluations(self, function, runs):
+        """List the evaluations of runs for a measure.
+
+        Parameters
+        ----------
+        function: str
+            Evaluation measure.
+        runs: list
+            Ids of the runs.
+
+        Returns
+        -------
+        dict
+            Evaluation values keyed by run id.
+        """
+
+    @abc.abstractmethod
+    def list_flows(self, offset=None, size=None):
+        """List flows.
+
+        Parameters
+        ----------
+        offset: int | None
+            Number of flows to skip.
+        size: int | None
+            Maximal number of flows.
+
+        Returns
+        -------
+        dict
+            Flows keyed by flow id, every flow is a
+            dict with the id, full_name, name, version,
+            external_version and uploader keys.
+        """
+
+    @abc.abstractmethod
+    def list_tasks(self, task_ids):
+        """List tasks together with the qualities
+        of their datasets.
+
+        Only the task listing is requested, the
+        dataset files are not downloaded.
+
+        Parameters
+        ----------
+        task_ids: list
+            Ids of the tasks.
+
+        Returns
+        -------
+        dict
+            Tasks keyed by task id, every task is a dict
+            with the task_id, dataset_id and qualities
+            keys. Tasks of deactivated datasets are not
+            part of the listing.
+        """
+
+    @abc.abstractmethod
+    def get_run(self, run_id):
+        """Get a run.
+
+        Returns
+        -------
+        dict
+            The run_id, task_id, flow_id and
+            evaluations of the run.
+        """
+
+    @abc.abstractmethod
+    def get_task(self, task_id):
+        """Get a task.
+
+        Returns
+        -------
+        dict
+            The task_id and dataset_id of the task.
+        """
+
+    @abc.abstractmethod
+    def get_dataset(self, dataset_id):
+        """Get a dataset.
+
+        Returns
+        -------
+        dict
+            The dataset_id and qualities of the dataset.
+        """
+
+    @abc.abstractmethod
+    def get_study(self, study_id):
+        """Get a study.
+
+        Returns
+        -------
+        dict
+            The study_id and the tasks of the study.
+        """
+
+
+# Methods of the Backend interface
+BACKEND_METHODS = tuple(sorted(Backend.__abstractmethods__))
+
+
+def _dispatch(method):
+    """Get a method of the Backend interface that
+    passes its arguments by name to _call.
+
+    Parameters
+    ----------
+    method: str
+        Name of the method.
+
+    Returns
+    -------
+    callable
+        The method.
+    """
+    signature = inspect.signature(getattr(Backend, method))
+
+    def call(self, *args, **kwargs):
+
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        call_kwargs = dict()
+        for name, value in list(arguments.arguments.items())[1:]:
+            if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+                call_kwargs.update(value)
+            else:
+                call_kwargs[name] = value
+
+        return self._call(method, **call_kwargs)
+
+    call.__name__ = method
+    call.__doc__ = getattr(Backend, method).__doc__
+
+    return call
+
+
+class DispatchingBackend(Backend):
+    """A backend that routes all the calls of the
+    Backend interface through _call, e.g. to wrap
+    another backend."""
+
+    @abc.abstractmethod
+    def _call(self, method, **kwargs):
+        """Handle a call.
+
+        Parameters
+        ----------
+        method: str
+            Name of the Backend method.
+        kwargs: dict
+            Arguments of the call by name.
+
+        Returns
+        -------
+        object
+            The response of the call.
+        """
+
+
+for _method in BACKEND_METHODS:
+    setattr(DispatchingBackend, _method, _dispatch(_method))
+
+
+class OpenMLBackend(Backend):
+    """Access to the OpenML server through openml-python."""
+
+    def list_runs(self, offset=None, size=None, **restrictions):
+
+        runs = openml.runs.list_runs(offset=offset, size=size, **restrictions)
+
+        return {
+            run_id: {key: run[key] for key in RUN_KEYS if key in run}
+            for run_id, run in runs.items()
+        }
+
+    def list_evaluations(self, function, runs):
+
+        evaluations = openml.evaluations.list_evaluations(
+            function=function,
+            runs=runs,
+            size=None
+        )
+
+        return {
+            evaluation.run_id: evaluation.value
+            for evaluation in evaluations.values()
+        }
+
+    def list_flows(self, offset=None, size=None):
+
+        flows = openml.flows.list_flows(offset=offset, size=size)
+
+        return {
+            flow_id: {key: flow[key] for key in FLOW_KEYS if key in flow}
+            for flow_id, flow in flows.items()
+        }
+
+    def list_tasks(self, task_ids):
+
+        tasks = openml.tasks.list_tasks(task_id=task_ids)
+
+        # the qualities are the numeric
+        # entries of a task listing
+        return {
+            task_id: {
+                'task_id': task_id,
+                'dataset_id': task['did'],
+                'qualities': {
+                    key: value
+                    for key, value in task.items()
+                    if key not in ('tid', 'did') and
+                    isinstance(value, (int, float))
+                }
+            }
+            for task_id, task in tasks.items()
+        }
+
+    def get_run(self, run_id):
+
+        run = openml.runs.get_run(run_id)
+
+        return {
+            'run_id': run.run_id,
+            'task_id': run.task_id,
+            'flow_id': run.flow_id,
+            'evaluations': dict(run.evaluations)
+        }
+
+    def get_task(self, task_id):
+
+        task = openml.tasks.get_task(task_id)
+
+        return {'task_id': task_id, 'dataset_id': task.dataset_id}
+
+    def get_dataset(self, dataset_id):
+
+        dataset = openml.datasets.get_dataset(dataset_id)
+
+        return {'dataset_id': dataset_id, 'qualities': dict(dataset.qualities)}
+
+    def get_study(self, study_id):
+
+        study = openml.study.get_study(study_id)
+
+        return {'study_id': study_id, 'tasks': list(study.tasks)}
+
+
+def _id_list(ids):
+    """Format the ids of a restriction."""
+    if isinstance(ids, (list, tuple, set, frozenset)):
+        return ','.join(str(value) for value in sorted(ids))
+
+    return str(ids)
+
+
+class HTTPBackend(Backend):
+
+    def __init__(self, transport=None):
+        """Access to the OpenML server through the
+        pooled HTTP transport of the package.
+
+        The listings are parsed while they are
+        received and datasets are never downloaded,
+        only their qualities are requested.
+
+        Parameters
+        ----------
+        transport: src.transport.OpenMLTransport | None
+            The transport. If None, one for the server
+            of the openml configuration is created.
+        """
+        self.transport = transport if transport is not None else OpenMLTransport()
+
+    def _list(self, path, name):
+        """Iterate over the elements of a listing, a
+        listing without results has no elements."""
+        try:
+            for element in self.transport.iter_elements(path, name):
+                yield element
+        except exceptions.OpenMLServerNoResult:
+            return
+
+    def list_runs(self, offset=None, size=None, **restrictions):
+
+        path = 'run/list'
+        if size is not None:
+            path += '/limit/%d' % size
+        if offset is not None:
+            path += '/offset/%d' % offset
+        for key, value in sorted(restrictions.items()):
+            if value is not None:
+                # the run ids are filtered as 'run'
+                path += '/%s/%s' % ('run' if key == 'id' else key, _id_list(value))
+
+        runs = dict()
+        for element in self._list(path, 'run'):
+            run = {
+                key: int(find_text(element, key))
+                for key in RUN_KEYS
+                if find_text(element, key)
+            }
+            runs[run['run_id']] = run
+
+        return runs
+
+    def list_evaluations(self, function, runs):
+
+        return {
+            int(find_text(element, 'run_id')): float(find_text(element, 'value'))
+            for element in self._list(
+                'evaluation/list/function/%s/run/%s' % (function, _id_list(runs)),
+                'evaluation'
+            )
+            if find_text(element, 'value')
+        }
+
+    def list_flows(self, offset=None, size=None):
+
+        path = 'flow/list'
+        if size is not None:
+            path += '/limit/%d' % size
+        if offset is not None:
+            path += '/offset/%d' % offset
+
+        flows = dict()
+        for element in self._list(path, 'flow'):
+            flow = {
+                key: find_text(element, key, '')
+                for key in FLOW_KEYS
+            }
+            flow['id'] = int(flow['id'])
+            flow['uploader'] = int(flow['uploader'])
+            flows[flow['id']] = flow
+
+        return flows
+
+    def list_tasks(self, task_ids):
+
+        tasks = dict()
+        for element in self._list('task/list/task_id/%s' % _id_list(task_ids), 'task'):
+            task_id = int(find_text(element, 'task_id'))
+            tasks[task_id] = {
+                'task_id': task_id,
+                'dataset_id': int(find_text(element, 'did')),
+                'qualities': {
+                    quality.get('name'): float(quality.text)
+                    for quality in element.iter(tag('quality'))
+                    if quality.text
+                }
+            }
+
+        return tasks
+
+    def get_run(self, run_id):
+
+        run = self.transport.get('run/%d' % run_id)
+        evaluations = dict()
+        for evaluation in run.iter(tag('evaluation')):
+            # only the evaluations over all the folds
+            if evaluation.find(tag('fold')) is None and \
+                    evaluation.find(tag('repeat')) is None and \
+                    find_text(evaluation, 'value'):
+                evaluations[find_text(evaluation, 'name')] = \
+                    float(find_text(evaluation, 'value'))
+
+        return {
+            'run_id': int(find_text(run, 'run_id')),
+            'task_id': int(find_text(run, 'task_id')),
+            'flow_id': int(find_text(run, 'flow_id')),
+            'evaluations': evaluations
+        }
+
+    def get_task(self, task_id):
+
+        task = self.transport.get('task/%d' % task_id)
+
+        return {
+            'task_id': task_id,
+            'dataset_id': int(next(task.iter(tag('data_set_id'))).text)
+        }
+
+    def get_dataset(self, dataset_id):
+
+        qualities = self.transport.get('data/qualities/%d' % dataset_id)
+
+        return {
+            'dataset_id': dataset_id,
+            'qualities': {
+                find_text(quality, 'name'): float(find_text(quality, 'value'))
+                for quality in qualities.iter(tag('quality'))
+                if find_text(quality, 'value')
+            }
+        }
+
+    def get_study(self, study_id):
+
+        study = self.transport.get('study/%d' % study_id)
+
+        return {
+            'study_id': study_id,
+            'tasks': [
+                int(task_id.text)
+                for task_id in study.iter(tag('task_id'))
+            ]
+        }
+
+
+def _fixture_name(method, kwargs):
+    """Get the file name of a recorded response.
+
+    Parameters
+    ----------
+    method: str
+        Name of the backend method.
+    kwargs: dict
+        Arguments of the call.
+
+    Returns
+    -------
+    str
+        The file name.
+    """
+    key = json.dumps(kwargs, sort_keys=True, default=sorted)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    return '%s-%s.json' % (method, digest)
+
+
+def _to_json(method, response):
+    """Convert a response to JSON data, dicts keyed
+    by ids are saved as lists of pairs."""
+    if method in ('list_runs', 'list_evaluations', 'list_flows', 'list_tasks'):
+        return [[key, value] for key, value in response.items()]
+
+    return response
+
+
+def _from_json(method, data):
+    """Convert JSON data back to a response."""
+    if method in ('list_runs', 'list_evaluations', 'list_flows', 'list_tasks'):
+        return {key: value for key, value in data}
+
+    return data
+
+
+class RecordingBackend(DispatchingBackend):
+
+    def __init__(self, path, backend=None):
+        """A backend that records the responses of
+        another backend as JSON fixtures.
+
+        Errors of the server are recorded as well.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the fixtures are saved.
+        backend: Backend | None
+            The backend whose responses are recorded.
+            If None, the OpenML server is used.
+        """
+        self.path = path
+        self.backend = backend if backend is not None else OpenMLBackend()
+        os.makedirs(path, exist_ok=True)
+
+    def _call(self, method, **kwargs):
+
+        fixture = {'method': method, 'arguments': kwargs}
+        try:
+            response = getattr(self.backend, method)(**kwargs)
+            fixture['response'] = _to_json(method, response)
+        except exceptions.OpenMLServerException as e:
+            fixture['error'] = {
+                'type': type(e).__name__,
+                'message': e.message,
+                'code': e.code
+            }
+        except exceptions.OpenMLServerError as e:
+            fixture['error'] = {'type': type(e).__name__, 'message': str(e)}
+
+        with open(os.path.join(self.path, _fixture_name(method, kwargs)), 'w') as file:
+            json.dump(fixture, file, default=sorted)
+
+        return _replay(fixture)
+
+
+def _replay(fixture):
+    """Get the response of a recorded fixture,
+    raising the recorded error if there is one."""
+    if 'error' in fixture:
+        error = fixture['error']
+        error_type = getattr(exceptions, error['type'])
+        if 'code' in error:
+            raise error_type(error['message'], code=error['code'])
+        raise error_type(error['message'])
+
+    return _from_json(fixture['method'], fixture['response'])
+
+
+class ReplayBackend(DispatchingBackend):
+
+    def __init__(self, path):
+        """A backend that serves recorded fixtures,
+        without any network access.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the fixtures are saved.
+        """
+        self.path = path
+
+    def _call(self, method, **kwargs):
+
+        fixture_path = os.path.join(self.path, _fixture_name(method, kwargs))
+        if not os.path.exists(fixture_path):
+            raise KeyError(
+                'No recorded response for %s(%s)' % (method, kwargs)
+            )
+        with open(fixture_path) as file:
+            return _replay(json.load(file))
+
+
+class _Call(object):
+
+    def __init__(self):
+        """A call that is in flight, shared by all
+        the callers with the same arguments."""
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class MemoizedBackend(DispatchingBackend):
+
+    def __init__(
+            self,
+            backend,
+            methods=MEMOIZED_METHODS,
+            max_size=10000,
+            ttl=600
+    ):
+        """A backend that keeps the responses of
+        another backend in memory.
+
+        Identical calls share one request: a repeated
+        call is served from a least recently used cache
+        and concurrent calls wait for the call that is
+        already in flight. Errors are given to all the
+        waiting callers and are not cached. The responses
+        are shared, so they must not be modified.
+
+        Parameters
+        ----------
+        backend: Backend
+            The backend whose responses are memoized.
+        methods: tuple
+            Names of the memoized methods, the other
+            calls are passed through.
+        max_size: int | None
+            Maximal number of responses, the least
+            recently used ones are evicted. If None,
+            the cache is unbounded.
+        ttl: float | None
+            Time in seconds after which a response
+            expires. If None, the responses do not
+            expire.
+        """
+        self.backend = backend
+        self.methods = frozenset(methods)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # key: (time, response)
+        self._responses = OrderedDict()
+        # key: _Call
+        self._in_flight = dict()
+
+    def _call(self, method, **kwargs):
+
+        if method not in self.methods:
+            return getattr(self.backend, method)(**kwargs)
+
+        key = (method, json.dumps(kwargs, sort_keys=True, default=sorted))
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not None and \
+                    (self.ttl is None or time.monotonic() - entry[0] <= self.ttl):
+                self._responses.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[key] = call
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = getattr(self.backend, method)(**kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            with self._lock:
+                self._responses[key] = (time.monotonic(), call.response)
+                self._responses.move_to_end(key)
+                while self.max_size is not None and \
+                        len(self._responses) > self.max_size:
+                    self._responses.popitem(last=False)
+                    self.evictions += 1
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+        return call.response
+
+    def stats(self):
+        """Get the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            The number of hits, misses, coalesced calls,
+            evictions and of the cached responses.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'size': len(self._responses)
+            }
+
+    def clear(self):
+        """Remove all the cached responses."""
+        with self._lock:
+            self._responses.clear()
+
+
+def _default_backend():
+    """Get the backend given by the environment.
+
+    OMLEXTRACTOR_MODE can be 'live' (the default),
+    'http', 'record' or 'replay', in the last two
+    cases the fixtures are saved in
+    OMLEXTRACTOR_FIXTURES. 'http' uses the pooled
+    HTTP transport instead of openml-python. The
+    live OpenML access is memoized.
+
+    Returns
+    -------
+    Backend
+        The backend.
+    """
+    mode = os.environ.get('OMLEXTRACTOR_MODE', 'live')
+    fixtures = os.environ.get('OMLEXTRACTOR_FIXTURES', 'fixtures')
+
+    if mode == 'record':
+        return RecordingBackend(fixtures)
+    elif mode == 'replay':
+        return ReplayBackend(fixtures)
+    elif mode == 'http':
+        return MemoizedBackend(HTTPBackend())
+    else:
+        return MemoizedBackend(OpenMLBackend())
+
+
+# Backend used for all the OpenML access.
+_backend = _default_backend()
+
+
+def set_backend(backend):
+    """Set the backend used for all the
+    OpenML access.
+
+    Parameters
+    ----------
+    backend: Backend | None
+        The backend. None resets to the backend
+        given by the environment.
+    """
+    global _backend
+    _backend = backend if backend is not None else _default_backend()
+
+
+def get_backend():
+    """Get the backend used for all the
+    OpenML access.
+
+    Returns
+    -------
+    Backend
+        The backend.
+    """
+    return _backend
@@ -1,6 +1,9 @@
 import argparse
 import os
 
+from src.backend import get_backend, set_backend
+from src.cli import add_openml_arguments, configure_openml
+from src.instrumentation import Report, instrument_backend, set_report
 from src.result_extractor import ResultExtractor
 from src.operations import get_tasks_by_minima_region
 from src.util import (
@@ -24,11 +27,20 @@ parser.add_argument(
     default="Gradient Boosting",
     type=str
 )
-
+add_openml_arguments(parser)
+parser.add_argument(
+    '--report',
+    help='Path where the timing report will be saved. '
+         'An empty path disables the instrumentation.',
+    default='',
+    type=str
+)
 
 arg_parser = parser.parse_args()
 algorithm = arg_parser.algorithm
 
+configure_openml(arg_parser)
+
 gradient_boosting_flows = \
     [
         'mlr.classif.xgboost_4',
@@ -47,6 +59,12 @@ random_forest_flows = \
         'mlr.classif.ranger_16'
     ]
 
+# time spent and OpenML calls made by every stage
+if arg_parser.report:
+    report = Report()
+    set_report(report)
+    set_backend(instrument_backend(get_backend()))
+
 if algorithm == "Gradient Boosting":
     flow_ids = get_flow_ids(*gradient_boosting_flows)
 elif algorithm == "SVM":
@@ -55,13 +73,14 @@ elif algorithm == "Random Forest":
     flow_ids = get_flow_ids(*random_forest_flows)
 
 # get the results
-results = ResultExtractor(*flow_ids, task_type=1).results
+results = ResultExtractor(*flow_ids, task_type=1).results_index
 random_results = get_tasks_by_minima_region(
     results,
     flow_ids,
     task_restrictions={'task_type': 1},
     threshold=0.005,
-    detailed='Yes'
+    detailed='Yes',
+    sparse=True
 )
 # aggregate the results over the
 # different versions of the same flow
@@ -81,3 +100,7 @@ sorted_df = aggregated_results.sort_values(by=[algorithm])
 # save results
 with open(os.path.join(os.path.expanduser(arg_parser.path), algorithm + ".csv"), "w") as file:
     sorted_df.to_csv(file)
+
+if arg_parser.report:
+    print(report.summary())
+    report.save(os.path.expanduser(arg_parser.report))
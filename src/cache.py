@@ -0,0 +1,328 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite limits the number of variables
+# in a single statement.
+_MAX_VARIABLES = 500
+
+# Time in seconds after which entries without
+# a value expire, e.g. evaluations that were
+# not yet computed by the server.
+NEGATIVE_TTL = 3600
+
+
+class EvaluationCache(object):
+
+    def __init__(self, path, ttl=None, max_size=None, negative_ttl=NEGATIVE_TTL):
+        """A persistent cache for run evaluations.
+
+        The evaluations are saved in a SQLite database
+        and are keyed by run id and evaluation measure.
+        Runs that do not have a value for a measure
+        are saved as well, so they are not requested
+        again until negative_ttl has passed.
+
+        Parameters
+        ----------
+        path: str
+            Path of the SQLite database file. ':memory:'
+            can be used for a cache that is not persisted.
+        ttl: float | None
+            Time in seconds after which an entry expires.
+            If None, the entries do not expire.
+        max_size: int | None
+            Maximal number of entries. The least recently
+            used entries are evicted when the limit is
+            exceeded. If None, the cache is unbounded.
+        negative_ttl: float | None
+            Time in seconds after which an entry without
+            a value expires. If 0, runs without a value
+            are not saved. If None, only ttl applies.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS evaluations ('
+            'run_id INTEGER NOT NULL, '
+            'measure TEXT NOT NULL, '
+            'value REAL, '
+            'created REAL NOT NULL, '
+            'accessed REAL NOT NULL, '
+            'PRIMARY KEY (run_id, measure))'
+        )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS evaluations_accessed '
+            'ON evaluations (accessed)'
+        )
+        self._connection.commit()
+
+    def get(self, run_ids, measure):
+        """Look up the evaluations of the given runs.
+
+        Parameters
+        ----------
+        run_ids: iterable
+            Ids of the runs.
+        measure: str
+            Evaluation measure.
+
+        Returns
+        -------
+        tuple
+            A dict with the cached entries, where a value
+            of None means that the run does not have the
+            measure, and a list with the run ids that are
+            not in the cache or have expired.
+        """
+        run_ids = list(run_ids)
+        found = dict()
+        now = time.time()
+
+        with self._lock:
+            if self.ttl is not None:
+                self._connection.execute(
+                    'DELETE FROM evaluations WHERE created < ?',
+                    (now - self.ttl,)
+                )
+            if self.negative_ttl is not None:
+                self._connection.execute(
+                    'DELETE FROM evaluations '
+                    'WHERE value IS NULL AND created < ?',
+                    (now - self.negative_ttl,)
+                )
+            for start in range(0, len(run_ids), _MAX_VARIABLES):
+                batch = run_ids[start:start + _MAX_VARIABLES]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._connection.execute(
+                    'SELECT run_id, value FROM evaluations '
+                    'WHERE measure = ? AND run_id IN (%s)' % placeholders,
+                    [measure] + batch
+                ).fetchall()
+                found.update(rows)
+                self._connection.execute(
+                    'UPDATE evaluations SET accessed = ? '
+                    'WHERE measure = ? AND run_id IN (%s)' % placeholders,
+                    [now, measure] + batch
+                )
+            self._connection.commit()
+
+            missing = [run_id for run_id in run_ids if run_id not in found]
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        return found, missing
+
+    def put(self, run_ids, measure, evaluations):
+        """Save the evaluations of the given runs.
+
+        Parameters
+        ----------
+        run_ids: iterable
+            Ids of the runs that were requested.
+        measure: str
+            Evaluation measure.
+        evaluations: dict
+            Evaluation values keyed by run id. Requested
+            runs that are not part of the dict are saved
+            without a value, unless negative_ttl is 0.
+        """
+        now = time.time()
+        rows = [
+            (run_id, measure, evaluations.get(run_id), now, now)
+            for run_id in run_ids
+            if run_id in evaluations or self.negative_ttl != 0
+        ]
+
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO evaluations '
+                '(run_id, measure, value, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            if self.max_size is not None:
+                # evict the least recently used entries
+                self._connection.execute(
+                    'DELETE FROM evaluations WHERE rowid IN ('
+                    'SELECT rowid FROM evaluations '
+                    'ORDER BY accessed ASC LIMIT max(0, '
+                    '(SELECT COUNT(*) FROM evaluations) - ?))',
+                    (self.max_size,)
+                )
+            self._connection.commit()
+
+    def __len__(self):
+
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM evaluations'
+            ).fetchone()[0]
+
+    def clear(self):
+        """Remove all the entries and
+        reset the counters."""
+        with self._lock:
+            self._connection.execute('DELETE FROM evaluations')
+            self._connection.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+
+        self._connection.close()
+
+
+class TaskMetadataCache(object):
+
+    def __init__(self, path, ttl=None, negative_ttl=NEGATIVE_TTL):
+        """A persistent cache for the metadata of tasks.
+
+        The dataset id and the qualities of every task
+        are saved in a SQLite database. Tasks that are
+        not listed, e.g. tasks of deactivated datasets,
+        are saved as well, so they are not requested
+        again until negative_ttl has passed.
+
+        Parameters
+        ----------
+        path: str
+            Path of the SQLite database file. ':memory:'
+            can be used for a cache that is not persisted.
+        ttl: float | None
+            Time in seconds after which an entry expires.
+            If None, the entries do not expire.
+        negative_ttl: float | None
+            Time in seconds after which a task that is
+            not listed expires. If 0, tasks that are not
+            listed are not saved. If None, only ttl applies.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            'task_id INTEGER PRIMARY KEY, '
+            'dataset_id INTEGER, '
+            'qualities TEXT, '
+            'created REAL NOT NULL)'
+        )
+        self._connection.commit()
+
+    def get(self, task_ids):
+        """Look up the metadata of the given tasks.
+
+        Parameters
+        ----------
+        task_ids: iterable
+            Ids of the tasks.
+
+        Returns
+        -------
+        tuple
+            A dict with the cached tasks, where a value
+            of None means that the task is not listed,
+            and a list with the task ids that are not
+            in the cache or have expired.
+        """
+        task_ids = list(task_ids)
+        found = dict()
+
+        with self._lock:
+            now = time.time()
+            if self.ttl is not None:
+                self._connection.execute(
+                    'DELETE FROM tasks WHERE created < ?',
+                    (now - self.ttl,)
+                )
+            if self.negative_ttl is not None:
+                self._connection.execute(
+                    'DELETE FROM tasks WHERE qualities IS NULL AND created < ?',
+                    (now - self.negative_ttl,)
+                )
+            self._connection.commit()
+            for start in range(0, len(task_ids), _MAX_VARIABLES):
+                batch = task_ids[start:start + _MAX_VARIABLES]
+                rows = self._connection.execute(
+                    'SELECT task_id, dataset_id, qualities FROM tasks '
+                    'WHERE task_id IN (%s)' % ','.join('?' * len(batch)),
+                    batch
+                ).fetchall()
+                for task_id, dataset_id, qualities in rows:
+                    found[task_id] = {
+                        'task_id': task_id,
+                        'dataset_id': dataset_id,
+                        'qualities': json.loads(qualities)
+                    } if qualities is not None else None
+
+            missing = [task_id for task_id in task_ids if task_id not in found]
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        return found, missing
+
+    def put(self, task_ids, tasks):
+        """Save the metadata of the given tasks.
+
+        Parameters
+        ----------
+        task_ids: iterable
+            Ids of the tasks that were requested.
+        tasks: dict
+            Tasks keyed by task id, as listed by the
+            backend. Requested tasks that are not part
+            of the dict are saved without metadata,
+            unless negative_ttl is 0.
+        """
+        now = time.time()
+        rows = list()
+        for task_id in task_ids:
+            task = tasks.get(task_id)
+            if task is not None:
+                rows.append(
+                    (task_id, task['dataset_id'], json.dumps(task['qualities']), now)
+                )
+            elif self.negative_ttl != 0:
+                rows.append((task_id, None, None, now))
+
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO tasks '
+                '(task_id, dataset_id, qualities, created) '
+                'VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self._connection.commit()
+
+    def __len__(self):
+
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM tasks'
+            ).fetchone()[0]
+
+    def close(self):
+
+        self._connection.close()
@@ -0,0 +1,134 @@
+import os
+
+from src.backend import (
+    HTTPBackend,
+    MemoizedBackend,
+    RecordingBackend,
+    ReplayBackend,
+    set_backend
+)
+from src.cache import NEGATIVE_TTL, EvaluationCache, TaskMetadataCache
+from src.evaluations import set_cache
+from src.executor import OpenMLExecutor, set_executor
+from src.flow_catalog import FlowCatalog, set_flow_catalog
+from src.task_metadata import set_metadata_cache
+from src.transport import OpenMLTransport
+
+# Directory of the caches and the flow catalog
+DATA_DIRECTORY = os.path.join('~', '.omlextractor')
+
+
+def add_openml_arguments(parser):
+    """Add the options of the OpenML access, the
+    caches and the flow catalog to a parser.
+
+    Parameters
+    ----------
+    parser: argparse.ArgumentParser
+        The parser of the command line.
+    """
+    parser.add_argument(
+        '--workers',
+        help='Number of concurrent OpenML calls.',
+        default=1,
+        type=int
+    )
+    parser.add_argument(
+        '--rate',
+        help='Maximal number of OpenML calls per second.',
+        default=None,
+        type=float
+    )
+    parser.add_argument(
+        '--backend',
+        help='Access to OpenML: live, http, record or replay.',
+        default=None,
+        choices=['live', 'http', 'record', 'replay'],
+        type=str
+    )
+    parser.add_argument(
+        '--fixtures',
+        help='Directory of the recorded OpenML responses.',
+        default='fixtures',
+        type=str
+    )
+    parser.add_argument(
+        '--cache',
+        help='Path of the evaluation cache. An empty path disables the cache.',
+        default=os.path.join(DATA_DIRECTORY, 'evaluations.sqlite'),
+        type=str
+    )
+    parser.add_argument(
+        '--task_cache',
+        help='Path of the task metadata cache. An empty path disables the cache.',
+        default=os.path.join(DATA_DIRECTORY, 'tasks.sqlite'),
+        type=str
+    )
+    parser.add_argument(
+        '--cache_ttl',
+        help='Time in seconds after which cached evaluations expire.',
+        default=None,
+        type=float
+    )
+    parser.add_argument(
+        '--negative_cache_ttl',
+        help='Time in seconds after which cached runs without an evaluation '
+             'and tasks that are not listed expire.',
+        default=NEGATIVE_TTL,
+        type=float
+    )
+    parser.add_argument(
+        '--flow_catalog',
+        help='Path of the flow catalog. An empty path keeps it in memory only.',
+        default=os.path.join(DATA_DIRECTORY, 'flows.json'),
+        type=str
+    )
+
+
+def configure_openml(arguments):
+    """Set the backend, the executor, the caches
+    and the flow catalog of the parsed options.
+
+    Parameters
+    ----------
+    arguments: argparse.Namespace
+        The options added by add_openml_arguments.
+    """
+    # recorded responses allow to run fully offline.
+    if arguments.backend == 'record':
+        set_backend(RecordingBackend(arguments.fixtures))
+    elif arguments.backend == 'replay':
+        set_backend(ReplayBackend(arguments.fixtures))
+    # a keep-alive connection for every worker
+    elif arguments.backend == 'http':
+        set_backend(
+            MemoizedBackend(
+                HTTPBackend(OpenMLTransport(pool_size=max(10, arguments.workers)))
+            )
+        )
+
+    set_executor(OpenMLExecutor(max_workers=arguments.workers, rate=arguments.rate))
+
+    # evaluations are shared by all the operations
+    # and between different invocations.
+    if arguments.cache:
+        set_cache(
+            EvaluationCache(
+                os.path.expanduser(arguments.cache),
+                ttl=arguments.cache_ttl,
+                negative_ttl=arguments.negative_cache_ttl
+            )
+        )
+    if arguments.task_cache:
+        set_metadata_cache(
+            TaskMetadataCache(
+                os.path.expanduser(arguments.task_cache),
+                ttl=arguments.cache_ttl,
+                negative_ttl=arguments.negative_cache_ttl
+            )
+        )
+
+    # flows are listed once and then only the
+    # new ones on every invocation.
+    if arguments.flow_catalog:
+        set_flow_catalog(FlowCatalog(os.path.expanduser(arguments.flow_catalog)))
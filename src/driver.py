@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache import EvaluationCache
+from src.cli import add_openml_arguments, configure_openml
+from src.evaluations import get_evaluations, set_cache
+from src.operations import get_tasks_by_minima_region
+from src.result_extractor import ResultExtractor
+from src.util import (
+    aggregate_results_for_flow,
+    get_flow_ids,
+    get_tasks_missing_values,
+    tasks_contained_in_openml_cc18
+)
+
+# Evaluation measure of the minima region analysis
+MEASURE = 'predictive_accuracy'
+
+
+def load_config(path):
+    """Load a driver configuration.
+
+    The configuration is a JSON file like:
+
+        {
+            "path": "output",
+            "task_restrictions": {"task_type": 1},
+            "threshold": 0.005,
+            "groups": {
+                "Gradient Boosting": ["mlr.classif.xgboost_4", "mlr.classif.xgboost_5"],
+                "SVM": ["mlr.classif.svm_7"]
+            }
+        }
+
+    Parameters
+    ----------
+    path: str
+        Path of the JSON file.
+
+    Returns
+    -------
+    dict
+        The configuration, with the defaults
+        for the missing entries.
+    """
+    with open(path) as file:
+        config = json.load(file)
+
+    config.setdefault('path', '.')
+    config.setdefault('task_restrictions', {'task_type': 1})
+    config.setdefault('threshold', 0.005)
+
+    return config
+
+
+def _init_worker(measure, run_ids, evaluations):
+    """Serve the evaluations that were fetched
+    by the driver in a process of the pool.
+
+    Parameters
+    ----------
+    measure: str
+        Evaluation measure.
+    run_ids: list
+        Ids of the runs that were requested.
+    evaluations: dict
+        Evaluation values keyed by run id.
+    """
+    cache = EvaluationCache(':memory:', negative_ttl=None)
+    cache.put(run_ids, measure, evaluations)
+    set_cache(cache)
+
+
+def _write_group_results(
+        group_index,
+        random_index,
+        algorithm,
+        group_flow_ids,
+        threshold,
+        undesired_tasks,
+        path
+):
+    """Find the interesting tasks of an algorithm
+    and write them sorted as a CSV file.
+
+    Parameters
+    ----------
+    group_index: src.run_index.RunIndex
+        The runs of the flows of the algorithm.
+    random_index: src.run_index.RunIndex
+        The runs using RandomSearch of the flows
+        of the algorithm.
+    algorithm: str
+        Name of the algorithm.
+    group_flow_ids: set
+        Ids of the flows of the algorithm.
+    threshold: float
+        Maximal difference allowed from the best value
+        to consider a run in the minima region.
+    undesired_tasks: set
+        Tasks that are dropped from the results.
+    path: str
+        Directory where the CSV file is saved.
+
+    Returns
+    -------
+    str
+        Path of the CSV file.
+    """
+    group_results = get_tasks_by_minima_region(
+        group_index,
+        group_flow_ids,
+        measure=MEASURE,
+        threshold=threshold,
+        detailed='Yes',
+        sparse=True,
+        random_results=random_index
+    )
+    aggregated_results = aggregate_results_for_flow(group_results, algorithm)
+    aggregated_results = aggregated_results.drop(
+        undesired_tasks.intersection(aggregated_results.index.values.tolist())
+    )
+    sorted_df = aggregated_results.sort_values(by=[algorithm])
+
+    csv_path = os.path.join(path, algorithm + '.csv')
+    with open(csv_path, 'w') as file:
+        sorted_df.to_csv(file)
+
+    return csv_path
+
+
+def run(config, processes=None):
+    """Find the interesting tasks for all the
+    algorithms of a configuration.
+
+    The runs of the flows of all the algorithms, and
+    the ones using RandomSearch, are listed in one
+    query each, their evaluations are fetched once
+    and the task filters are applied once for the
+    tasks of all the algorithms. The restrictions,
+    e.g. min_task_flow, apply to the flows of every
+    algorithm on their own, as if the algorithm was
+    run alone. The minima region analysis and the
+    aggregation of every algorithm run in a process
+    pool.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration, as given by load_config.
+    processes: int | None
+        Number of processes for the algorithms. If
+        None, the number of CPUs is used.
+
+    Returns
+    -------
+    dict
+        The path of the CSV file of every algorithm.
+    """
+    groups = {
+        algorithm: get_flow_ids(*flow_qualifiers)
+        for algorithm, flow_qualifiers in config['groups'].items()
+    }
+    flow_ids = set().union(*groups.values())
+
+    # every task and flow combination only depends on its
+    # own runs, so the combined listings hold the runs of
+    # every algorithm.
+    task_restrictions = dict(config['task_restrictions'])
+    result_extractor = ResultExtractor(*flow_ids, **task_restrictions)
+    random_extractor = ResultExtractor(
+        *flow_ids,
+        # 903 is the uploader of the runs using RandomSearch
+        **dict(task_restrictions, uploader=[903])
+    )
+    run_ids = sorted(
+        set(result_extractor.run_index.run_ids.tolist()).union(
+            random_extractor.run_index.run_ids.tolist()
+        )
+    )
+    evaluations = get_evaluations(run_ids, MEASURE)
+
+    # the tasks which are contained in OpenMLCC18
+    # and the ones that have missing values
+    task_ids = random_extractor.run_index.tasks.tolist()
+    undesired_tasks = get_tasks_missing_values(task_ids).union(
+        tasks_contained_in_openml_cc18(task_ids)
+    )
+
+    os.makedirs(config['path'], exist_ok=True)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(MEASURE, run_ids, evaluations)
+    ) as pool:
+        futures = dict()
+        for algorithm, group_flow_ids in groups.items():
+            futures[algorithm] = pool.submit(
+                _write_group_results,
+                result_extractor.select_flows(*group_flow_ids).results_index,
+                random_extractor.select_flows(*group_flow_ids).results_index,
+                algorithm,
+                group_flow_ids,
+                config['threshold'],
+                undesired_tasks,
+                config['path']
+            )
+
+        return {
+            algorithm: future.result()
+            for algorithm, future in futures.items()
+        }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Multi-algorithm benchmark')
+    parser.add_argument(
+        '--config',
+        help='Path of the JSON configuration.',
+        required=True,
+        type=str
+    )
+    parser.add_argument(
+        '--processes',
+        help='Number of processes for the algorithms.',
+        default=None,
+        type=int
+    )
+    add_openml_arguments(parser)
+    arguments = parser.parse_args()
+
+    configure_openml(arguments)
+
+    for algorithm, csv_path in run(
+        load_config(arguments.config),
+        arguments.processes
+    ).items():
+        print('%s: %s' % (algorithm, csv_path))
+
+
+if __name__ == '__main__':
+    main()
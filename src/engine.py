@@ -0,0 +1,358 @@
+import numpy as np
+import pandas
+
+
+def evaluation_values(run_ids, evaluations):
+    """Get the evaluation value of every run.
+
+    Parameters
+    ----------
+    run_ids: numpy.ndarray
+        Ids of the runs.
+    evaluations: dict
+        Evaluation values keyed by run id.
+
+    Returns
+    -------
+    values: numpy.ndarray
+        The evaluation value of every run, NaN for the
+        runs that do not include the evaluation measure.
+    """
+    values = np.full(len(run_ids), np.nan)
+    if len(evaluations) == 0 or len(run_ids) == 0:
+        return values
+
+    evaluated_runs = np.fromiter(evaluations.keys(), dtype=np.int64, count=len(evaluations))
+    evaluated_values = np.fromiter(evaluations.values(), dtype=float, count=len(evaluations))
+    order = np.argsort(evaluated_runs)
+    evaluated_runs = evaluated_runs[order]
+    evaluated_values = evaluated_values[order]
+
+    positions = np.searchsorted(evaluated_runs, run_ids)
+    positions[positions == len(evaluated_runs)] = 0
+    found = evaluated_runs[positions] == run_ids
+    values[found] = evaluated_values[positions[found]]
+
+    return values
+
+
+def cell_sum(run_index, values):
+    """Sum the values of the runs in every cell.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    values: numpy.ndarray
+        A value for every run in the index.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sum for every cell.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=values.dtype)
+
+    return np.add.reduceat(values, run_index.offsets[:-1])
+
+
+def cell_count(run_index, values):
+    """Count the runs of every cell that have
+    an evaluation value.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    values: numpy.ndarray
+        The evaluation value of every run in the index.
+
+    Returns
+    -------
+    numpy.ndarray
+        Number of evaluated runs for every cell.
+    """
+    return cell_sum(run_index, (~np.isnan(values)).astype(np.int64))
+
+
+def cell_mean(run_index, values):
+    """Average the evaluation values of the
+    runs in every cell.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    values: numpy.ndarray
+        The evaluation value of every run in the index.
+
+    Returns
+    -------
+    numpy.ndarray
+        Mean value for every cell, NaN if none of the
+        runs of the cell has an evaluation value.
+    """
+    sums = cell_sum(run_index, np.where(np.isnan(values), 0, values))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / cell_count(run_index, values)
+
+
+def cell_best(run_index, values, order='increasing'):
+    """Get the best evaluation value of the
+    runs in every cell.
+
+    The search starts from -1, so -1 is returned for
+    cells without any run that improves on it.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    values: numpy.ndarray
+        The evaluation value of every run in the index.
+    order: str
+        If 'decreasing' the lower the value the better,
+        vice versa for 'increasing'.
+
+    Returns
+    -------
+    numpy.ndarray
+        Best value for every cell.
+    """
+    if len(values) == 0:
+        return np.zeros(0)
+
+    starts = run_index.offsets[:-1]
+    if order == 'increasing':
+        best = np.maximum.reduceat(
+            np.where(np.isnan(values), -np.inf, values),
+            starts
+        )
+        return np.maximum(best, -1)
+    else:
+        best = np.minimum.reduceat(
+            np.where(np.isnan(values), np.inf, values),
+            starts
+        )
+        return np.minimum(best, -1)
+
+
+def cell_keys(task_ids, flow_ids):
+    """Combine task and flow ids into a
+    single sortable key.
+
+    Parameters
+    ----------
+    task_ids: numpy.ndarray
+        Task ids.
+    flow_ids: numpy.ndarray
+        Flow ids.
+
+    Returns
+    -------
+    numpy.ndarray
+        A key for every task and flow combination.
+    """
+    return (np.asarray(task_ids, dtype=np.int64) << 32) | \
+        np.asarray(flow_ids, dtype=np.int64)
+
+
+def lookup_cells(keys, values, query_keys):
+    """Look up the values of cells by their keys.
+
+    Parameters
+    ----------
+    keys: numpy.ndarray
+        Sorted keys of the cells.
+    values: numpy.ndarray
+        Value of every cell.
+    query_keys: numpy.ndarray
+        Keys of the cells to look up.
+
+    Returns
+    -------
+    numpy.ndarray
+        The value for every looked up cell, NaN
+        for the keys that are not found.
+    """
+    found_values = np.full(len(query_keys), np.nan)
+    if len(keys) == 0:
+        return found_values
+
+    positions = np.searchsorted(keys, query_keys)
+    positions[positions == len(keys)] = 0
+    found = keys[positions] == query_keys
+    found_values[found] = values[positions[found]]
+
+    return found_values
+
+
+def frame_from_cells(task_ids, flow_ids, values, index, columns):
+    """Build a DataFrame with tasks as rows and
+    flows as columns from the values of cells.
+
+    The cells are inserted row by row in the
+    order of the given index and columns, the
+    same order as iterating over a DataFrame
+    with that index and columns.
+
+    Parameters
+    ----------
+    task_ids: numpy.ndarray
+        Task of every cell.
+    flow_ids: numpy.ndarray
+        Flow of every cell.
+    values: sequence
+        Value of every cell.
+    index: pandas.Index
+        Order of the tasks.
+    columns: pandas.Index
+        Order of the flows.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A DataFrame containing task and flow
+        combinations along with their value.
+    """
+    matrix = dict()
+    rows = index.get_indexer(task_ids)
+    columns_positions = columns.get_indexer(flow_ids)
+    index_values = index.values.tolist()
+    column_values = columns.values.tolist()
+
+    for cell in np.lexsort((columns_positions, rows)).tolist():
+        row = index_values[rows[cell]]
+        column = column_values[columns_positions[cell]]
+        matrix.setdefault(row, dict())[column] = values[cell]
+
+    return pandas.DataFrame.from_dict(matrix, orient='index')
+
+
+def cells_index(task_ids, flow_ids):
+    """Build the index of a sparse long-format
+    result from the cells.
+
+    Parameters
+    ----------
+    task_ids: numpy.ndarray
+        Task of every cell.
+    flow_ids: numpy.ndarray
+        Flow of every cell.
+
+    Returns
+    -------
+    pandas.MultiIndex
+        The (task_id, flow_id) of every cell.
+    """
+    return pandas.MultiIndex.from_arrays(
+        [
+            np.asarray(task_ids, dtype=np.int64),
+            np.asarray(flow_ids, dtype=np.int64)
+        ],
+        names=['task_id', 'flow_id']
+    )
+
+
+def series_from_cells(task_ids, flow_ids, values):
+    """Build a sparse long-format Series from
+    the values of cells.
+
+    Only the given cells are stored, the tasks
+    and flows without a value take no memory.
+
+    Parameters
+    ----------
+    task_ids: numpy.ndarray
+        Task of every cell.
+    flow_ids: numpy.ndarray
+        Flow of every cell.
+    values: sequence
+        Value of every cell.
+
+    Returns
+    -------
+    pandas.Series
+        The values indexed by (task_id, flow_id),
+        sorted by task and flow.
+    """
+    index = cells_index(task_ids, flow_ids)
+    series = pandas.Series(
+        values,
+        index=index,
+        dtype=None if len(index) > 0 else float
+    )
+
+    return series.sort_index()
+
+
+def cell_sort(run_index, values):
+    """Sort the values of the runs within
+    every cell.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    values: numpy.ndarray
+        A value for every run in the index.
+
+    Returns
+    -------
+    numpy.ndarray
+        The values in ascending order within every
+        cell, NaN values last. The cells are still
+        delimited by the offsets of the index.
+    """
+    cells = np.repeat(np.arange(len(run_index.counts)), run_index.counts)
+
+    return values[np.lexsort((values, cells))]
+
+
+def cell_count_at_most(run_index, sorted_values, thresholds):
+    """Count the runs of every cell with a value
+    that is at most a threshold, for several
+    thresholds.
+
+    Every count is a binary search in the sorted
+    values of the cell, the searches of all the
+    cells and thresholds are run together.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs.
+    sorted_values: numpy.ndarray
+        The values sorted within every cell,
+        as given by cell_sort.
+    thresholds: array-like
+        The thresholds.
+
+    Returns
+    -------
+    numpy.ndarray
+        A matrix with the number of runs for every
+        cell as rows and every threshold as columns.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    starts = run_index.offsets[:-1]
+    shape = (len(starts), len(thresholds))
+    low = np.broadcast_to(starts[:, None], shape).copy()
+    high = np.broadcast_to(run_index.offsets[1:, None], shape).copy()
+    if len(sorted_values) == 0:
+        return high - low
+
+    # first position in every cell with
+    # a value above the threshold
+    while True:
+        searching = low < high
+        if not searching.any():
+            break
+        middle = (low + high) // 2
+        with np.errstate(invalid='ignore'):
+            at_most = sorted_values[np.minimum(middle, len(sorted_values) - 1)] <= thresholds
+        low = np.where(searching & at_most, middle + 1, low)
+        high = np.where(searching & ~at_most, middle, high)
+
+    return low - starts[:, None]
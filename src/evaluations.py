@@ -0,0 +1,175 @@
+from src.backend import get_backend
+from src.executor import get_executor
+from src.instrumentation import instrument, record_cache, record_rows
+
+# Maximal number of run ids that are sent in a
+# single evaluation listing. The run ids are part
+# of the request url, so it can not grow unbounded.
+BATCH_SIZE = 500
+
+# Cache that is consulted before any evaluation
+# is requested from OpenML. None, if evaluations
+# should not be cached.
+_cache = None
+
+
+def set_cache(cache):
+    """Set the cache used for the evaluation
+    lookups.
+
+    Parameters
+    ----------
+    cache: src.cache.EvaluationCache | None
+        The cache that will be read first by all
+        the evaluation lookups. None disables
+        caching.
+    """
+    global _cache
+    _cache = cache
+
+
+def get_cache():
+    """Get the cache used for the evaluation
+    lookups.
+
+    Returns
+    -------
+    src.cache.EvaluationCache | None
+        The cache if one was set, otherwise None.
+    """
+    return _cache
+
+
+def get_run_ids(data_frame):
+    """Get all the run ids contained in
+    a DataFrame.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame
+        A pandas DataFrame where the results are organized
+        as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+            task combination, otherwise it is NaN.
+
+    Returns
+    -------
+    run_ids: set
+        The run ids from all the non-empty
+        entries of the DataFrame.
+    """
+    run_ids = set()
+
+    for column in data_frame.columns.values.tolist():
+        for entry in data_frame[column].values:
+            if isinstance(entry, set):
+                run_ids.update(entry)
+
+    return run_ids
+
+
+def get_evaluations(
+        run_ids,
+        measure='predictive_accuracy',
+        batch_size=BATCH_SIZE
+):
+    """Get the evaluation values of the given runs
+    for a certain measure.
+
+    The evaluations are listed in bulk, the run ids
+    are split into batches and each batch costs
+    a single (paged) listing instead of one
+    request per run. If a cache is set, only the
+    runs that are not cached are requested. The
+    batches are requested through the configured
+    executor.
+
+    Parameters
+    ----------
+    run_ids: iterable
+        Ids of the runs.
+    measure: str
+        Evaluation measure for which the values
+        will be retrieved.
+    batch_size: int
+        Maximal number of run ids for one listing.
+
+    Returns
+    -------
+    evaluations: dict
+        A dict where the keys are run ids and the
+        values are the evaluation values. Runs that
+        do not include the evaluation measure are
+        not part of the dict.
+    """
+    return get_measure_evaluations(run_ids, [measure], batch_size)[measure]
+
+
+@instrument('get_measure_evaluations')
+def get_measure_evaluations(
+        run_ids,
+        measures,
+        batch_size=BATCH_SIZE
+):
+    """Get the evaluation values of the given runs
+    for several measures.
+
+    The run ids are collected once and the listings
+    for all measures and batches are requested
+    together through the configured executor. OpenML
+    lists evaluations per measure, so every measure
+    costs one listing per batch.
+
+    Parameters
+    ----------
+    run_ids: iterable
+        Ids of the runs.
+    measures: list
+        Evaluation measures for which the values
+        will be retrieved.
+    batch_size: int
+        Maximal number of run ids for one listing.
+
+    Returns
+    -------
+    evaluations: dict
+        A dict where the keys are the measures and
+        the values are dicts of run ids and their
+        evaluation values.
+    """
+    run_ids = sorted(set(run_ids))
+    record_rows(len(run_ids) * len(measures))
+    evaluations = dict()
+    # (measure, batch of run ids) to be listed
+    listings = list()
+
+    for measure in measures:
+        evaluations[measure] = dict()
+        missing = run_ids
+        if _cache is not None:
+            cached, missing = _cache.get(run_ids, measure)
+            record_cache(len(cached), len(missing))
+            for run_id, value in cached.items():
+                # runs without a value for the
+                # measure are cached as well
+                if value is not None:
+                    evaluations[measure][run_id] = value
+        for start in range(0, len(missing), batch_size):
+            listings.append((measure, missing[start:start + batch_size]))
+
+    def list_batch(listing):
+        measure, batch = listing
+        batch_evaluations = get_backend().list_evaluations(measure, batch)
+        if _cache is not None:
+            _cache.put(batch, measure, batch_evaluations)
+        return batch_evaluations
+
+    for (measure, _), batch_evaluations in zip(
+        listings,
+        get_executor().map(list_batch, listings)
+    ):
+        evaluations[measure].update(batch_evaluations)
+
+    return evaluations
@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from openml.exceptions import OpenMLServerError, OpenMLServerException
+
+from src.instrumentation import bind_stage
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate, capacity=1):
+        """A token bucket rate limiter.
+
+        Parameters
+        ----------
+        rate: float
+            Number of tokens added per second.
+        capacity: int
+            Maximal number of tokens that can be
+            accumulated, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token from the bucket, wait
+        until one is available if needed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                waiting_time = (1 - self._tokens) / self.rate
+            time.sleep(waiting_time)
+
+
+def _is_retryable(error):
+    """Check if a failed OpenML call
+    should be retried.
+
+    Answers of the server with an error code
+    (e.g. a deactivated dataset, no results)
+    are final, other server errors are not.
+
+    Parameters
+    ----------
+    error: Exception
+        The error raised by the call.
+
+    Returns
+    -------
+    bool
+        Result of the check.
+    """
+    return isinstance(error, OpenMLServerError) and \
+        not isinstance(error, OpenMLServerException)
+
+
+class OpenMLExecutor(object):
+
+    def __init__(
+            self,
+            max_workers=1,
+            max_in_flight=None,
+            rate=None,
+            burst=1,
+            retries=3,
+            backoff=1.0
+    ):
+        """Executes OpenML calls concurrently.
+
+        The calls are run in a thread pool, the
+        number of calls that are in flight at the
+        same time is bounded and they can be rate
+        limited. Calls that fail with a server error
+        are retried with an exponential backoff.
+
+        Parameters
+        ----------
+        max_workers: int
+            Number of threads. With 1 worker the
+            calls are run serially in the calling
+            thread.
+        max_in_flight: int | None
+            Maximal number of calls that are pending
+            at the same time. If None, it is equal to
+            the number of workers.
+        rate: float | None
+            Maximal number of calls per second. If None,
+            the calls are not rate limited.
+        burst: int
+            Number of calls that can be made at once
+            when the rate limit allows it.
+        retries: int
+            Number of times a failed call is retried.
+        backoff: float
+            Waiting time in seconds before the first
+            retry, it doubles with every retry.
+        """
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight \
+            if max_in_flight is not None else max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._rate_limiter = TokenBucket(rate, burst) \
+            if rate is not None else None
+
+    def call(self, function, *args, **kwargs):
+        """Call the function, respecting the rate
+        limit and retrying on server errors.
+
+        Parameters
+        ----------
+        function: callable
+            The function that makes the OpenML call.
+
+        Returns
+        -------
+        object
+            The result of the function.
+        """
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    def map(self, function, items, ignore=()):
+        """Apply the function to every item.
+
+        Parameters
+        ----------
+        function: callable
+            The function that makes the OpenML call
+            for one item.
+        items: iterable
+            Arguments for the function.
+        ignore: tuple
+            Exception types that are not raised after
+            the retries are exhausted, the result for
+            the item is None instead.
+
+        Returns
+        -------
+        results: list
+            The results in the same order as the items.
+        """
+        def call_item(item):
+            try:
+                return self.call(function, item)
+            except ignore:
+                return None
+
+        items = list(items)
+        if self.max_workers == 1:
+            return [call_item(item) for item in items]
+
+        # the calls in the pool are counted
+        # for the stage of the caller
+        call_item = bind_stage(call_item)
+
+        results = [None] * len(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = dict()
+            position = 0
+            while position < len(items) or pending:
+                # submit until the limit of
+                # calls in flight is reached
+                while position < len(items) and \
+                        len(pending) < self.max_in_flight:
+                    future = pool.submit(call_item, items[position])
+                    pending[future] = position
+                    position += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+
+        return results
+
+
+# Executor used for the OpenML calls
+# of the operations and utilities.
+_executor = OpenMLExecutor()
+
+
+def set_executor(executor):
+    """Set the executor used for the
+    OpenML calls.
+
+    Parameters
+    ----------
+    executor: OpenMLExecutor | None
+        The executor. None resets to the default
+        executor which runs the calls serially.
+    """
+    global _executor
+    _executor = executor if executor is not None else OpenMLExecutor()
+
+
+def get_executor():
+    """Get the executor used for the
+    OpenML calls.
+
+    Returns
+    -------
+    OpenMLExecutor
+        The executor.
+    """
+    return _executor
+
+
+async def run_async(function, *args, **kwargs):
+    """Run a blocking function without blocking
+    the event loop.
+
+    The function is run in the default executor
+    of the running event loop, so that many OpenML
+    queries can overlap on one event loop.
+
+    Parameters
+    ----------
+    function: callable
+        The blocking function.
+
+    Returns
+    -------
+    object
+        The result of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(function, *args, **kwargs)
+    )
@@ -0,0 +1,368 @@
+import bisect
+import fnmatch
+import json
+import os
+import re
+import threading
+import time
+
+from src.backend import get_backend
+
+# Number of flows that are requested
+# in a single listing.
+FLOW_PAGE_SIZE = 10000
+
+# Characters that make a flow name a glob pattern
+_GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
+
+def parse_qualifier(flow_qualifier):
+    """Split a flow qualifier into the
+    flow name and version.
+
+    Parameters
+    ----------
+    flow_qualifier: str
+        A combination of flow name and version,
+        e.g. 'mlr.classif.ranger_8', or only a
+        flow name. The flow name and the version
+        can be glob patterns, e.g. 'mlr.classif.*'
+        or 'mlr.classif.ranger_*'.
+
+    Returns
+    -------
+    tuple
+        The flow name and the version, None
+        if the qualifier has no version.
+    """
+    # only a number or a glob pattern of numbers after
+    # an underscore is a version, e.g. not the 48 of
+    # 'weka.J48' or the 'pow' of 'mlr.classif.ranger_pow'
+    version_match = re.search(r"_([\d*?\[\]!-]+)$", flow_qualifier)
+    if version_match:
+        return flow_qualifier[:version_match.start()], version_match.group(1)
+
+    return flow_qualifier, None
+
+
+class FlowCatalog(object):
+
+    def __init__(self, path=None, max_age=None):
+        """A local catalog of the OpenML flows, indexed
+        by flow name and version.
+
+        The catalog is listed once and then refreshed
+        incrementally, only the flows after the already
+        listed ones are requested. If flows were deleted,
+        the listing shifted and the catalog is listed
+        again. The catalog can be used by several threads.
+
+        Parameters
+        ----------
+        path: str | None
+            Path of the JSON file where the catalog is
+            persisted. If None, the catalog is kept in
+            memory only.
+        max_age: float | None
+            Time in seconds after which the catalog is
+            refreshed. If None, it is refreshed once
+            when it is first used.
+        """
+        self.path = path
+        self.max_age = max_age
+        # name: {version: flow_id}
+        self.index = dict()
+        self.listed_flows = 0
+        # id of the last listed flow, None
+        # if no flow is listed yet
+        self.last_flow_id = None
+        # time of the last refresh, None if the
+        # catalog was not refreshed in this process
+        self.refreshed = None
+        self._names = None
+        self._lock = threading.RLock()
+
+        if path is not None and os.path.exists(path):
+            with open(path) as file:
+                catalog = json.load(file)
+            for flow_id, name, version in catalog['flows']:
+                self._add(flow_id, name, version)
+            self.listed_flows = catalog['listed_flows']
+            self.last_flow_id = catalog.get('last_flow_id')
+            if max_age is not None:
+                self.refreshed = catalog['refreshed']
+
+    def _add(self, flow_id, name, version):
+
+        self.index.setdefault(name, dict())[version] = flow_id
+
+    def __len__(self):
+
+        return sum(len(versions) for versions in self.index.values())
+
+    def is_stale(self):
+        """Check if the catalog should be refreshed.
+
+        Returns
+        -------
+        bool
+            Result of the check.
+        """
+        with self._lock:
+            if self.refreshed is None:
+                return True
+
+            return self.max_age is not None and \
+                time.time() - self.refreshed > self.max_age
+
+    def refresh(self, page_size=FLOW_PAGE_SIZE):
+        """List the flows that were uploaded since
+        the last refresh and add them to the index.
+
+        The listing starts at the last listed flow. If
+        it is not the first flow of the listing anymore,
+        flows were deleted and the catalog is listed
+        again from the start.
+
+        Parameters
+        ----------
+        page_size: int
+            Number of flows that are requested in
+            a single listing.
+
+        Returns
+        -------
+        int
+            Number of new flows.
+        """
+        with self._lock:
+            nr_flows = len(self)
+            if not self._list_flows(page_size, overlap=self.listed_flows > 0):
+                self.index = dict()
+                self.listed_flows = 0
+                self.last_flow_id = None
+                self._list_flows(page_size, overlap=False)
+
+            self._names = None
+            self.refreshed = time.time()
+            if self.path is not None:
+                self.save()
+
+            return len(self) - nr_flows
+
+    def refresh_if_stale(self):
+        """Refresh the catalog if it is stale.
+
+        The staleness is checked again once the
+        catalog is locked, so that concurrent calls
+        refresh the catalog only once.
+
+        Returns
+        -------
+        bool
+            True if the catalog was refreshed.
+        """
+        if not self.is_stale():
+            return False
+        with self._lock:
+            if not self.is_stale():
+                return False
+            self.refresh()
+
+        return True
+
+    def _list_flows(self, page_size, overlap):
+        """List the flows after the listed ones
+        and add them to the index.
+
+        Parameters
+        ----------
+        page_size: int
+            Number of flows that are requested in
+            a single listing.
+        overlap: bool
+            If True, the listing starts at the last
+            listed flow, to check that it did not shift.
+
+        Returns
+        -------
+        bool
+            False if the listing shifted, nothing
+            was added to the index then.
+        """
+        offset = self.listed_flows - 1 if overlap else self.listed_flows
+        while True:
+            page = get_backend().list_flows(offset=offset, size=page_size)
+            if overlap:
+                if len(page) == 0 or next(iter(page)) != self.last_flow_id:
+                    return False
+                overlap = False
+            for flow_id, flow in page.items():
+                self._add(flow_id, flow['name'], flow['version'])
+                self.last_flow_id = flow_id
+            offset += len(page)
+            self.listed_flows = offset
+            # last page
+            if len(page) < page_size:
+                break
+
+        return True
+
+    def flow_ids(self):
+        """Get the ids of all the flows
+        of the catalog.
+
+        Returns
+        -------
+        set
+            The flow ids.
+        """
+        with self._lock:
+            return {
+                flow_id
+                for versions in self.index.values()
+                for flow_id in versions.values()
+            }
+
+    def save(self):
+        """Persist the catalog in its JSON file."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        catalog = {
+            'listed_flows': self.listed_flows,
+            'last_flow_id': self.last_flow_id,
+            'refreshed': self.refreshed,
+            'flows': [
+                [flow_id, name, version]
+                for name, versions in self.index.items()
+                for version, flow_id in versions.items()
+            ]
+        }
+        with open(self.path, 'w') as file:
+            json.dump(catalog, file)
+
+    def _match_names(self, pattern):
+        """Get the flow names that match a glob pattern.
+
+        Only the names that start with the literal
+        prefix of the pattern are matched against it.
+
+        Parameters
+        ----------
+        pattern: str
+            The glob pattern.
+
+        Returns
+        -------
+        list
+            The matching flow names.
+        """
+        if self._names is None:
+            self._names = sorted(self.index)
+
+        prefix = _GLOB_CHARACTERS.split(pattern, maxsplit=1)[0]
+        start = bisect.bisect_left(self._names, prefix)
+        names = list()
+        for name in self._names[start:]:
+            if not name.startswith(prefix):
+                break
+            if fnmatch.fnmatchcase(name, pattern):
+                names.append(name)
+
+        return names
+
+    def resolve(self, flow_qualifier):
+        """Get the flow ids for a flow qualifier.
+
+        Parameters
+        ----------
+        flow_qualifier: str
+            A combination of flow name and version,
+            e.g. 'mlr.classif.ranger_8', or only a
+            flow name, in which case all of its
+            versions match. The flow name and the
+            version can be glob patterns, e.g.
+            'mlr.classif.*' or 'mlr.classif.ranger_*'.
+
+        Returns
+        -------
+        set
+            The ids of the matching flows.
+        """
+        flow_name, flow_version = parse_qualifier(flow_qualifier)
+        with self._lock:
+            return self._resolve(flow_name, flow_version)
+
+    def _resolve(self, flow_name, flow_version):
+
+        if _GLOB_CHARACTERS.search(flow_name):
+            names = self._match_names(flow_name)
+        else:
+            names = [flow_name]
+
+        flow_ids = set()
+        for name in names:
+            versions = self.index.get(name, dict())
+            if flow_version is None:
+                flow_ids.update(versions.values())
+            elif _GLOB_CHARACTERS.search(flow_version):
+                flow_ids.update(
+                    flow_id
+                    for version, flow_id in versions.items()
+                    if fnmatch.fnmatchcase(version, flow_version)
+                )
+            elif flow_version in versions:
+                flow_ids.add(versions[flow_version])
+
+        return flow_ids
+
+    def resolve_all(self, *flow_qualifiers):
+        """Get the flow ids for several flow qualifiers.
+
+        Parameters
+        ----------
+        flow_qualifiers: tuple
+            The flow qualifiers, as for resolve.
+
+        Returns
+        -------
+        set
+            The ids of the flows that match
+            any of the qualifiers.
+        """
+        flow_ids = set()
+        for flow_qualifier in flow_qualifiers:
+            flow_ids.update(self.resolve(flow_qualifier))
+
+        return flow_ids
+
+
+# Catalog used to resolve flow qualifiers
+_catalog = FlowCatalog()
+
+
+def set_flow_catalog(catalog):
+    """Set the catalog used to resolve
+    flow qualifiers.
+
+    Parameters
+    ----------
+    catalog: FlowCatalog | None
+        The catalog. None resets to a catalog
+        that is kept in memory only.
+    """
+    global _catalog
+    _catalog = catalog if catalog is not None else FlowCatalog()
+
+
+def get_flow_catalog():
+    """Get the catalog used to resolve
+    flow qualifiers.
+
+    Returns
+    -------
+    FlowCatalog
+        The catalog.
+    """
+    return _catalog
@@ -0,0 +1,496 @@
+import functools
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from src.backend import DispatchingBackend, MemoizedBackend, get_backend, set_backend
+
+logger = logging.getLogger(__name__)
+
+# Name of the stage for the work that is
+# done outside of any instrumented stage.
+UNSTAGED = 'unstaged'
+
+# Report that collects the measurements. None,
+# if the instrumentation is disabled.
+_report = None
+# Stages that are active in the current thread,
+# the innermost one is the last.
+_local = threading.local()
+
+
+class StageStatistics(object):
+
+    def __init__(self, name):
+        """Measurements of a stage, summed over
+        all the times the stage was entered.
+
+        Parameters
+        ----------
+        name: str
+            Path of the stage, the names of the
+            enclosing stages joined by '/'.
+        """
+        self.name = name
+        self.count = 0
+        self.wall_time = 0.0
+        self.openml_calls = Counter()
+        self.bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rows = 0
+
+    def to_dict(self):
+
+        return {
+            'count': self.count,
+            'wall_time': self.wall_time,
+            'openml_calls': dict(self.openml_calls),
+            'bytes': self.bytes,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'rows': self.rows
+        }
+
+
+class Report(object):
+
+    def __init__(self, span_callback=None):
+        """A report of the time spent in the stages of
+        the extraction and analysis, together with the
+        OpenML calls, cache lookups and rows of each stage.
+
+        OpenML calls, cache lookups and rows are counted
+        for the innermost active stage only, the wall time
+        of a stage includes the time of its inner stages.
+
+        Parameters
+        ----------
+        span_callback: callable | None
+            Called with a span, a dict with the name,
+            start_time, end_time and attributes of
+            the stage, every time a stage is left.
+            log_span logs the spans.
+        """
+        self.stages = dict()
+        self.span_callback = span_callback
+        self._lock = threading.Lock()
+
+    def _stage(self, name):
+
+        if name not in self.stages:
+            self.stages[name] = StageStatistics(name)
+
+        return self.stages[name]
+
+    def add(self, name, **measurements):
+        """Add measurements to a stage.
+
+        Parameters
+        ----------
+        name: str
+            Path of the stage.
+        measurements: dict
+            Values that are added to the attributes
+            of the stage, openml_calls is a dict of
+            number of calls by endpoint.
+        """
+        with self._lock:
+            statistics = self._stage(name)
+            for key, value in measurements.items():
+                if key == 'openml_calls':
+                    statistics.openml_calls.update(value)
+                else:
+                    setattr(statistics, key, getattr(statistics, key) + value)
+
+    def measurements(self, name):
+        """Get the measurements of a stage.
+
+        Parameters
+        ----------
+        name: str
+            Path of the stage.
+
+        Returns
+        -------
+        dict
+            The measurements, zero if the stage
+            has not been measured yet.
+        """
+        with self._lock:
+            if name in self.stages:
+                return self.stages[name].to_dict()
+
+        return StageStatistics(name).to_dict()
+
+    @property
+    def openml_calls(self):
+        """Number of OpenML calls by endpoint
+        over all the stages."""
+        calls = Counter()
+        for statistics in self.stages.values():
+            calls.update(statistics.openml_calls)
+
+        return calls
+
+    def to_dict(self):
+        """Get the measurements as plain data.
+
+        Returns
+        -------
+        dict
+            The measurements keyed by stage.
+        """
+        with self._lock:
+            return {
+                name: statistics.to_dict()
+                for name, statistics in self.stages.items()
+            }
+
+    def save(self, path):
+        """Save the report as JSON.
+
+        Parameters
+        ----------
+        path: str
+            Path of the file.
+        """
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def summary(self):
+        """Get a table of the stages.
+
+        Returns
+        -------
+        str
+            A line for every stage, sorted
+            by the stage path.
+        """
+        lines = [
+            '%-60s %6s %10s %8s %12s %8s %8s %10s' % (
+                'stage', 'count', 'time', 'calls',
+                'bytes', 'hits', 'misses', 'rows'
+            )
+        ]
+        for name, statistics in sorted(self.to_dict().items()):
+            lines.append(
+                '%-60s %6d %9.3fs %8d %12d %8d %8d %10d' % (
+                    name,
+                    statistics['count'],
+                    statistics['wall_time'],
+                    sum(statistics['openml_calls'].values()),
+                    statistics['bytes'],
+                    statistics['cache_hits'],
+                    statistics['cache_misses'],
+                    statistics['rows']
+                )
+            )
+
+        return '\n'.join(lines)
+
+
+def log_span(span):
+    """Log a finished span at debug level.
+
+    Parameters
+    ----------
+    span: dict
+        The span, as given to the span
+        callback of a report.
+    """
+    logger.debug('span %s', json.dumps(span, sort_keys=True))
+
+
+def set_report(report):
+    """Set the report that collects the
+    measurements.
+
+    Parameters
+    ----------
+    report: Report | None
+        The report. None disables the
+        instrumentation.
+    """
+    global _report
+    _report = report
+
+
+def get_report():
+    """Get the report that collects the
+    measurements.
+
+    Returns
+    -------
+    Report | None
+        The report if the instrumentation
+        is enabled, otherwise None.
+    """
+    return _report
+
+
+def _active_stages():
+
+    if not hasattr(_local, 'stages'):
+        _local.stages = list()
+
+    return _local.stages
+
+
+def _current_stage():
+
+    stages = _active_stages()
+
+    return stages[-1] if len(stages) > 0 else UNSTAGED
+
+
+@contextmanager
+def stage(name):
+    """Measure the wall time of a stage.
+
+    The stage is nested in the active stage of
+    the thread, if there is one. Nothing is
+    measured if the instrumentation is disabled.
+
+    Parameters
+    ----------
+    name: str
+        Name of the stage.
+    """
+    report = _report
+    if report is None:
+        yield
+        return
+
+    stages = _active_stages()
+    path = '/'.join((stages[-1], name)) if len(stages) > 0 else name
+    stages.append(path)
+    before = report.measurements(path)
+    start_time = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start
+        stages.pop()
+        report.add(path, count=1, wall_time=wall_time)
+        if report.span_callback is not None:
+            # the measurements of this span are the
+            # difference to the ones before it started
+            after = report.measurements(path)
+            attributes = {
+                key: value - before[key]
+                for key, value in after.items()
+                if key not in ('count', 'openml_calls')
+            }
+            attributes['openml_calls'] = dict(
+                Counter(after['openml_calls']) - Counter(before['openml_calls'])
+            )
+            report.span_callback(
+                {
+                    'name': path,
+                    'start_time': start_time,
+                    'end_time': start_time + wall_time,
+                    'attributes': attributes
+                }
+            )
+
+
+def instrument(name):
+    """Decorator that measures every call
+    of a function as a stage.
+
+    Parameters
+    ----------
+    name: str
+        Name of the stage.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def bind_stage(function):
+    """Bind a function to the active stage, so
+    that the measurements of calls made in other
+    threads are counted for the stage.
+
+    Parameters
+    ----------
+    function: callable
+        The function that will be called
+        in another thread.
+
+    Returns
+    -------
+    callable
+        The bound function.
+    """
+    if _report is None:
+        return function
+
+    stages = list(_active_stages())
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        previous_stages = _active_stages()
+        _local.stages = list(stages)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _local.stages = previous_stages
+
+    return wrapper
+
+
+def record_call(endpoint, nr_bytes=0):
+    """Count an OpenML call for the active stage.
+
+    Parameters
+    ----------
+    endpoint: str
+        The called endpoint.
+    nr_bytes: int
+        Size of the response.
+    """
+    if _report is not None:
+        _report.add(
+            _current_stage(),
+            openml_calls={endpoint: 1},
+            bytes=nr_bytes
+        )
+
+
+def record_cache(hits, misses):
+    """Count cache lookups for the active stage.
+
+    Parameters
+    ----------
+    hits: int
+        Number of values found in the cache.
+    misses: int
+        Number of values not found in the cache.
+    """
+    if _report is not None:
+        _report.add(_current_stage(), cache_hits=hits, cache_misses=misses)
+
+
+def record_rows(rows):
+    """Count processed rows for the active stage.
+
+    Parameters
+    ----------
+    rows: int
+        Number of processed rows, e.g. runs.
+    """
+    if _report is not None:
+        _report.add(_current_stage(), rows=rows)
+
+
+def _response_size(response):
+    """Get the size of a response as the
+    length of its JSON encoding."""
+    try:
+        return len(json.dumps(response, default=sorted))
+    except TypeError:
+        return 0
+
+
+class InstrumentedBackend(DispatchingBackend):
+
+    def __init__(self, backend):
+        """A backend that counts the calls and the
+        response sizes of another backend for the
+        active stage.
+
+        openml-python does not expose the size of the
+        HTTP responses, so the size of the returned
+        data, encoded as JSON, is counted instead.
+
+        Parameters
+        ----------
+        backend: Backend
+            The backend whose calls are counted.
+        """
+        self.backend = backend
+
+    def _call(self, method, **kwargs):
+
+        if _report is None:
+            return getattr(self.backend, method)(**kwargs)
+
+        try:
+            response = getattr(self.backend, method)(**kwargs)
+        except Exception:
+            record_call(method)
+            raise
+        record_call(method, _response_size(response))
+
+        return response
+
+
+def instrument_backend(backend):
+    """Count the OpenML calls of a backend.
+
+    For a memoized backend, only the calls that
+    are not served from its cache are counted.
+
+    Parameters
+    ----------
+    backend: Backend
+        The backend whose calls are counted.
+
+    Returns
+    -------
+    Backend
+        The backend to use instead.
+    """
+    if isinstance(backend, MemoizedBackend):
+        if not isinstance(backend.backend, InstrumentedBackend):
+            backend.backend = InstrumentedBackend(backend.backend)
+        return backend
+
+    return InstrumentedBackend(backend)
+
+
+@contextmanager
+def instrumentation(report=None):
+    """Enable the instrumentation.
+
+    The measurements are collected in the report
+    and the OpenML calls of the active backend are
+    counted. The previous report and backend are
+    restored afterwards.
+
+    Parameters
+    ----------
+    report: Report | None
+        The report, if None a new one is created.
+
+    Yields
+    ------
+    Report
+        The report with the measurements.
+    """
+    report = report if report is not None else Report()
+    previous_report = _report
+    backend = get_backend()
+    memoized_backend = backend.backend \
+        if isinstance(backend, MemoizedBackend) else None
+    set_report(report)
+    set_backend(instrument_backend(backend))
+    try:
+        yield report
+    finally:
+        if memoized_backend is not None:
+            backend.backend = memoized_backend
+        set_backend(backend)
+        set_report(previous_report)
@@ -1,15 +1,33 @@
-from collections import defaultdict
+import numbers
 
 import numpy as np
 import pandas
-import openml
 
+from src.engine import (
+    cell_best,
+    cell_count_at_most,
+    cells_index,
+    cell_keys,
+    cell_mean,
+    cell_sort,
+    cell_sum,
+    evaluation_values,
+    frame_from_cells,
+    lookup_cells,
+    series_from_cells
+)
+from src.evaluations import get_evaluations, get_measure_evaluations
+from src.executor import run_async
+from src.instrumentation import instrument, record_rows
 from src.result_extractor import ResultExtractor
+from src.run_index import RunIndex
 
 
+@instrument('get_tasks_by_measure')
 def get_tasks_by_measure(
         data_frame,
-        evaluation_measure='predictive_accuracy'
+        evaluation_measure='predictive_accuracy',
+        sparse=False
 ):
     """Get a DataFrame of tasks and flow combinations
     and their corresponding evaluation measure.
@@ -22,51 +40,60 @@ def get_tasks_by_measure(
 
     Parameters
     ----------
-    data_frame: pandas.DataFrame
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
         A pandas DataFrame where the results are organized
         as follows:
             rows - are tasks
             column - are flows
             values - set if there are runs for the flow and
             task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor, then the DataFrame is not
+        needed at all.
     evaluation_measure: str
         Evaluation measure used to assess the runs.
+    sparse: bool
+        If True, the result is a Series indexed by
+        (task_id, flow_id) with only the task and flow
+        combinations that have runs.
 
     Returns
     -------
-    pandas.DataFrame
+    pandas.DataFrame | pandas.Series
         A DataFrame containing task
         and flow combinations along with their
         evaluation measure value.
         The measure is averaged over all runs
         for each flow.
     """
-    matrix = defaultdict(lambda: dict())
-
-    # each entry in the list is the averaged
-    # accuracy for all runs of the flow.
-    flow_accuracies = []
-    # check if the pandas df has results
-    if len(data_frame.index) > 0:
-        for index, row in data_frame.iterrows():
-            for column in data_frame.columns.values.tolist():
-                # clear the previous results
-                flow_accuracies.clear()
-
-                run_ids = row[column]
-                if run_ids is not np.NaN:
-                    for run_id in run_ids:
-                        _ = openml.runs.get_run(run_id)
-                        try:
-                            flow_accuracies.append(_.evaluations[evaluation_measure])
-                        except KeyError:
-                            # this evaluation measure is not included
-                            pass
-                    matrix[index][column] = np.mean(flow_accuracies).item()
-
-    return pandas.DataFrame.from_dict(matrix, orient='index')
+    run_index = _as_run_index(data_frame)
+    record_rows(len(run_index))
+    # evaluations for all the runs
+    # in the DataFrame, fetched in bulk.
+    values = evaluation_values(
+        run_index.run_ids,
+        get_evaluations(run_index.run_ids.tolist(), evaluation_measure)
+    )
+    # each entry is the averaged accuracy
+    # for all runs of the flow.
+    flow_accuracies = cell_mean(run_index, values)
+
+    if sparse:
+        return series_from_cells(
+            run_index.cell_task_ids,
+            run_index.cell_flow_ids,
+            flow_accuracies
+        )
+
+    return frame_from_cells(
+        run_index.cell_task_ids,
+        run_index.cell_flow_ids,
+        flow_accuracies.tolist(),
+        *_frame_axes(data_frame)
+    )
 
 
+@instrument('get_tasks_by_minima_region')
 def get_tasks_by_minima_region(
     data_frame,
     flow_ids=None,
@@ -74,7 +101,9 @@ def get_tasks_by_minima_region(
     order='increasing',
     measure='predictive_accuracy',
     threshold=0.05,
-    detailed='No'
+    detailed='No',
+    sparse=False,
+    random_results=None
 ):
     """Get a DataFrame with different task and flow
      combinations showing the franction of runs using
@@ -90,13 +119,16 @@ def get_tasks_by_minima_region(
 
     Parameters
     ----------
-    data_frame: pandas.DataFrame
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
         A pandas DataFrame where the results are organized
         as follows:
             rows - are tasks
             column - are flows
             values - set if there are runs for the flow and
             task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor, then the DataFrame is not
+        needed at all.
     flow_ids: set | None
         Restrictions on which flows to consider.
         Should be the same as the flows considered
@@ -121,87 +153,301 @@ def get_tasks_by_minima_region(
         that reach the minima region will be a
         tuple and also include the number of all
         runs that make use of RandomSearch.
+    sparse: bool
+        If True, the result is a Series indexed by
+        (task_id, flow_id) with only the task and flow
+        combinations that have runs.
+    random_results: src.run_index.RunIndex | None
+        The index of the runs using RandomSearch, e.g.
+        the results_index of a ResultExtractor with the
+        uploader restriction. If None, the runs are
+        listed for the flow and task restrictions.
+
     Returns
     -------
-    pandas.DataFrame
+    pandas.DataFrame | pandas.Series
         A DataFrame that shows the fraction
         of runs using RandomSearch that fall
         into the best minima region for
         different task and flow combinations.
     """
+    random_index, distances, selected_cells, best_index, best_values = \
+        _get_minima_region_distances(
+            data_frame,
+            flow_ids,
+            task_restrictions,
+            order,
+            measure,
+            random_results
+        )
+
+    # runs that fall into the minima region, runs
+    # without the evaluation measure never do.
+    with np.errstate(invalid='ignore'):
+        in_region = distances <= threshold
+    nr_runs_minima_region = cell_sum(random_index, in_region)
+    nr_all_runs = random_index.counts
+
+    fractions = list()
+    for nr_in_region, nr_runs in zip(
+        nr_runs_minima_region[selected_cells].tolist(),
+        nr_all_runs[selected_cells].tolist()
+    ):
+        if detailed == 'Yes':
+            fractions.append((nr_in_region / nr_runs, nr_runs))
+        else:
+            fractions.append(nr_in_region / nr_runs)
+
+    if sparse:
+        return series_from_cells(
+            random_index.cell_task_ids[selected_cells],
+            random_index.cell_flow_ids[selected_cells],
+            fractions
+        )
+
+    best_results_df = _best_scores_frame(best_index, best_values, data_frame)
+
+    return frame_from_cells(
+        random_index.cell_task_ids[selected_cells],
+        random_index.cell_flow_ids[selected_cells],
+        fractions,
+        best_results_df.index,
+        best_results_df.columns
+    )
+
+
+@instrument('get_tasks_by_minima_region_sweep')
+def get_tasks_by_minima_region_sweep(
+    data_frame,
+    flow_ids=None,
+    thresholds=(0.001, 0.005, 0.01, 0.05),
+    task_restrictions=None,
+    order='increasing',
+    measure='predictive_accuracy',
+    sparse=False,
+    random_results=None
+):
+    """Get the fraction of runs using RandomSearch that
+    reach the best found minima region for several
+    thresholds.
+
+    The runs and their evaluations are fetched once.
+    The distances of the runs from the best value are
+    sorted within every task and flow combination, so
+    every threshold costs only a binary search.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        A pandas DataFrame where the results are organized
+        as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+            task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor, then the DataFrame is not
+        needed at all.
+    flow_ids: set | None
+        Restrictions on which flows to consider.
+        Should be the same as the flows considered
+        in the given data_frame.
+    thresholds: list
+        Maximal differences allowed from the best value
+        to consider a run in the minima region.
+    task_restrictions: dict | None
+        Restrictions on which tasks to consider.
+        Should be the same as the task restrictions
+        in the given data_frame.
+    order: str
+        What to consider as the best value for the run
+        prediction. The lowest value 'decreasing'
+        or the highest value which corresponds to
+        'increasing'.
+    measure: str
+        Evaluation measure used to compare the runs.
+    sparse: bool
+        If True, the result has a row for every task and
+        flow combination with runs, indexed by (task_id,
+        flow_id), and the thresholds as columns.
+    random_results: src.run_index.RunIndex | None
+        The index of the runs using RandomSearch. If
+        None, the runs are listed for the flow and
+        task restrictions.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A task x flow x threshold cube, with tasks as
+        rows and the columns organized by threshold and
+        flow. The DataFrame of a threshold is the same
+        as the one of get_tasks_by_minima_region.
+    """
+    random_index, distances, selected_cells, best_index, best_values = \
+        _get_minima_region_distances(
+            data_frame,
+            flow_ids,
+            task_restrictions,
+            order,
+            measure,
+            random_results
+        )
+
+    thresholds = list(thresholds)
+    nr_runs_minima_region = cell_count_at_most(
+        random_index,
+        cell_sort(random_index, distances),
+        thresholds
+    )[selected_cells]
+    nr_all_runs = random_index.counts[selected_cells]
+    fractions = nr_runs_minima_region / nr_all_runs[:, None]
+
+    task_ids = random_index.cell_task_ids[selected_cells]
+    flow_ids = random_index.cell_flow_ids[selected_cells]
+    if sparse:
+        # the cells of the index are
+        # sorted by task and flow.
+        return pandas.DataFrame(
+            fractions,
+            index=cells_index(task_ids, flow_ids),
+            columns=thresholds
+        )
+
+    if len(thresholds) == 0 or len(task_ids) == 0:
+        return pandas.DataFrame()
+
+    # the tasks and flows in the order
+    # of get_tasks_by_minima_region
+    best_results_df = _best_scores_frame(best_index, best_values, data_frame)
+    frame = frame_from_cells(
+        task_ids,
+        flow_ids,
+        fractions[:, 0].tolist(),
+        best_results_df.index,
+        best_results_df.columns
+    )
+    cube = np.full((len(frame.index), len(thresholds), len(frame.columns)), np.nan)
+    cube[
+        frame.index.get_indexer(task_ids),
+        :,
+        frame.columns.get_indexer(flow_ids)
+    ] = fractions
+
+    return pandas.DataFrame(
+        cube.reshape(len(frame.index), -1),
+        index=frame.index,
+        columns=pandas.MultiIndex.from_product([thresholds, frame.columns])
+    )
+
+
+def _get_minima_region_distances(
+        data_frame,
+        flow_ids,
+        task_restrictions,
+        order,
+        measure,
+        random_results=None
+):
+    """Get the distance of every run using RandomSearch
+    from the best value of its task and flow.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        A pandas DataFrame where the results are organized
+        as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+            task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor, then the DataFrame is not
+        needed at all.
+    flow_ids: set | None
+        Restrictions on which flows to consider.
+    task_restrictions: dict | None
+        Restrictions on which tasks to consider.
+    order: str
+        What to consider as the best value for the run
+        prediction.
+    measure: str
+        Evaluation measure used to compare the runs.
+    random_results: src.run_index.RunIndex | None
+        The index of the runs using RandomSearch. If
+        None, the runs are listed.
+
+    Returns
+    -------
+    tuple
+        The index of the runs using RandomSearch, the
+        distance of every run (NaN for the runs without
+        the evaluation measure), a mask of the cells of
+        the index that are part of the best results, the
+        index of the runs of the best results and the
+        best value of each of its cells.
+    """
     # 903 is the id of Philipp Probst
     # His experiments use RandomSearch.
 
     # There will always be 1 task
     # restriction. The uploader
     # restriction.
-    if task_restrictions is None:
-        task_restrictions = dict()
-    task_restrictions['uploader'] = [903]
+    if random_results is None:
+        if task_restrictions is None:
+            task_restrictions = dict()
+        task_restrictions['uploader'] = [903]
+
+        random_results = ResultExtractor(
+            *flow_ids if flow_ids is not None else None,
+            **task_restrictions
+        ).results_index
+    # best minimas found for the task
+    # and flow combinations.
+    best_index, best_values = _get_best_scores(data_frame, order, measure)
+
+    # index that contains for each task and flow,
+    # the runs optimized with RandomSearch if
+    # available.
+    random_index = random_results
+    record_rows(len(random_index))
+    # evaluations for all the runs using
+    # RandomSearch, fetched in bulk.
+    random_values = evaluation_values(
+        random_index.run_ids,
+        get_evaluations(random_index.run_ids.tolist(), measure)
+    )
 
-    result_extractor = ResultExtractor(
-        *flow_ids if flow_ids is not None else None,
-        **task_restrictions
+    # only the task and flow combinations
+    # that are part of the best results,
+    # matched by task and flow.
+    selected_cells = np.isin(
+        random_index.cell_task_ids,
+        best_index.tasks
+    ) & np.isin(
+        random_index.cell_flow_ids,
+        best_index.flows
     )
-    # DataFrame with the best minimas found
-    # for the task and flow combinations.
-    best_results_df = get_tasks_by_best_score(data_frame, order=order, measure=measure)
 
-    # DataFrame that contains for each task and flow,
-    # the set of runs optimized with RandomSearch if
-    # available.
-    randomsearch_df = result_extractor.results
-
-    matrix = defaultdict(lambda: dict())
-
-    # if there are results
-    if len(best_results_df.index) > 0:
-        for tuple_best, tuple_rand in zip(best_results_df.iterrows(), randomsearch_df.iterrows()):
-            # first element of both tuples is the index
-            # second element is the row
-
-            index = tuple_best[0]
-            # get rows in each DataFrame
-            best_row = tuple_best[1]
-            rand_row = tuple_rand[1]
-
-            for column in best_results_df.columns.values.tolist():
-                # best value for flow and task
-                best_value = best_row[column]
-
-                # if we do have a best value
-                # basically as long as there
-                # is 1 run
-                if best_value is not np.NaN:
-                    # get all the runs for the flow
-                    # runs are making use of
-                    # RandomSearch
-                    random_runs = rand_row[column]
-                    if random_runs is not np.NaN:
-                        nr_all_runs = len(random_runs)
-                        nr_runs_minima_region = 0
-                        for random_run in random_runs:
-                            _ = openml.runs.get_run(random_run)
-
-                            try:
-                                predictive_measure = _.evaluations[measure]
-                                if abs(predictive_measure - best_value) <= threshold:
-                                    nr_runs_minima_region += 1
-                            except KeyError:
-                            # this evaluation measure is not included
-                                pass
-                        if detailed == 'Yes':
-                            matrix[index][column] = (nr_runs_minima_region / nr_all_runs, nr_all_runs)
-                        else:
-                            matrix[index][column] = nr_runs_minima_region / nr_all_runs
-
-    return pandas.DataFrame.from_dict(matrix, orient='index')
+    # best value for the flow and task of
+    # every run, NaN if there is no best value
+    cell_best_values = lookup_cells(
+        cell_keys(best_index.cell_task_ids, best_index.cell_flow_ids),
+        best_values.astype(float),
+        cell_keys(random_index.cell_task_ids, random_index.cell_flow_ids)
+    )
+    run_best_values = np.repeat(cell_best_values, random_index.counts)
 
+    distances = np.abs(random_values - run_best_values)
 
+    return random_index, distances, selected_cells, best_index, best_values
+
+
+@instrument('get_tasks_by_best_score')
 def get_tasks_by_best_score(
         data_frame,
         order='increasing',
-        measure='predictive_accuracy'
+        measure='predictive_accuracy',
+        sparse=False
 ):
     """Return a DataFrame with the best found
     minima value for each entry in the given
@@ -215,13 +461,15 @@ def get_tasks_by_best_score(
 
     Parameters
     ----------
-    data_frame: pandas.DataFrame
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
         A pandas DataFrame where the results are organized
         as follows:
             rows - are tasks
             column - are flows
             values - set if there are runs for the flow and
                 task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor.
         From the non-empty entries in the DataFrame, the run
         ids will be used to determine the run with the best
         value for the given measure.
@@ -231,6 +479,86 @@ def get_tasks_by_best_score(
         vice versa for'increasing'.
     measure: str
         Evaluation measure used to compare the runs.
+    sparse: bool
+        If True, the result is a Series indexed by
+        (task_id, flow_id) with only the task and flow
+        combinations that have runs.
+
+    Returns
+    -------
+    pandas.DataFrame | pandas.Series
+        A DataFrame that contains the best
+        minima value for each task and
+        flow combination if runs exist.
+    """
+    best_index, best_values = _get_best_scores(data_frame, order, measure)
+
+    if sparse:
+        return series_from_cells(
+            best_index.cell_task_ids,
+            best_index.cell_flow_ids,
+            best_values.astype(float)
+        )
+
+    return _best_scores_frame(best_index, best_values, data_frame)
+
+
+def _get_best_scores(data_frame, order, measure):
+    """Find the best value for the given measure
+    in every non-empty entry of the DataFrame.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        A pandas DataFrame where the results are organized
+        as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+                task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor.
+    order: str
+        What to consider as the best value for a task and flow.
+    measure: str
+        Evaluation measure used to compare the runs.
+
+    Returns
+    -------
+    tuple
+        The index of the runs in the DataFrame and
+        the best value of every cell in the index.
+    """
+    run_index = _as_run_index(data_frame)
+    record_rows(len(run_index))
+    # evaluations for all the runs
+    # in the DataFrame, fetched in bulk.
+    values = evaluation_values(
+        run_index.run_ids,
+        get_evaluations(run_index.run_ids.tolist(), measure)
+    )
+    best_values = cell_best(run_index, values, order).astype(object)
+    # -1 is kept as an integer for the cells where
+    # no run improves on the starting value.
+    with np.errstate(invalid='ignore'):
+        improving = values >= -1 if order == 'increasing' else values <= -1
+    best_values[cell_sum(run_index, improving) == 0] = -1
+
+    return run_index, best_values
+
+
+def _best_scores_frame(run_index, best_values, data_frame):
+    """Build the DataFrame of the best scores.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The index of the runs in the DataFrame.
+    best_values: numpy.ndarray
+        The best value of every cell in the index.
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        The DataFrame, which gives the order
+        of the tasks and flows.
 
     Returns
     -------
@@ -239,32 +567,319 @@ def get_tasks_by_best_score(
         minima value for each task and
         flow combination if runs exist.
     """
-    best_score = -1
-    matrix = defaultdict(lambda: dict())
-
-    # find the minimum for the flow from all the runs
-
-    # check if the pandas df has results
-    if len(data_frame.index) > 0:
-        for index, row in data_frame.iterrows():
-            for column in data_frame.columns.values.tolist():
-                run_ids = row[column]
-                if run_ids is not np.NaN:
-                    for run_id in run_ids:
-                        _ = openml.runs.get_run(run_id)
-                        try:
-                            predictive_measure = _.evaluations[measure]
-                            if order == 'increasing':
-                                if predictive_measure >= best_score:
-                                    best_score = predictive_measure
-                            else:
-                                if predictive_measure <= best_score:
-                                    best_score = predictive_measure
-                        except KeyError:
-                            # this evaluation measure is not included
-                            pass
-                    matrix[index][column] = best_score
-                # reset value
-                best_score = -1
-
-    return pandas.DataFrame.from_dict(matrix, orient='index')
+    return frame_from_cells(
+        run_index.cell_task_ids,
+        run_index.cell_flow_ids,
+        best_values.tolist(),
+        *_frame_axes(data_frame)
+    )
+
+
+def _as_run_index(data_frame):
+    """Get the index of the runs of a DataFrame.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        The DataFrame with the runs, or
+        already the index of the runs.
+
+    Returns
+    -------
+    src.run_index.RunIndex
+        The index of the runs.
+    """
+    if isinstance(data_frame, RunIndex):
+        return data_frame
+
+    return RunIndex.from_frame(data_frame)
+
+
+def _frame_axes(data_frame):
+    """Get the order of the tasks and flows
+    for a dense result.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        The DataFrame with the runs, or
+        the index of the runs.
+
+    Returns
+    -------
+    tuple
+        The tasks and the flows of the DataFrame,
+        or the sorted ones of an index.
+    """
+    if isinstance(data_frame, RunIndex):
+        return (
+            pandas.Index(data_frame.tasks.astype(np.int64)),
+            pandas.Index(data_frame.flows.astype(np.int64))
+        )
+
+    # new indexes, the lookup table of a pandas index is
+    # built lazily and not thread-safe, the operations
+    # can run concurrently on one DataFrame.
+    return (
+        pandas.Index(data_frame.index.values, name=data_frame.index.name),
+        pandas.Index(data_frame.columns.values, name=data_frame.columns.name)
+    )
+
+
+@instrument('get_evaluation_report')
+def get_evaluation_report(
+        data_frame,
+        measures=('predictive_accuracy',),
+        aggregations=('mean',),
+        order='increasing',
+        sparse=False
+):
+    """Get a DataFrame of tasks and flow combinations
+    with several aggregations of several evaluation
+    measures.
+
+    The evaluations of every run are fetched once
+    for all the measures and all the aggregations
+    are computed in one pass.
+
+    Parameters
+    ----------
+    data_frame: pandas.DataFrame | src.run_index.RunIndex
+        A pandas DataFrame where the results are organized
+        as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+            task combination, otherwise it is NaN.
+        Or the index of the runs, e.g. the results_index
+        of a ResultExtractor, then the DataFrame is not
+        needed at all.
+    measures: list
+        Evaluation measures used to assess the runs.
+    aggregations: list
+        Aggregations over the runs of each task and flow
+        combination. 'mean', 'best' (as given by
+        get_tasks_by_best_score), 'std' (with one degree
+        of freedom), 'count' or a number between 0 and 1
+        for a quantile.
+    order: str
+        What to consider as the best value for a task and flow.
+        If 'decreasing' the lower the value the better,
+        vice versa for 'increasing'.
+    sparse: bool
+        If True, the result has a row for every task and
+        flow combination with runs, indexed by (task_id,
+        flow_id), and the columns organized by measure
+        and aggregation.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A DataFrame with tasks as rows and the
+        columns organized by measure, aggregation
+        and flow. Runs without an evaluation measure
+        are not part of its aggregations.
+    """
+    run_index = _as_run_index(data_frame)
+    record_rows(len(run_index))
+    # evaluations for all the runs and
+    # measures, fetched in bulk.
+    evaluations = get_measure_evaluations(run_index.run_ids.tolist(), measures)
+    values = pandas.DataFrame(
+        {
+            measure: evaluation_values(run_index.run_ids, evaluations[measure])
+            for measure in measures
+        }
+    )
+    grouped_values = values.groupby(
+        np.repeat(np.arange(len(run_index.counts)), run_index.counts)
+    )
+
+    cell_values = dict()
+    for aggregation in aggregations:
+        if aggregation == 'mean':
+            cell_values[aggregation] = grouped_values.mean()
+        elif aggregation == 'best':
+            # the same values as get_tasks_by_best_score
+            cell_values[aggregation] = pandas.DataFrame(
+                {
+                    measure: cell_best(run_index, values[measure].values, order)
+                    for measure in measures
+                }
+            )
+        elif aggregation == 'std':
+            cell_values[aggregation] = grouped_values.std()
+        elif aggregation == 'count':
+            cell_values[aggregation] = grouped_values.count()
+        elif isinstance(aggregation, numbers.Real) and 0 <= aggregation <= 1:
+            cell_values[aggregation] = grouped_values.quantile(aggregation)
+        else:
+            raise ValueError('Unknown aggregation: %s' % aggregation)
+
+    cells = cells_index(run_index.cell_task_ids, run_index.cell_flow_ids)
+    if sparse:
+        return pandas.DataFrame(
+            {
+                (measure, aggregation): cell_values[aggregation][measure].values
+                for measure in measures
+                for aggregation in aggregations
+            },
+            index=cells
+        ).sort_index(axis=1)
+
+    aggregated = dict()
+    for measure in measures:
+        for aggregation in aggregations:
+            aggregated[(measure, aggregation)] = pandas.Series(
+                cell_values[aggregation][measure].values,
+                index=cells
+            ).unstack()
+
+    if len(aggregated) == 0 or len(run_index) == 0:
+        return pandas.DataFrame()
+
+    # tasks and flows in the order
+    # of the given DataFrame
+    tasks, flows = _frame_axes(data_frame)
+    tasks = tasks[tasks.isin(run_index.tasks)]
+    flows = flows[flows.isin(run_index.flows)]
+
+    return pandas.concat(
+        {
+            key: cell_frame.reindex(index=tasks, columns=flows)
+            for key, cell_frame in aggregated.items()
+        },
+        axis=1
+    ).sort_index(axis=1)
+
+
+@instrument('update_results')
+def update_results(
+        previous_results,
+        data_frame,
+        dirty_cells,
+        operation,
+        **kwargs
+):
+    """Recompute the results of an operation only
+    for the task and flow combinations that changed.
+
+    The operation is applied to the dirty task and
+    flow combinations and to the ones that are not
+    part of the previous results. All the other
+    entries are taken from the previous results.
+    This works for operations where each entry
+    depends only on the runs of its own task and
+    flow, e.g. get_tasks_by_measure or
+    get_tasks_by_best_score.
+
+    Parameters
+    ----------
+    previous_results: pandas.DataFrame
+        The results of the operation before the update.
+    data_frame: pandas.DataFrame
+        A pandas DataFrame where the updated results are
+        organized as follows:
+            rows - are tasks
+            column - are flows
+            values - set if there are runs for the flow and
+            task combination, otherwise it is NaN.
+    dirty_cells: set
+        Tuples of (task_id, flow_id) that changed, as
+        given by ResultExtractor.dirty_cells.
+    operation: callable
+        The operation, it is called with a DataFrame
+        and the keyword arguments.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The results of the operation for the
+        updated DataFrame.
+    """
+    run_index = RunIndex.from_frame(data_frame)
+    record_rows(len(run_index))
+    cell_tasks = run_index.cell_task_ids.astype(np.int64)
+    cell_flows = run_index.cell_flow_ids.astype(np.int64)
+
+    # cells that have to be recomputed
+    known_cells = pandas.MultiIndex.from_product(
+        [previous_results.index, previous_results.columns]
+    )
+    recompute = ~pandas.MultiIndex.from_arrays(
+        [cell_tasks, cell_flows]
+    ).isin(known_cells) | np.array(
+        [cell in dirty_cells for cell in zip(cell_tasks.tolist(), cell_flows.tolist())],
+        dtype=bool
+    )
+
+    recomputed_results = operation(
+        frame_from_cells(
+            cell_tasks[recompute],
+            cell_flows[recompute],
+            [
+                data_frame.at[task_id, flow_id]
+                for task_id, flow_id in zip(
+                    cell_tasks[recompute].tolist(),
+                    cell_flows[recompute].tolist()
+                )
+            ],
+            data_frame.index,
+            data_frame.columns
+        ),
+        **kwargs
+    )
+
+    # the previous results for the cells that
+    # did not change, with the updated values
+    # of the recomputed cells on top.
+    results = recomputed_results.combine_first(previous_results)
+    tasks = data_frame.index[data_frame.index.isin(results.index)]
+    flows = data_frame.columns[data_frame.columns.isin(results.columns)]
+
+    return results.reindex(index=tasks, columns=flows)
+
+
+async def aget_tasks_by_measure(*args, **kwargs):
+    """Asynchronous version of get_tasks_by_measure.
+
+    The arguments and the result are the same
+    as for get_tasks_by_measure.
+    """
+    return await run_async(get_tasks_by_measure, *args, **kwargs)
+
+
+async def aget_tasks_by_minima_region(*args, **kwargs):
+    """Asynchronous version of get_tasks_by_minima_region.
+
+    The arguments and the result are the same
+    as for get_tasks_by_minima_region.
+    """
+    return await run_async(get_tasks_by_minima_region, *args, **kwargs)
+
+
+async def aget_tasks_by_minima_region_sweep(*args, **kwargs):
+    """Asynchronous version of get_tasks_by_minima_region_sweep.
+
+    The arguments and the result are the same
+    as for get_tasks_by_minima_region_sweep.
+    """
+    return await run_async(get_tasks_by_minima_region_sweep, *args, **kwargs)
+
+
+async def aget_evaluation_report(*args, **kwargs):
+    """Asynchronous version of get_evaluation_report.
+
+    The arguments and the result are the same
+    as for get_evaluation_report.
+    """
+    return await run_async(get_evaluation_report, *args, **kwargs)
+
+
+async def aget_tasks_by_best_score(*args, **kwargs):
+    """Asynchronous version of get_tasks_by_best_score.
+
+    The arguments and the result are the same
+    as for get_tasks_by_best_score.
+    """
+    return await run_async(get_tasks_by_best_score, *args, **kwargs)
@@ -1,17 +1,61 @@
-from collections import defaultdict
+import copy
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-import pandas
 import numpy as np
-import openml
+
+from src.executor import run_async
+from src.flow_catalog import get_flow_catalog
+from src.instrumentation import instrument, record_rows, stage
+from src.run_index import RunIndex
+from src.runs import PAGE_SIZE, iter_runs
+from src.task_metadata import filter_tasks
+from src.util import get_flow_ids
+
+# Number of already listed runs that are listed
+# again on an update, in case runs were deleted
+# and the listing shifted. If more runs were
+# deleted, all the runs are listed again.
+UPDATE_OVERLAP = 1000
+
+# Maximal number of flow or task ids in the
+# restriction of a shard of a sharded build.
+SHARD_SIZE = 500
+
+# Restrictions that are saved with a snapshot
+_SAVED_RESTRICTIONS = (
+    'task',
+    'uploader',
+    'task_type',
+    'tag',
+    'min_task_flow',
+    'page_size'
+)
+
+
+class _ListingShifted(Exception):
+    """The run listing shifted by more than
+    the overlap of an update."""
 
 
 class ResultExtractor(object):
 
     def __init__(self, *flow_ids, **task_restrictions):
 
-        # pandas.DataFrame with all runs for
-        # the different flows and tasks
-        self._df = None
+        # index with all runs for the
+        # different flows and tasks
+        self._run_index = None
+        # pandas.DataFrame views of the index,
+        # derived when they are first needed
+        self._reset_views()
+        # highest run id and number of
+        # runs that have been listed
+        self.max_run_id = 0
+        self.listed_runs = 0
+        # task and flow combinations that
+        # changed with the last updates
+        self.dirty_cells = set()
         self.flow_ids = flow_ids
         # Put all the task restrictions as attributes
         for key, value in task_restrictions.items():
@@ -21,8 +65,202 @@ class ResultExtractor(object):
             flow_ids
         )
 
+    @staticmethod
+    def query():
+        """Start a lazy query for a ResultExtractor.
+
+        Returns
+        -------
+        ResultQuery
+            An empty query, nothing is requested
+            until it is collected.
+        """
+        return ResultQuery()
+
+    @classmethod
+    async def abuild(cls, *flow_ids, **task_restrictions):
+        """Build a ResultExtractor without blocking
+        the event loop.
+
+        The OpenML query and the construction of the
+        DataFrame are run in the default executor of
+        the event loop. The arguments are the same as
+        for the constructor.
+
+        Returns
+        -------
+        ResultExtractor
+            The ResultExtractor for the given
+            restrictions.
+        """
+        return await run_async(cls, *flow_ids, **task_restrictions)
+
+    @classmethod
+    @instrument('ResultExtractor.build_sharded')
+    def build_sharded(
+            cls,
+            *flow_ids,
+            processes=None,
+            shard_by='flow',
+            shard_size=SHARD_SIZE,
+            **task_restrictions
+    ):
+        """Build a ResultExtractor with the run listing
+        split into shards that are listed in a process
+        pool.
+
+        The flow ids, or the task ids of the task
+        restriction, are split into ranges and every
+        shard lists and indexes the runs of one range.
+        The indices of the shards are combined in run
+        id order, so the extractor is the same as the
+        one built in a single process. Without flow ids,
+        the flows of the flow catalog are split.
+
+        Parameters
+        ----------
+        flow_ids: tuple
+            Ids of the flows to be considered, as
+            for the constructor.
+        processes: int | None
+            Number of processes. If None, the number
+            of CPUs is used.
+        shard_by: str
+            'flow' to split the flows or 'task' to
+            split the tasks of the task restriction.
+        shard_size: int
+            Maximal number of ids of a shard.
+        task_restrictions: dict
+            Restrictions, as for the constructor.
+
+        Returns
+        -------
+        ResultExtractor
+            The ResultExtractor for the given
+            restrictions.
+        """
+        if shard_by == 'flow':
+            shard_ids = flow_ids
+            if len(shard_ids) == 0:
+                catalog = get_flow_catalog()
+                catalog.refresh_if_stale()
+                shard_ids = catalog.flow_ids()
+        elif shard_by == 'task':
+            if task_restrictions.get('task') is None:
+                raise ValueError('Sharding by task needs a task restriction.')
+            shard_ids = task_restrictions['task']
+        else:
+            raise ValueError('Unknown shard_by: %s' % shard_by)
+
+        processes = processes if processes is not None else os.cpu_count()
+        shard_ids = sorted(set(shard_ids))
+        nr_shards = max(processes, -(-len(shard_ids) // shard_size))
+        # the progress callback can not be
+        # passed to the other processes.
+        shard_restrictions = {
+            key: value
+            for key, value in task_restrictions.items()
+            if key not in ('progress', 'min_task_flow')
+        }
+        shards = list()
+        for ids in np.array_split(np.asarray(shard_ids, dtype=np.int64), nr_shards):
+            if len(ids) == 0:
+                continue
+            if shard_by == 'flow':
+                shards.append((ids.tolist(), shard_restrictions))
+            else:
+                shards.append((flow_ids, dict(shard_restrictions, task=ids.tolist())))
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            built_shards = list(
+                pool.map(_build_shard, *zip(*shards))
+            ) if len(shards) > 0 else list()
+
+        result_extractor = cls.__new__(cls)
+        result_extractor._run_index = RunIndex.concatenate(
+            [run_index for run_index, _ in built_shards]
+        )
+        result_extractor._reset_views()
+        record_rows(len(result_extractor._run_index))
+        result_extractor.max_run_id = int(result_extractor._run_index.run_ids.max()) \
+            if len(result_extractor._run_index) > 0 else 0
+        result_extractor.listed_runs = sum(
+            listed_runs for _, listed_runs in built_shards
+        )
+        result_extractor.dirty_cells = set()
+        result_extractor.flow_ids = flow_ids
+        for key, value in task_restrictions.items():
+            setattr(result_extractor, key, value)
+
+        return result_extractor
+
+    def save(self, path):
+        """Save a snapshot of the extractor.
+
+        The run index is saved as NumPy arrays and the
+        restrictions together with the state needed
+        for updates as JSON in the given directory.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the snapshot will be saved.
+        """
+        self._run_index.save(path)
+
+        metadata = {
+            'flow_ids': [int(flow_id) for flow_id in self.flow_ids],
+            'task_restrictions': {
+                key: getattr(self, key)
+                for key in _SAVED_RESTRICTIONS
+                if hasattr(self, key)
+            },
+            'max_run_id': self.max_run_id,
+            'listed_runs': self.listed_runs,
+            'dirty_cells': sorted(self.dirty_cells)
+        }
+        with open(os.path.join(path, 'metadata.json'), 'w') as file:
+            json.dump(metadata, file)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a snapshot saved with save.
+
+        No OpenML query is made.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the snapshot is saved.
+        mmap: bool
+            If True, the arrays of the run index are
+            memory-mapped instead of read into memory.
+
+        Returns
+        -------
+        ResultExtractor
+            The extractor of the snapshot.
+        """
+        with open(os.path.join(path, 'metadata.json')) as file:
+            metadata = json.load(file)
+
+        result_extractor = cls.__new__(cls)
+        result_extractor._run_index = RunIndex.load(path, mmap=mmap)
+        result_extractor._reset_views()
+        result_extractor.max_run_id = metadata['max_run_id']
+        result_extractor.listed_runs = metadata['listed_runs']
+        result_extractor.dirty_cells = {
+            tuple(cell) for cell in metadata['dirty_cells']
+        }
+        result_extractor.flow_ids = tuple(metadata['flow_ids'])
+        for key, value in metadata['task_restrictions'].items():
+            setattr(result_extractor, key, value)
+
+        return result_extractor
+
+    @instrument('ResultExtractor.build')
     def _build_data_frame(self, flow_ids):
-        """Builds a DataFrame organizing runs based
+        """Builds a run index organizing runs based
         on flows and tasks.
 
         The user can restrict the flows to be
@@ -31,6 +269,13 @@ class ResultExtractor(object):
         flows. A list of runs will be saved for
         each task and flow combination.
 
+        The runs are listed page by page and the
+        matrix is filled incrementally. The page
+        size can be given with the page_size
+        attribute and a callback that receives the
+        number of runs listed so far with the
+        progress attribute.
+
         Parameters
         ----------
 
@@ -38,11 +283,31 @@ class ResultExtractor(object):
             Ids of the flows to be considered. If None, all
             flows will be considered.
         """
-        # The structure below is:
-        # outer_dict = {flow_id: inner_dict, ....}
-        # inner_dict = {task_id: [run1, run2, run3, ..], ..}
-        matrix = defaultdict(lambda: defaultdict(set))
+        # go through each run for the given restrictions
+        # if any. Organize them for flows and tasks.
+        self._run_index = RunIndex.from_runs(
+            self._list_runs(flow_ids)
+        )
+        self._reset_views()
+        record_rows(len(self._run_index))
+        if len(self._run_index) > 0:
+            self.max_run_id = int(self._run_index.run_ids.max())
+
+    def _get_restrictions(self, flow_ids):
+        """Get the restrictions for the
+        run listing.
 
+        Parameters
+        ----------
+        flow_ids: set
+            Ids of the flows to be considered. If None, all
+            flows will be considered.
+
+        Returns
+        -------
+        restrictions: dict
+            Restrictions for openml.runs.list_runs.
+        """
         # build a dict with the restrictions
         restrictions = dict()
         # TODO consider that it should be a list to the function call
@@ -52,60 +317,470 @@ class ResultExtractor(object):
             getattr(self, 'task_type', None)
         restrictions['tag'] = \
             getattr(self, 'tag', None)
+        restrictions['task'] = \
+            getattr(self, 'task', None)
         restrictions['flow'] = flow_ids \
             if flow_ids is not None and len(flow_ids) != 0 \
             else None
 
-        # go through each run for the given restrictions
-        # if any. Organize them for flows and tasks.
-        for run in openml.runs.list_runs(
+        return restrictions
+
+    def _list_runs(self, flow_ids, offset=0):
+        """List the runs for the restrictions,
+        keeping track of the listed runs.
+
+        Parameters
+        ----------
+        flow_ids: set
+            Ids of the flows to be considered.
+        offset: int
+            Number of runs to skip.
+
+        Yields
+        ------
+        run: dict
+            A run that is newer than the
+            already listed runs.
+
+        Raises
+        ------
+        _ListingShifted
+            If there is no run after the offset or the
+            first one is already new, since the runs
+            before it might be new as well.
+        """
+        self.listed_runs = offset
+        restrictions = self._get_restrictions(flow_ids)
+        # no task can match, nothing to list
+        if restrictions['task'] is not None and len(restrictions['task']) == 0:
+            return
+        for run in iter_runs(
+            page_size=getattr(self, 'page_size', PAGE_SIZE),
+            progress=getattr(self, 'progress', None),
+            offset=offset,
             **restrictions
-        ).values():
-            matrix[run['flow_id']][run['task_id']].add(run['run_id'])
+        ):
+            if run['run_id'] > self.max_run_id:
+                if offset > 0 and self.listed_runs == offset:
+                    raise _ListingShifted()
+                yield run
+            self.listed_runs += 1
+        if offset > 0 and self.listed_runs == offset:
+            raise _ListingShifted()
 
-        self._df = pandas.DataFrame.from_dict(data=matrix, orient='columns')
+    @instrument('ResultExtractor.update')
+    def update(self):
+        """Add the runs that were uploaded since
+        the extractor was built or last updated.
 
-    def _validate_entry(self, x):
-        """Validate an entry of the pandas
-        DataFrame.
+        Only the runs after the already listed ones
+        are listed, unless more than UPDATE_OVERLAP
+        runs were deleted since the last listing. The
+        task and flow combinations that get new runs
+        are added to dirty_cells.
 
-        Check if a value in the pandas df is non
-        empty and if it passes the requirement.
+        Returns
+        -------
+        int
+            Number of new runs.
+        """
+        try:
+            new_run_index = RunIndex.from_runs(
+                self._list_runs(
+                    self.flow_ids,
+                    offset=max(0, self.listed_runs - UPDATE_OVERLAP)
+                )
+            )
+        except _ListingShifted:
+            new_run_index = RunIndex.from_runs(self._list_runs(self.flow_ids))
+        record_rows(len(new_run_index))
+        if len(new_run_index) > 0:
+            self._run_index = self._run_index.merge(new_run_index)
+            self._reset_views()
+            self.max_run_id = int(self._run_index.run_ids.max())
+            self.dirty_cells.update(new_run_index.cells())
+
+        return len(new_run_index)
+
+    def select_flows(self, *flow_ids):
+        """Get a ResultExtractor with only the runs
+        of the given flows, without listing them
+        again.
+
+        The restrictions, e.g. min_task_flow, then
+        apply to the given flows only.
 
         Parameters
         ----------
-        x: set ｜ NaN
-            A value in the pandas DataFrame.
+        flow_ids: tuple
+            Ids of the flows to keep.
 
         Returns
         -------
-        bool
-            Result of the check.
+        ResultExtractor
+            The ResultExtractor for the given flows.
         """
-        if isinstance(x, set):
-            if len(x) > self.min_task_flow:
-                return True
-            else:
-                return False
+        result_extractor = copy.copy(self)
+        result_extractor._run_index = self._run_index.select_flows(flow_ids)
+        result_extractor._reset_views()
+        result_extractor.flow_ids = flow_ids
+        # an update lists the runs of
+        # the given flows from the start.
+        result_extractor.listed_runs = 0
+        result_extractor.dirty_cells = {
+            (task_id, flow_id)
+            for task_id, flow_id in self.dirty_cells
+            if flow_id in flow_ids
+        }
+
+        return result_extractor
+
+    def clear_dirty_cells(self):
+        """Mark all task and flow combinations
+        as up to date."""
+        self.dirty_cells = set()
+
+    @property
+    def run_index(self):
+        """The index with all runs for the
+        different flows and tasks."""
+        return self._run_index
+
+    @property
+    def _df(self):
+        """pandas.DataFrame with all runs for
+        the different flows and tasks."""
+        if self._frame is None:
+            with stage('ResultExtractor.to_frame'):
+                self._frame = self._run_index.to_frame()
+                record_rows(len(self._run_index))
+
+        return self._frame
+
+    def _reset_views(self):
+        """Drop the views derived from the run
+        index, after the index changed."""
+        self._frame = None
+        # filtered results keyed by min_task_flow
+        self._results = dict()
+        self._run_bounds = None
+
+    def _get_run_bounds(self):
+        """Get the minimum number of runs of every
+        task over the flows and the maximum number
+        of runs of every flow over the tasks.
+
+        Every filtering by a minimum number of runs
+        is then a comparison of these vectors.
+
+        Returns
+        -------
+        tuple
+            The minimum for every sorted task and
+            the maximum for every sorted flow.
+        """
+        if self._run_bounds is None:
+            # computed from the cells only, the
+            # dense count matrix is never built.
+            run_index = self._run_index
+            rows, columns = run_index.cell_positions()
+            counts = run_index.counts
+            task_min_runs = np.full(
+                len(run_index.tasks),
+                np.iinfo(np.int64).max,
+                dtype=np.int64
+            )
+            np.minimum.at(task_min_runs, rows, counts)
+            # a task without runs for a flow
+            # has a minimum of zero runs.
+            complete = np.bincount(rows, minlength=len(run_index.tasks)) == \
+                len(run_index.flows)
+            task_min_runs[~complete] = 0
+            flow_max_runs = np.zeros(len(run_index.flows), dtype=np.int64)
+            np.maximum.at(flow_max_runs, columns, counts)
+            self._run_bounds = (task_min_runs, flow_max_runs)
+
+        return self._run_bounds
+
+    def _valid_tasks(self, lower_limit):
+        """Get the tasks that exceed the minimum
+        number of runs for every flow.
+
+        Parameters
+        ----------
+        lower_limit: int
+            The minimum number of runs.
+
+        Returns
+        -------
+        numpy.ndarray
+            The ids of the valid tasks.
+        """
+        task_min_runs, _ = self._get_run_bounds()
+
+        return self._run_index.tasks[task_min_runs > lower_limit]
+
+    @property
+    def results_index(self):
+        """The index with the runs of the results."""
+        lower_limit = getattr(self, 'min_task_flow', None)
+
+        if lower_limit is not None:
+            return self._run_index.select_tasks(self._valid_tasks(lower_limit))
+
         else:
-            return False
+            return self._run_index
 
     @property
+    def sparse_results(self):
+        """The results as a sparse long-format Series,
+        the set of run ids of every task and flow
+        combination with runs, indexed by (task_id,
+        flow_id). Unlike results, no DataFrame over
+        all the tasks and flows is built."""
+        return self.results_index.to_series()
+
+    @property
+    @instrument('ResultExtractor.results')
     def results(self):
 
-        lower_limit = getattr(self, 'min_task_flow', None)
+        return self.get_results(getattr(self, 'min_task_flow', None))
+
+    def get_results(self, lower_limit=None):
+        """Get the results for a minimum number
+        of runs.
+
+        The results are kept for every minimum,
+        so that they are derived only once.
+
+        Parameters
+        ----------
+        lower_limit: int | None
+            Only the tasks that have more runs than
+            lower_limit for every flow are kept. If
+            None, all the tasks are kept.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A pandas DataFrame where the results are organized
+            as follows:
+                rows - are tasks
+                column - are flows
+                values - set if there are runs for the flow and
+                task combination, otherwise it is NaN.
+        """
+        if lower_limit in self._results:
+            return self._results[lower_limit]
 
         if lower_limit is not None:
-            # place NaN for tasks that do not achieve
-            # the minimum number of runs for a certain flow.
-            revised_df = self._df.applymap(
-                lambda x: x if self._validate_entry(x) else np.NaN
-            )
+            # drop the tasks that do not achieve the
+            # minimum number of runs for every flow.
+            valid_tasks = self._valid_tasks(lower_limit)
+            revised_df = self._df[self._df.index.isin(valid_tasks)]
 
-            # drop all rows that contain one or more
-            # NaN values. Basically drop tasks.
-            revised_df.dropna(how='any', inplace=True)
-            return revised_df
+            # flows without a single valid entry
+            # do not hold any sets.
+            _, flow_max_runs = self._get_run_bounds()
+            empty_flows = self._run_index.flows[flow_max_runs <= lower_limit]
+            if len(empty_flows) > 0:
+                revised_df = revised_df.astype(
+                    {flow_id: float for flow_id in empty_flows}
+                )
 
         else:
-            return self._df
+            revised_df = self._df
+
+        self._results[lower_limit] = revised_df
+
+        return revised_df
+
+
+def _build_shard(flow_ids, task_restrictions):
+    """List and index the runs of a shard.
+
+    Parameters
+    ----------
+    flow_ids: list | tuple
+        Ids of the flows of the shard.
+    task_restrictions: dict
+        Restrictions of the shard.
+
+    Returns
+    -------
+    tuple
+        The index of the runs of the shard
+        and the number of listed runs.
+    """
+    result_extractor = ResultExtractor(*flow_ids, **task_restrictions)
+
+    return result_extractor.run_index, result_extractor.listed_runs
+
+
+class ResultQuery(object):
+
+    def __init__(self):
+        """A lazy query for a ResultExtractor.
+
+        The restrictions are collected and nothing is
+        requested until the query is collected. Every
+        restriction returns a new query, e.g.:
+
+            ResultExtractor.query().flows('mlr.classif.ranger_7')
+                .task_type(1).min_runs(5).collect()
+
+        The flow qualifiers are resolved and the
+        tasks are filtered by their qualities before
+        the runs are listed, and all the restrictions
+        on flows, tasks, task type, tag and uploader
+        are part of the run listing.
+        """
+        self._flows = tuple()
+        self._restrictions = dict()
+        self._predicate = None
+
+    def _with(self, **restrictions):
+
+        query = copy.copy(self)
+        query._restrictions = dict(self._restrictions, **restrictions)
+
+        return query
+
+    def flows(self, *flows):
+        """Restrict the flows.
+
+        Parameters
+        ----------
+        flows: tuple
+            Flow ids or flow qualifiers as for
+            src.util.get_flow_ids.
+        """
+        query = self._with()
+        query._flows = self._flows + flows
+
+        return query
+
+    def tasks(self, *task_ids):
+        """Restrict the tasks.
+
+        Parameters
+        ----------
+        task_ids: tuple
+            Ids of the tasks.
+        """
+        return self._with(task=sorted(task_ids))
+
+    def task_type(self, task_type):
+        """Restrict the task type.
+
+        Parameters
+        ----------
+        task_type: int
+            Id of the task type.
+        """
+        return self._with(task_type=task_type)
+
+    def tag(self, tag):
+        """Restrict the runs to a tag.
+
+        Parameters
+        ----------
+        tag: str
+            The tag.
+        """
+        return self._with(tag=tag)
+
+    def uploader(self, *uploaders):
+        """Restrict the uploaders of the runs.
+
+        Parameters
+        ----------
+        uploaders: tuple
+            Ids of the uploaders.
+        """
+        return self._with(uploader=list(uploaders))
+
+    def min_runs(self, nr_runs):
+        """Keep only the tasks that have at least
+        nr_runs runs for every flow.
+
+        Parameters
+        ----------
+        nr_runs: int
+            The minimum number of runs.
+        """
+        return self._with(min_task_flow=nr_runs - 1)
+
+    def page_size(self, page_size):
+        """Set the number of runs that are
+        requested in a single listing.
+
+        Parameters
+        ----------
+        page_size: int
+            The page size.
+        """
+        return self._with(page_size=page_size)
+
+    def where(self, predicate):
+        """Restrict the tasks by the qualities
+        of their datasets.
+
+        Parameters
+        ----------
+        predicate: str | callable
+            The predicate, as for
+            src.task_metadata.filter_tasks.
+        """
+        query = self._with()
+        query._predicate = predicate
+
+        return query
+
+    def collect(self):
+        """Run the query.
+
+        Returns
+        -------
+        ResultExtractor
+            The ResultExtractor for the restrictions.
+        """
+        restrictions = dict(self._restrictions)
+
+        flow_ids = {flow for flow in self._flows if not isinstance(flow, str)}
+        flow_qualifiers = [flow for flow in self._flows if isinstance(flow, str)]
+        if len(flow_qualifiers) > 0:
+            flow_ids.update(get_flow_ids(*flow_qualifiers))
+            # no flow matches, so no run can match
+            if len(flow_ids) == 0:
+                restrictions['task'] = list()
+
+        # the tasks are narrowed before the runs
+        # are listed, if they are known.
+        if self._predicate is not None and 'task' in restrictions:
+            restrictions['task'] = sorted(
+                filter_tasks(restrictions['task'], self._predicate)
+            )
+
+        result_extractor = ResultExtractor(*sorted(flow_ids), **restrictions)
+
+        # otherwise only the listed tasks are checked
+        if self._predicate is not None and 'task' not in restrictions:
+            run_index = result_extractor.run_index
+            result_extractor._run_index = run_index.select_tasks(
+                sorted(filter_tasks(run_index.tasks.tolist(), self._predicate))
+            )
+            result_extractor._reset_views()
+
+        return result_extractor
+
+    async def acollect(self):
+        """Run the query without blocking
+        the event loop.
+
+        Returns
+        -------
+        ResultExtractor
+            The ResultExtractor for the restrictions.
+        """
+        return await run_async(self.collect)
@@ -0,0 +1,484 @@
+import os
+from array import array
+
+import numpy as np
+import pandas
+
+# Arrays that make up an index,
+# saved in a file each.
+_ARRAYS = (
+    'task_ids',
+    'flow_ids',
+    'run_ids',
+    'offsets',
+    'cell_task_ids',
+    'cell_flow_ids',
+    'tasks',
+    'flows',
+    'cell_order'
+)
+
+
+class RunIndex(object):
+
+    def __init__(self, task_ids, flow_ids, run_ids):
+        """A columnar index of runs for task and
+        flow combinations.
+
+        The runs are kept as a long-format table of
+        (task_id, flow_id, run_id) sorted by task,
+        flow and run. The runs of every task and flow
+        combination (cell) are contiguous and the
+        cells are delimited by an offset array.
+
+        Parameters
+        ----------
+        task_ids: array-like
+            Task id of every run.
+        flow_ids: array-like
+            Flow id of every run.
+        run_ids: array-like
+            Id of every run. The order of the runs
+            determines the order of the tasks and
+            flows in the derived DataFrame.
+        """
+        task_ids = np.asarray(task_ids, dtype=np.int32)
+        flow_ids = np.asarray(flow_ids, dtype=np.int32)
+        run_ids = np.asarray(run_ids, dtype=np.int64)
+        positions = np.arange(len(run_ids), dtype=np.int64)
+
+        order = np.lexsort((run_ids, flow_ids, task_ids))
+        task_ids = task_ids[order]
+        flow_ids = flow_ids[order]
+        run_ids = run_ids[order]
+        positions = positions[order]
+
+        # drop duplicated runs
+        if len(run_ids) > 0:
+            unique = np.ones(len(run_ids), dtype=bool)
+            unique[1:] = (task_ids[1:] != task_ids[:-1]) | \
+                (flow_ids[1:] != flow_ids[:-1]) | \
+                (run_ids[1:] != run_ids[:-1])
+            task_ids = task_ids[unique]
+            flow_ids = flow_ids[unique]
+            run_ids = run_ids[unique]
+            positions = positions[unique]
+
+        self.task_ids = task_ids
+        self.flow_ids = flow_ids
+        self.run_ids = run_ids
+
+        # a new cell starts where the task
+        # or the flow changes
+        cell_start = np.ones(len(run_ids), dtype=bool)
+        cell_start[1:] = (task_ids[1:] != task_ids[:-1]) | \
+            (flow_ids[1:] != flow_ids[:-1])
+        starts = np.flatnonzero(cell_start)
+        self.offsets = np.append(starts, len(run_ids)).astype(np.int64)
+        self.cell_task_ids = task_ids[starts]
+        self.cell_flow_ids = flow_ids[starts]
+
+        # sorted tasks and flows, the rows
+        # and columns of the count matrix
+        self.tasks = np.unique(self.cell_task_ids)
+        self.flows = np.unique(self.cell_flow_ids)
+
+        self.cell_order = self._order_cells(positions, starts)
+        self._counts = None
+
+    def _order_cells(self, positions, starts):
+        """Order the cells by the first appearance
+        of their flow and then by their own first
+        appearance in the runs.
+
+        This is the order in which the cells would be
+        inserted in a dict of flows, where each flow
+        holds a dict of tasks.
+
+        Parameters
+        ----------
+        positions: numpy.ndarray
+            Position of every run in the given runs.
+        starts: numpy.ndarray
+            Start of every cell.
+
+        Returns
+        -------
+        numpy.ndarray
+            The cells in their insertion order.
+        """
+        if len(starts) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        first_positions = np.minimum.reduceat(positions, starts)
+        flow_columns = np.searchsorted(self.flows, self.cell_flow_ids)
+        flow_first_positions = np.full(len(self.flows), len(positions), dtype=np.int64)
+        np.minimum.at(flow_first_positions, flow_columns, first_positions)
+
+        return np.lexsort(
+            (first_positions, flow_first_positions[flow_columns])
+        )
+
+    @classmethod
+    def from_runs(cls, runs):
+        """Build the index from run listings.
+
+        Parameters
+        ----------
+        runs: iterable
+            Runs as listed by OpenML, dicts with
+            the run_id, task_id and flow_id keys.
+
+        Returns
+        -------
+        RunIndex
+            The index of the runs.
+        """
+        task_ids = array('q')
+        flow_ids = array('q')
+        run_ids = array('q')
+
+        for run in runs:
+            task_ids.append(run['task_id'])
+            flow_ids.append(run['flow_id'])
+            run_ids.append(run['run_id'])
+
+        return cls(
+            np.frombuffer(task_ids, dtype=np.int64),
+            np.frombuffer(flow_ids, dtype=np.int64),
+            np.frombuffer(run_ids, dtype=np.int64)
+        )
+
+    @classmethod
+    def from_frame(cls, data_frame):
+        """Build the index from a DataFrame.
+
+        Parameters
+        ----------
+        data_frame: pandas.DataFrame
+            A pandas DataFrame where the results are organized
+            as follows:
+                rows - are tasks
+                column - are flows
+                values - set if there are runs for the flow and
+                task combination, otherwise it is NaN.
+
+        Returns
+        -------
+        RunIndex
+            The index of the runs.
+        """
+        task_ids = list()
+        flow_ids = list()
+        run_ids = list()
+
+        # the runs are given column by column,
+        # so that the order of the DataFrame
+        # is kept in the derived DataFrame.
+        # the columns are taken by position, the lookup
+        # table of the columns is not thread-safe.
+        for position, column in enumerate(data_frame.columns.values.tolist()):
+            for task_id, entry in zip(
+                data_frame.index.values.tolist(),
+                data_frame.iloc[:, position].values
+            ):
+                if isinstance(entry, set):
+                    task_ids.extend([task_id] * len(entry))
+                    flow_ids.extend([column] * len(entry))
+                    run_ids.extend(sorted(entry))
+
+        return cls(task_ids, flow_ids, run_ids)
+
+    def save(self, path):
+        """Save the arrays of the index.
+
+        Every array is saved in its own .npy
+        file, so that they can be memory-mapped
+        when they are loaded.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the arrays will be saved.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load an index saved with save.
+
+        Parameters
+        ----------
+        path: str
+            Directory where the arrays are saved.
+        mmap: bool
+            If True, the arrays are memory-mapped
+            instead of read into memory.
+
+        Returns
+        -------
+        RunIndex
+            The loaded index.
+        """
+        run_index = cls.__new__(cls)
+        for name in _ARRAYS:
+            setattr(
+                run_index,
+                name,
+                np.load(
+                    os.path.join(path, name + '.npy'),
+                    mmap_mode='r' if mmap else None
+                )
+            )
+        run_index._counts = None
+
+        return run_index
+
+    def _insertion_order(self):
+        """Order the runs by the insertion order
+        of their cells.
+
+        Giving the runs in this order to a new index
+        keeps the order of the derived DataFrame.
+
+        Returns
+        -------
+        numpy.ndarray
+            Positions of the runs in insertion order.
+        """
+        cell_ranks = np.empty(len(self.cell_order), dtype=np.int64)
+        cell_ranks[self.cell_order] = np.arange(len(self.cell_order))
+
+        return np.argsort(np.repeat(cell_ranks, self.counts), kind='stable')
+
+    def merge(self, other):
+        """Merge the runs of another index.
+
+        The runs of this index come first, so the
+        order of its tasks and flows is kept and
+        the new ones are appended.
+
+        Parameters
+        ----------
+        other: RunIndex
+            The index with the runs to add.
+
+        Returns
+        -------
+        RunIndex
+            The index with the runs of both indices.
+        """
+        run_order = self._insertion_order()
+        other_run_order = other._insertion_order()
+
+        return RunIndex(
+            np.concatenate(
+                (self.task_ids[run_order], other.task_ids[other_run_order])
+            ),
+            np.concatenate(
+                (self.flow_ids[run_order], other.flow_ids[other_run_order])
+            ),
+            np.concatenate(
+                (self.run_ids[run_order], other.run_ids[other_run_order])
+            )
+        )
+
+    @classmethod
+    def concatenate(cls, indices):
+        """Combine the indices of disjoint parts
+        of a run listing.
+
+        The runs are ordered by their id, which is the
+        order of the OpenML listing, so the combined
+        index is the same as the index of the runs
+        listed at once.
+
+        Parameters
+        ----------
+        indices: list
+            The indices, each with its own runs.
+
+        Returns
+        -------
+        RunIndex
+            The index with the runs of all the indices.
+        """
+        run_ids = np.concatenate(
+            [np.empty(0, dtype=np.int64)] +
+            [run_index.run_ids for run_index in indices]
+        )
+        order = np.argsort(run_ids, kind='stable')
+
+        return cls(
+            np.concatenate(
+                [np.empty(0, dtype=np.int32)] +
+                [run_index.task_ids for run_index in indices]
+            )[order],
+            np.concatenate(
+                [np.empty(0, dtype=np.int32)] +
+                [run_index.flow_ids for run_index in indices]
+            )[order],
+            run_ids[order]
+        )
+
+    def cells(self):
+        """Get the task and flow combinations
+        of the index.
+
+        Returns
+        -------
+        set
+            Tuples of (task_id, flow_id).
+        """
+        return set(
+            zip(self.cell_task_ids.tolist(), self.cell_flow_ids.tolist())
+        )
+
+    def select_tasks(self, task_ids):
+        """Get the index restricted to the
+        given tasks.
+
+        Parameters
+        ----------
+        task_ids: array-like
+            Ids of the tasks to keep.
+
+        Returns
+        -------
+        RunIndex
+            The index of the runs of the given tasks.
+        """
+        run_order = self._insertion_order()
+        run_order = run_order[np.isin(self.task_ids[run_order], task_ids)]
+
+        return RunIndex(
+            self.task_ids[run_order],
+            self.flow_ids[run_order],
+            self.run_ids[run_order]
+        )
+
+    def select_flows(self, flow_ids):
+        """Get the index restricted to the
+        given flows.
+
+        Parameters
+        ----------
+        flow_ids: array-like
+            Ids of the flows to keep.
+
+        Returns
+        -------
+        RunIndex
+            The index of the runs of the given flows.
+        """
+        run_order = self._insertion_order()
+        run_order = run_order[np.isin(self.flow_ids[run_order], list(flow_ids))]
+
+        return RunIndex(
+            self.task_ids[run_order],
+            self.flow_ids[run_order],
+            self.run_ids[run_order]
+        )
+
+    def __len__(self):
+
+        return len(self.run_ids)
+
+    @property
+    def counts(self):
+        """Number of runs in every cell."""
+        return np.diff(self.offsets)
+
+    def cell_positions(self):
+        """Get the position of every cell in
+        the count matrix.
+
+        Returns
+        -------
+        tuple
+            Row and column position of every cell.
+        """
+        rows = np.searchsorted(self.tasks, self.cell_task_ids)
+        columns = np.searchsorted(self.flows, self.cell_flow_ids)
+
+        return rows, columns
+
+    def count_matrix(self):
+        """Get the number of runs for every
+        task and flow combination.
+
+        Returns
+        -------
+        numpy.ndarray
+            A matrix with the sorted tasks as rows
+            and the sorted flows as columns.
+        """
+        if self._counts is None:
+            counts = np.zeros((len(self.tasks), len(self.flows)), dtype=np.int64)
+            rows, columns = self.cell_positions()
+            counts[rows, columns] = self.counts
+            self._counts = counts
+
+        return self._counts
+
+    def to_frame(self):
+        """Get the wide DataFrame view of the index.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A pandas DataFrame where the results are organized
+            as follows:
+                rows - are tasks
+                column - are flows
+                values - set if there are runs for the flow and
+                task combination, otherwise it is NaN.
+        """
+        # The structure below is:
+        # outer_dict = {flow_id: inner_dict, ....}
+        # inner_dict = {task_id: {run1, run2, run3, ..}, ..}
+        matrix = dict()
+        run_ids = self.run_ids.tolist()
+        offsets = self.offsets.tolist()
+        cell_task_ids = self.cell_task_ids.tolist()
+        cell_flow_ids = self.cell_flow_ids.tolist()
+
+        for cell in self.cell_order.tolist():
+            matrix.setdefault(cell_flow_ids[cell], dict())[cell_task_ids[cell]] = \
+                set(run_ids[offsets[cell]:offsets[cell + 1]])
+
+        return pandas.DataFrame.from_dict(data=matrix, orient='columns')
+
+    def to_series(self):
+        """Get the sparse long-format view of the index.
+
+        Only the task and flow combinations with runs
+        are part of it, so its size does not depend
+        on the number of tasks times flows.
+
+        Returns
+        -------
+        pandas.Series
+            The set of run ids of every task and flow
+            combination, indexed by (task_id, flow_id)
+            in sorted order.
+        """
+        run_ids = self.run_ids.tolist()
+        offsets = self.offsets.tolist()
+
+        return pandas.Series(
+            [
+                set(run_ids[offsets[cell]:offsets[cell + 1]])
+                for cell in range(len(self.cell_task_ids))
+            ],
+            index=pandas.MultiIndex.from_arrays(
+                [
+                    self.cell_task_ids.astype(np.int64),
+                    self.cell_flow_ids.astype(np.int64)
+                ],
+                names=['task_id', 'flow_id']
+            ),
+            dtype=object
+        )
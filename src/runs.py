@@ -0,0 +1,50 @@
+from src.backend import get_backend
+
+# Number of runs that are requested
+# in a single listing.
+PAGE_SIZE = 10000
+
+
+def iter_runs(page_size=PAGE_SIZE, progress=None, offset=0, **restrictions):
+    """Iterate over the runs for the given
+    restrictions, page by page.
+
+    Only one page of runs is kept in memory
+    at a time.
+
+    Parameters
+    ----------
+    page_size: int
+        Number of runs that are requested in
+        a single listing.
+    progress: callable | None
+        Called after every page with the number
+        of runs that have been listed so far.
+    offset: int
+        Number of runs to skip at the start
+        of the listing.
+    restrictions: dict
+        Restrictions of openml.runs.list_runs,
+        e.g. flow, uploader, task_type or tag.
+
+    Yields
+    ------
+    run: dict
+        A run, with at least the run_id, task_id
+        and flow_id keys.
+    """
+    while True:
+        page = get_backend().list_runs(
+            offset=offset,
+            size=page_size,
+            **restrictions
+        )
+        for run in page.values():
+            yield run
+        offset += len(page)
+
+        if progress is not None:
+            progress(offset)
+        # last page
+        if len(page) < page_size:
+            break
@@ -0,0 +1,207 @@
+import numpy as np
+
+from src.backend import Backend
+
+# Uploader of the runs that use RandomSearch
+RANDOM_SEARCH_UPLOADER = 903
+
+
+class SyntheticBackend(Backend):
+
+    def __init__(
+            self,
+            n_tasks=1000,
+            n_flows=20,
+            runs_per_cell=5,
+            density=1.0,
+            measures=('predictive_accuracy', 'kappa'),
+            missing_rate=0.05,
+            seed=0
+    ):
+        """A synthetic stand-in for OpenML with a grid
+        of tasks and flows of configurable size.
+
+        Every task and flow combination has between 0
+        and 2 * runs_per_cell runs, half of them are
+        uploaded by the RandomSearch uploader.
+
+        Parameters
+        ----------
+        n_tasks: int
+            Number of tasks.
+        n_flows: int
+            Number of flows.
+        runs_per_cell: int
+            Average number of runs for a task and flow
+            combination that has runs.
+        density: float
+            Fraction of the task and flow combinations
+            that have runs.
+        measures: tuple
+            Evaluation measures of the runs.
+        missing_rate: float
+            Fraction of the runs that do not have a
+            value for an evaluation measure.
+        seed: int
+            Seed for the generated grid.
+        """
+        rng = np.random.RandomState(seed)
+
+        self.task_ids = np.arange(1, n_tasks + 1, dtype=np.int64)
+        self.flow_ids = np.arange(1, n_flows + 1, dtype=np.int64)
+
+        cell_runs = rng.randint(0, 2 * runs_per_cell + 1, size=n_tasks * n_flows)
+        cell_runs[rng.random_sample(n_tasks * n_flows) >= density] = 0
+        cells = np.repeat(np.arange(n_tasks * n_flows), cell_runs)
+        # the runs of the cells are uploaded in random order
+        cells = cells[rng.permutation(len(cells))]
+
+        # run ids start at 1 and are in listing order
+        self.run_tasks = self.task_ids[cells // n_flows]
+        self.run_flows = self.flow_ids[cells % n_flows]
+        self.run_uploaders = np.where(
+            rng.random_sample(len(cells)) < 0.5,
+            RANDOM_SEARCH_UPLOADER,
+            1
+        )
+        self.evaluations = dict()
+        for measure in measures:
+            values = np.round(rng.random_sample(len(cells)), 6)
+            values[rng.random_sample(len(cells)) < missing_rate] = np.nan
+            self.evaluations[measure] = values
+
+        self._masks = dict()
+
+    def __len__(self):
+
+        return len(self.run_tasks)
+
+    def _mask(self, id=None, task=None, flow=None, uploader=None):
+        """Select the runs for the restrictions,
+        the selections are reused between pages."""
+        key = tuple(
+            tuple(sorted(restriction)) if restriction is not None else None
+            for restriction in (id, task, flow, uploader)
+        )
+        if key not in self._masks:
+            mask = np.ones(len(self.run_tasks), dtype=bool)
+            if id is not None:
+                mask &= np.isin(np.arange(1, len(mask) + 1), list(id))
+            if task is not None:
+                mask &= np.isin(self.run_tasks, list(task))
+            if flow is not None:
+                mask &= np.isin(self.run_flows, list(flow))
+            if uploader is not None:
+                mask &= np.isin(self.run_uploaders, list(uploader))
+            self._masks[key] = np.flatnonzero(mask)
+
+        return self._masks[key]
+
+    def list_runs(
+            self,
+            offset=None,
+            size=None,
+            id=None,
+            task=None,
+            flow=None,
+            uploader=None,
+            **restrictions
+    ):
+        positions = self._mask(id, task, flow, uploader)
+        offset = offset if offset is not None else 0
+        positions = positions[offset:offset + size] \
+            if size is not None else positions[offset:]
+
+        return {
+            run_id: {
+                'run_id': run_id,
+                'task_id': task_id,
+                'flow_id': flow_id,
+                'uploader': run_uploader
+            }
+            for run_id, task_id, flow_id, run_uploader in zip(
+                (positions + 1).tolist(),
+                self.run_tasks[positions].tolist(),
+                self.run_flows[positions].tolist(),
+                self.run_uploaders[positions].tolist()
+            )
+        }
+
+    def list_evaluations(self, function, runs):
+
+        if function not in self.evaluations:
+            return dict()
+        run_ids = np.asarray(runs, dtype=np.int64)
+        values = self.evaluations[function][run_ids - 1]
+        evaluated = ~np.isnan(values)
+
+        return dict(zip(run_ids[evaluated].tolist(), values[evaluated].tolist()))
+
+    def list_flows(self, offset=None, size=None):
+
+        flow_ids = self.flow_ids.tolist()
+        offset = offset if offset is not None else 0
+        flow_ids = flow_ids[offset:offset + size] \
+            if size is not None else flow_ids[offset:]
+
+        # five versions of every synthetic flow
+        return {
+            flow_id: {
+                'id': flow_id,
+                'full_name': 'synthetic.flow%d(%d)' % (
+                    (flow_id - 1) // 5,
+                    (flow_id - 1) % 5 + 1
+                ),
+                'name': 'synthetic.flow%d' % ((flow_id - 1) // 5),
+                'version': str((flow_id - 1) % 5 + 1),
+                'external_version': '',
+                'uploader': 1
+            }
+            for flow_id in flow_ids
+        }
+
+    def list_tasks(self, task_ids):
+
+        return {
+            task_id: {
+                'task_id': task_id,
+                'dataset_id': task_id,
+                'qualities': self.get_dataset(task_id)['qualities']
+            }
+            for task_id in task_ids
+            if 1 <= task_id <= len(self.task_ids)
+        }
+
+    def get_run(self, run_id):
+
+        return {
+            'run_id': run_id,
+            'task_id': int(self.run_tasks[run_id - 1]),
+            'flow_id': int(self.run_flows[run_id - 1]),
+            'evaluations': {
+                measure: float(values[run_id - 1])
+                for measure, values in self.evaluations.items()
+                if not np.isnan(values[run_id - 1])
+            }
+        }
+
+    def get_task(self, task_id):
+
+        return {'task_id': task_id, 'dataset_id': task_id}
+
+    def get_dataset(self, dataset_id):
+
+        # every fifth dataset has missing values
+        return {
+            'dataset_id': dataset_id,
+            'qualities': {
+                'NumberOfMissingValues': float(dataset_id % 5 == 0),
+                'NumberOfInstances': float(100 * dataset_id),
+                'NumberOfClasses': float(2 + dataset_id % 3)
+            }
+        }
+
+    def get_study(self, study_id):
+
+        # every third task is part of the study
+        return {'study_id': study_id, 'tasks': self.task_ids[::3].tolist()}
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas
+
+from src.backend import get_backend
+from src.executor import get_executor
+from src.instrumentation import instrument, record_cache, record_rows
+
+# Maximal number of task ids that are sent in a
+# single task listing. The task ids are part of
+# the request url, so it can not grow unbounded.
+TASK_BATCH_SIZE = 500
+
+# Cache that is consulted before any task
+# metadata is requested from OpenML. None,
+# if the metadata should not be cached.
+_cache = None
+
+
+def set_metadata_cache(cache):
+    """Set the cache used for the task
+    metadata lookups.
+
+    Parameters
+    ----------
+    cache: src.cache.TaskMetadataCache | None
+        The cache that will be read first by all
+        the task metadata lookups. None disables
+        caching.
+    """
+    global _cache
+    _cache = cache
+
+
+def get_metadata_cache():
+    """Get the cache used for the task
+    metadata lookups.
+
+    Returns
+    -------
+    src.cache.TaskMetadataCache | None
+        The cache if one was set, otherwise None.
+    """
+    return _cache
+
+
+@instrument('get_task_qualities')
+def get_task_qualities(task_ids, batch_size=TASK_BATCH_SIZE):
+    """Get the dataset qualities of the given tasks.
+
+    The qualities are part of the task listings, so
+    they are listed in bulk without downloading any
+    dataset. If a cache is set, only the tasks that
+    are not cached are requested. The batches are
+    requested through the configured executor.
+
+    Parameters
+    ----------
+    task_ids: iterable
+        Ids of the tasks.
+    batch_size: int
+        Maximal number of task ids for one listing.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A DataFrame with the tasks as rows, sorted by
+        task id, and the dataset_id and the qualities
+        as columns. Tasks that are not listed, e.g.
+        tasks of deactivated datasets, are not part of
+        it and missing qualities are NaN.
+    """
+    task_ids = sorted(set(task_ids))
+    record_rows(len(task_ids))
+    tasks = dict()
+
+    missing = task_ids
+    if _cache is not None:
+        cached, missing = _cache.get(task_ids)
+        record_cache(len(cached), len(missing))
+        for task_id, task in cached.items():
+            # tasks that are not listed
+            # are cached as well
+            if task is not None:
+                tasks[task_id] = task
+
+    def list_batch(batch):
+        batch_tasks = get_backend().list_tasks(batch)
+        if _cache is not None:
+            _cache.put(batch, batch_tasks)
+        return batch_tasks
+
+    for batch_tasks in get_executor().map(
+        list_batch,
+        [
+            missing[start:start + batch_size]
+            for start in range(0, len(missing), batch_size)
+        ]
+    ):
+        tasks.update(batch_tasks)
+
+    listed_task_ids = [task_id for task_id in task_ids if task_id in tasks]
+    qualities = pandas.DataFrame(
+        [tasks[task_id]['qualities'] for task_id in listed_task_ids],
+        index=pandas.Index(listed_task_ids, dtype=np.int64, name='task_id')
+    ).astype(float)
+    qualities.insert(
+        0,
+        'dataset_id',
+        np.array(
+            [tasks[task_id]['dataset_id'] for task_id in listed_task_ids],
+            dtype=np.int64
+        )
+    )
+
+    return qualities
+
+
+def filter_tasks(task_ids, predicate, batch_size=TASK_BATCH_SIZE):
+    """Get the tasks whose dataset qualities
+    fulfill a predicate.
+
+    The predicate is evaluated once over the
+    table of the qualities of all the tasks.
+
+    Parameters
+    ----------
+    task_ids: iterable
+        Ids of the tasks.
+    predicate: str | callable
+        An expression over the quality names, as for
+        pandas.DataFrame.eval, e.g. 'NumberOfClasses == 2
+        and NumberOfInstances < 10000', or a function that
+        gets the qualities as given by get_task_qualities
+        and returns a boolean mask over the tasks.
+        Missing qualities are NaN.
+    batch_size: int
+        Maximal number of task ids for one listing.
+
+    Returns
+    -------
+    set
+        The ids of the tasks that fulfill
+        the predicate.
+    """
+    qualities = get_task_qualities(task_ids, batch_size)
+    if len(qualities.index) == 0:
+        return set()
+
+    if isinstance(predicate, str):
+        mask = qualities.eval(predicate)
+    else:
+        mask = predicate(qualities)
+
+    return set(
+        qualities.index.values[np.asarray(mask, dtype=bool)].tolist()
+    )
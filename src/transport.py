@@ -0,0 +1,237 @@
+import xml.etree.ElementTree as ElementTree
+
+import openml
+import requests
+from openml.exceptions import (
+    OpenMLServerError,
+    OpenMLServerException,
+    OpenMLServerNoResult
+)
+from requests.adapters import HTTPAdapter
+
+# Namespace of the OpenML XML responses
+NAMESPACE = 'http://openml.org/openml'
+
+# Error code of the server for a listing
+# without any result, by endpoint.
+NO_RESULT_CODES = {
+    'data/list': 372,
+    'evaluation/list': 542,
+    'flow/list': 500,
+    'run/list': 512,
+    'setup/list': 674,
+    'task/list': 482
+}
+
+
+def tag(name):
+    """Get the qualified tag of an OpenML
+    XML element.
+
+    Parameters
+    ----------
+    name: str
+        Name of the element without
+        the oml prefix.
+
+    Returns
+    -------
+    str
+        The tag as given by ElementTree.
+    """
+    return '{%s}%s' % (NAMESPACE, name)
+
+
+def find_text(element, name, default=None):
+    """Get the text of a child element.
+
+    Parameters
+    ----------
+    element: xml.etree.ElementTree.Element
+        The parent element.
+    name: str
+        Name of the child without the oml prefix.
+    default: object
+        Value if there is no such child.
+
+    Returns
+    -------
+    str | object
+        The text of the child, '' if it is
+        empty, or the default.
+    """
+    child = element.find(tag(name))
+    if child is None:
+        return default
+
+    return child.text if child.text is not None else ''
+
+
+class OpenMLTransport(object):
+
+    def __init__(
+            self,
+            server=None,
+            api_key=None,
+            pool_size=10,
+            timeout=(10, 300)
+    ):
+        """HTTP access to the OpenML REST API.
+
+        The connections are kept alive in a pool and
+        reused by all the requests, the responses are
+        requested gzip compressed and the listings are
+        parsed while they are received.
+
+        Parameters
+        ----------
+        server: str | None
+            Base url of the XML API. If None, the
+            server of the openml configuration.
+        api_key: str | None
+            The API key. If None, the key of the
+            openml configuration.
+        pool_size: int
+            Maximal number of connections that are
+            kept alive, it should be at least the
+            number of concurrent calls.
+        timeout: float | tuple
+            Connect and read timeouts in seconds.
+        """
+        self.server = (server if server is not None else openml.config.server).rstrip('/')
+        self.api_key = api_key if api_key is not None else openml.config.apikey
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip'
+
+    def _get(self, path, stream):
+
+        url = '%s/%s' % (self.server, path)
+        try:
+            response = self.session.get(
+                url,
+                params={'api_key': self.api_key} if self.api_key else None,
+                timeout=self.timeout,
+                stream=stream
+            )
+        except requests.RequestException as e:
+            # connection errors can be retried
+            raise OpenMLServerError('Request failed: %s (%s)' % (url, e))
+
+        if response.status_code != 200:
+            try:
+                raise _server_error(response, path, url)
+            finally:
+                response.close()
+
+        return response
+
+    def get(self, path):
+        """Get a document.
+
+        Parameters
+        ----------
+        path: str
+            Path of the document relative to
+            the server, e.g. 'task/31'.
+
+        Returns
+        -------
+        xml.etree.ElementTree.Element
+            The root element of the document.
+        """
+        response = self._get(path, stream=False)
+
+        return ElementTree.fromstring(response.content)
+
+    def iter_elements(self, path, name):
+        """Parse the elements of a listing while
+        the response is received.
+
+        Only the element that is yielded is kept in
+        memory, it is cleared afterwards.
+
+        Parameters
+        ----------
+        path: str
+            Path of the listing relative to the
+            server, e.g. 'run/list/flow/5/limit/100'.
+        name: str
+            Name of the listed elements without
+            the oml prefix, e.g. 'run'.
+
+        Yields
+        ------
+        xml.etree.ElementTree.Element
+            Every listed element.
+        """
+        response = self._get(path, stream=True)
+        # the gzip encoding is decoded
+        # while the body is read.
+        response.raw.decode_content = True
+        element_tag = tag(name)
+        root = None
+        try:
+            for event, element in ElementTree.iterparse(
+                response.raw,
+                events=('start', 'end')
+            ):
+                if root is None:
+                    root = element
+                elif event == 'end' and element.tag == element_tag:
+                    yield element
+                    root.clear()
+        finally:
+            response.close()
+
+    def close(self):
+
+        self.session.close()
+
+
+def _server_error(response, path, url):
+    """Get the error for a response that
+    is not successful.
+
+    Parameters
+    ----------
+    response: requests.Response
+        The response.
+    path: str
+        The requested path relative to the server.
+    url: str
+        The requested url.
+
+    Returns
+    -------
+    OpenMLServerError
+        OpenMLServerNoResult if nothing matched the
+        listing, OpenMLServerException for the other
+        errors with a code and OpenMLServerError if
+        the response has no error code or the server
+        failed, so that the request can be retried.
+    """
+    try:
+        error = ElementTree.fromstring(response.content)
+        code = int(find_text(error, 'code'))
+        message = find_text(error, 'message', '')
+    except (ElementTree.ParseError, TypeError, ValueError):
+        return OpenMLServerError(
+            'Unexpected server error when calling %s. Status code: %d'
+            % (url, response.status_code)
+        )
+
+    endpoint = '/'.join(path.split('/')[:2])
+    if code == NO_RESULT_CODES.get(endpoint):
+        return OpenMLServerNoResult(message, code=code, url=url)
+    if response.status_code >= 500:
+        return OpenMLServerError(
+            'Server error when calling %s. Status code: %d, error code: %d, %s'
+            % (url, response.status_code, code, message)
+        )
+
+    return OpenMLServerException(message, code=code, url=url)
@@ -1,17 +1,22 @@
-import re
-
-import pandas
-import openml
-from openml.exceptions import OpenMLServerError
 import numpy as np
+import pandas
+
+from src.backend import get_backend
+from src.flow_catalog import get_flow_catalog
+from src.instrumentation import instrument, record_rows
+from src.runs import iter_runs
+from src.task_metadata import filter_tasks
 
 
+@instrument('get_flow_ids')
 def get_flow_ids(*flow_qualifiers):
     """Get flow ids for the given
     flow qualifiers.
 
     Match the flow qualifiers to their
-    corresponding ids.
+    corresponding ids through the flow
+    catalog, which is refreshed first
+    if it is stale.
 
     Parameters
     ----------
@@ -22,7 +27,8 @@ def get_flow_ids(*flow_qualifiers):
         e.g. 'mlr.classif.ranger_8'.
         or it can also be only a flow name. The
         later, does not compose a unique flow
-        qualifier.
+        qualifier. The flow name can also be a
+        glob pattern, e.g. 'mlr.classif.*'.
 
     Returns
     -------
@@ -30,30 +36,137 @@ def get_flow_ids(*flow_qualifiers):
         Empty set in case there are no qualifiers,
         otherwise set with flow_ids.
     """
+    # user gave no input for flow identifiers.
+    if len(flow_qualifiers) == 0:
+        return set()
+
+    catalog = get_flow_catalog()
+    catalog.refresh_if_stale()
+    record_rows(len(flow_qualifiers))
+
+    return catalog.resolve_all(*flow_qualifiers)
+
+
+def get_flow_families(families):
+    """Map the flows of flow families to
+    the name of their family.
+
+    Parameters
+    ----------
+    families: dict
+        The flow qualifiers of every family, e.g.
+        {'Random Forest': ['mlr.classif.ranger_*']}.
+
+    Returns
+    -------
+    dict
+        The family name of every flow id. A flow
+        that matches several families is part of
+        the first one.
+    """
+    flow_families = dict()
+    for family, flow_qualifiers in families.items():
+        for flow_id in get_flow_ids(*flow_qualifiers):
+            flow_families.setdefault(flow_id, family)
 
-    flow_ids = set()
-    flows = openml.flows.list_flows()
-
-    # user gave input for flow identifiers.
-    if len(flow_qualifiers) != 0:
-        for flow_qualifier in flow_qualifiers:
-            version_match = re.search(r"\d+$", flow_qualifier)
-            if version_match:
-                flow_version = version_match.group(0)
-            else:
-                flow_version = None
-            flow_name = re.sub(r"_\d+$", "", flow_qualifier)
-
-            for key, flow in flows.items():
-                if flow['name'] == flow_name:
-                    if flow_version is not None:
-                        if flow['version'] == flow_version:
-                            flow_ids.add(key)
-                    else:
-                        flow_ids.add(key)
-    return flow_ids
+    return flow_families
 
 
+@instrument('aggregate_results_by_family')
+def aggregate_results_by_family(results, families):
+    """Return a DataFrame with the results
+    aggregated over the flows of every family.
+
+    The fraction of runs in the minima region of the
+    flows of a family is averaged, weighted by the
+    number of runs of every flow. All the families
+    are aggregated at once from the arrays of the
+    fractions and the numbers of runs.
+
+    Parameters
+    ----------
+    results: pandas.DataFrame | pandas.Series
+        The results of get_tasks_by_minima_region with
+        detailed='Yes', organized as follows:
+            rows - are tasks
+            columns - are flows
+            values - tuple of the fraction of runs using
+            RandomSearch that can reach the minimum region
+            and the number of runs using RandomSearch.
+        Or the same results as a Series indexed by
+        (task_id, flow_id), as given with sparse=True.
+    families: dict
+        The family name of every flow id, as given
+        by get_flow_families. The flows that are not
+        part of it are not aggregated.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A DataFrame with tasks as rows, in the order of
+        the results, and families as columns, in the order
+        of the mapping. Tasks without any runs for the
+        families are not part of it.
+    """
+    if isinstance(results, pandas.DataFrame):
+        entries = results.values
+        rows, columns = np.nonzero(~pandas.isna(entries))
+        entries = entries[rows, columns]
+        task_ids = results.index.values[rows]
+        flow_ids = results.columns.values[columns]
+    else:
+        filled = ~pandas.isna(results.values)
+        entries = results.values[filled]
+        task_ids = results.index.get_level_values(0).values[filled]
+        flow_ids = results.index.get_level_values(1).values[filled]
+    record_rows(len(entries))
+
+    # the fraction and the number of
+    # runs of every entry as arrays
+    try:
+        entries = np.array(entries.tolist(), dtype=float)
+    except (TypeError, ValueError):
+        entries = None
+    if entries is None or entries.size > 0 and (entries.ndim != 2 or entries.shape[1] != 2):
+        raise ValueError(
+            'The entries of the results have to be tuples of the fraction '
+            'and the number of runs, as given by get_tasks_by_minima_region '
+            "with detailed='Yes'."
+        )
+    entries = entries.reshape(-1, 2)
+    fractions = entries[:, 0]
+    nr_runs = entries[:, 1]
+
+    family_codes, family_names = pandas.factorize(
+        pandas.Series(list(families.values()), dtype=object)
+    )
+    flow_positions = pandas.Index(list(families.keys())).get_indexer(flow_ids)
+    known = flow_positions >= 0
+    entry_families = family_codes[flow_positions[known]]
+    task_codes, task_ids = pandas.factorize(task_ids[known])
+
+    # one group for every task and family
+    groups = task_codes * len(family_names) + entry_families
+    nr_groups = len(task_ids) * len(family_names)
+    weighted_fractions = np.bincount(
+        groups,
+        weights=fractions[known] * nr_runs[known],
+        minlength=nr_groups
+    )
+    total_nr_runs = np.bincount(groups, weights=nr_runs[known], minlength=nr_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        aggregated = weighted_fractions / total_nr_runs
+    # families without runs for the task
+    aggregated[np.bincount(groups, minlength=nr_groups) == 0] = np.nan
+
+    return pandas.DataFrame(
+        aggregated.reshape(len(task_ids), len(family_names)),
+        index=task_ids,
+        columns=family_names
+    )
+
+
+@instrument('aggregate_results_for_flow')
 def aggregate_results_for_flow(
         results,
         column_label
@@ -64,17 +177,20 @@ def aggregate_results_for_flow(
     Given a DataFrame with results for different
     flow versions and tasks, aggregate the results
     over the different flow versions, weighted by
-    their contribution.
+    their number of runs.
 
     Parameters
     ----------
-    results: pandas.DataFrame
-        A pandas DataFrame where the results are organized
-        as follows:
+    results: pandas.DataFrame | pandas.Series
+        The results of get_tasks_by_minima_region with
+        detailed='Yes', organized as follows:
             rows - are tasks
             columns - are flows
-            values - fraction of runs using RandomSearch that
-            can reach the minimum region.
+            values - tuple of the fraction of runs using
+            RandomSearch that can reach the minimum region
+            and the number of runs using RandomSearch.
+        Or the same results as a Series indexed by
+        (task_id, flow_id), as given with sparse=True.
     column_label: str
         Name for the column label. Corresponds to the name
         of the flow.
@@ -86,64 +202,26 @@ def aggregate_results_for_flow(
         averaged results over different
         versions of the same flow.
     """
-    fraction_runs_in_region = list()
-    # where the number of runs
-    # with RandomSearch for each
-    # flow version will be saved
-    number_of_runs = list()
-
-    matrix = dict()
-
-    # check if the df has results
-    if len(results.index) > 0:
-        for index, row in results.iterrows():
-            # clear the lists since we passed
-            # to a different task
-            fraction_runs_in_region.clear()
-            number_of_runs.clear()
-
-            # total number of runs
-            # with RandomSearch for all flow
-            # versions.
-            total_nr_runs = 0
-
-            # Each column is a particular version of a flow
-            for column in results.columns.values.tolist():
-                # tuple of values
-                # First value is the number of runs in the
-                # minima region
-                # Second value is the number of runs in total
-                entry_values = row[column]
-
-                if entry_values is not np.NaN:
-                    fraction_runs_in_region.append(entry_values[0])
-                    number_of_runs.append(entry_values[1])
-                    total_nr_runs += entry_values[1]
-
-            # finished iterating over the
-            # different flow versions
-
-            # only one flow version
-            if len(fraction_runs_in_region) == 1:
-                matrix[index] = fraction_runs_in_region[0]
-            elif len(fraction_runs_in_region) > 1:
-                value = 0
-                for fraction_in_region, nr_runs in zip(fraction_runs_in_region, number_of_runs):
-                    # weight the percentage for the particular
-                    # flow version, according to the contribution.
-                    value += fraction_in_region * (nr_runs / total_nr_runs)
-
-                matrix[index] = value
-
-    return pandas.DataFrame.from_dict(matrix, orient='index', columns={column_label})
+    if isinstance(results, pandas.DataFrame):
+        flow_ids = results.columns
+    else:
+        flow_ids = results.index.get_level_values(1).unique()
+    aggregated_results = aggregate_results_by_family(
+        results,
+        {flow_id: column_label for flow_id in flow_ids}
+    )
 
+    return aggregated_results.reindex(columns=[column_label])
 
+
+@instrument('get_tasks_missing_values')
 def get_tasks_missing_values(task_ids):
     """Given a list of task ids,
     return the tasks that have missing values.
 
     Return the tasks that have missing values
-    from the given task collection.
+    from the given task collection. The
+    qualities of the tasks are listed in bulk.
 
     Parameters
     ----------
@@ -153,25 +231,15 @@ def get_tasks_missing_values(task_ids):
     -------
     task_with_missing_values: set
         A set of tasks that have missing
-        values.
+        values. Tasks whose number of missing
+        values is unknown (NaN) are included.
     """
-    tasks_with_missing_values = set()
-
-    for task_id in task_ids:
-        try:
-            task = openml.tasks.get_task(task_id)
-            number_missing_values = openml.datasets.get_dataset(
-                task.dataset_id
-            ).qualities["NumberOfMissingValues"]
-            if number_missing_values != 0:
-                tasks_with_missing_values.add(task_id)
-        except OpenMLServerError:
-            # cases in which datasets are deactivated
-            pass
-
-    return tasks_with_missing_values
+    # tasks of deactivated datasets are
+    # not listed, so they are ignored.
+    return filter_tasks(task_ids, 'NumberOfMissingValues != 0')
 
 
+@instrument('flows_using_random_search')
 def flows_using_random_search():
     """Return flows that make use
     of RandomSearch.
@@ -184,13 +252,13 @@ def flows_using_random_search():
     """
     flows = set()
     # Uploader Philipp Probst
-    runs = openml.runs.list_runs(uploader=[903])
-    for run_id, run_info in runs.items():
+    for run_info in iter_runs(uploader=[903]):
         flows.add(run_info['flow_id'])
 
     return flows
 
 
+@instrument('tasks_contained_in_openml_cc18')
 def tasks_contained_in_openml_cc18(task_ids):
     """Given a set of task ids,
     return the ones that are
@@ -210,7 +278,7 @@ def tasks_contained_in_openml_cc18(task_ids):
         A set of tasks that are part
         of OpenMLCC18.
     """
-    tasks = set(openml.study.get_study(99).tasks)
+    tasks = set(get_backend().get_study(99)['tasks'])
 
     return tasks.intersection(task_ids)
 
@@ -0,0 +1,1209 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas
+
+from src.cli import add_openml_arguments, configure_openml
+from src.driver import load_config
+from src.operations import get_tasks_by_minima_region
+from src.result_extractor import ResultExtractor
+from src.util import (
+    aggregate_results_for_flow,
+    get_flow_ids,
+    get_tasks_missing_values,
+    tasks_contained_in_openml_cc18
+)
+
+logger = logging.getLogger(__name__)
+
+# Time in seconds that a worker holds a unit
+# without renewing the lease. A unit whose
+# lease expired is claimed again.
+LEASE_TIME = 600
+
+# Number of tasks of a work unit
+TASK_CHUNK_SIZE = 500
+
+# Number of times a unit is claimed before
+# it is failed, e.g. a unit that always raises
+# or whose workers always die.
+MAX_ATTEMPTS = 3
+
+# Suffix of the path of a SQLite queue, any
+# other path is the one of a directory queue.
+SQLITE_SUFFIX = '.sqlite'
+
+# States of a work unit
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class WorkQueue(object):
+
+    def __init__(self, path, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS):
+        """A queue of work units that is shared by
+        the worker processes of one host.
+
+        The units are kept in a SQLite database, which
+        has to be on a local filesystem, the locking of
+        SQLite is not reliable on network filesystems
+        such as NFS, see DirectoryQueue for workers on
+        several machines. A worker claims a unit with a lease,
+        which it renews while it works on the unit. If a
+        worker dies, its lease expires and the unit is
+        claimed by another worker. A unit that was claimed
+        max_attempts times without being done is failed.
+
+        Parameters
+        ----------
+        path: str
+            Path of the SQLite database file.
+        lease_time: float
+            Time in seconds after which the lease
+            of a unit expires if it is not renewed.
+        max_attempts: int
+            Number of times a unit is claimed
+            before it is failed.
+        """
+        self.path = path
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # transactions are started explicitly, so that
+        # a claim is atomic across processes.
+        self._connection = sqlite3.connect(
+            path,
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS manifest ('
+            'key TEXT PRIMARY KEY, '
+            'value TEXT NOT NULL)'
+        )
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS units ('
+            'unit_id INTEGER PRIMARY KEY, '
+            'payload TEXT NOT NULL, '
+            'status TEXT NOT NULL, '
+            'worker TEXT, '
+            'lease_expires REAL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'result TEXT, '
+            'error TEXT)'
+        )
+
+    def set_manifest(self, key, value):
+        """Save a value of the job manifest.
+
+        Parameters
+        ----------
+        key: str
+            Name of the value.
+        value: object
+            A value that can be encoded as JSON.
+        """
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO manifest (key, value) VALUES (?, ?)',
+                (key, json.dumps(value))
+            )
+
+    def get_manifest(self, key):
+        """Get a value of the job manifest.
+
+        Parameters
+        ----------
+        key: str
+            Name of the value.
+
+        Returns
+        -------
+        object
+            The value, None if it is not set.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM manifest WHERE key = ?',
+                (key,)
+            ).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    def add(self, payloads):
+        """Add work units to the queue.
+
+        Parameters
+        ----------
+        payloads: iterable
+            The description of every unit, values
+            that can be encoded as JSON.
+
+        Returns
+        -------
+        list
+            The ids of the units.
+        """
+        unit_ids = list()
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                for payload in payloads:
+                    cursor = self._connection.execute(
+                        'INSERT INTO units (payload, status) VALUES (?, ?)',
+                        (json.dumps(payload), PENDING)
+                    )
+                    unit_ids.append(cursor.lastrowid)
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+
+        return unit_ids
+
+    def claim(self, worker):
+        """Claim the next pending unit, or a unit
+        whose lease has expired.
+
+        A unit whose lease has expired after its
+        last attempt is failed instead.
+
+        Parameters
+        ----------
+        worker: str
+            Name of the worker.
+
+        Returns
+        -------
+        tuple | None
+            The unit id and the payload of the
+            claimed unit, None if no unit is left.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._connection.execute(
+                    'UPDATE units SET status = ?, worker = NULL, '
+                    'lease_expires = NULL, error = ? '
+                    'WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+                    (FAILED, 'lease expired', LEASED, now, self.max_attempts)
+                )
+                row = self._connection.execute(
+                    'SELECT unit_id, payload FROM units '
+                    'WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                    'ORDER BY unit_id LIMIT 1',
+                    (PENDING, LEASED, now)
+                ).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        'UPDATE units SET status = ?, worker = ?, '
+                        'lease_expires = ?, attempts = attempts + 1 '
+                        'WHERE unit_id = ?',
+                        (LEASED, worker, now + self.lease_time, row[0])
+                    )
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+
+        if row is None:
+            return None
+
+        return row[0], json.loads(row[1])
+
+    def renew(self, unit_id, worker):
+        """Extend the lease of a unit.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker that holds the lease.
+
+        Returns
+        -------
+        bool
+            False if the worker does not hold
+            the lease anymore.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                'UPDATE units SET lease_expires = ? '
+                'WHERE unit_id = ? AND worker = ? AND status = ?',
+                (time.time() + self.lease_time, unit_id, worker, LEASED)
+            )
+
+        return cursor.rowcount == 1
+
+    def complete(self, unit_id, worker, result):
+        """Mark a unit as done.
+
+        A unit that was already completed by another
+        worker, after the lease of this worker expired,
+        keeps its result.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker.
+        result: object
+            The result of the unit, a value that can
+            be encoded as JSON, e.g. a file path.
+
+        Returns
+        -------
+        bool
+            True if the result of the worker was kept.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                'UPDATE units SET status = ?, worker = ?, result = ? '
+                'WHERE unit_id = ? AND status != ?',
+                (DONE, worker, json.dumps(result), unit_id, DONE)
+            )
+
+        return cursor.rowcount == 1
+
+    def release(self, unit_id, worker, error=None):
+        """Give a claimed unit back to the
+        queue, e.g. after a failure.
+
+        A unit that was claimed max_attempts
+        times is failed instead.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker that holds the lease.
+        error: str | None
+            Description of the failure.
+
+        Returns
+        -------
+        bool
+            True if the unit was failed.
+        """
+        with self._lock:
+            self._connection.execute(
+                'UPDATE units SET '
+                'status = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+                'worker = NULL, lease_expires = NULL, error = ? '
+                'WHERE unit_id = ? AND worker = ? AND status = ?',
+                (self.max_attempts, FAILED, PENDING, error, unit_id, worker, LEASED)
+            )
+            row = self._connection.execute(
+                'SELECT status FROM units WHERE unit_id = ?',
+                (unit_id,)
+            ).fetchone()
+
+        return row is not None and row[0] == FAILED
+
+    def retry_failed(self):
+        """Give the failed units back to the
+        queue with new attempts.
+
+        Returns
+        -------
+        int
+            Number of units that are pending again.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                'UPDATE units SET status = ?, attempts = 0, error = NULL '
+                'WHERE status = ?',
+                (PENDING, FAILED)
+            )
+
+        return cursor.rowcount
+
+    def failures(self):
+        """Get the failed units.
+
+        Returns
+        -------
+        list
+            Tuples of the unit id, the payload and
+            the error of every failed unit, ordered
+            by unit id.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT unit_id, payload, error FROM units WHERE status = ? '
+                'ORDER BY unit_id',
+                (FAILED,)
+            ).fetchall()
+
+        return [(unit_id, json.loads(payload), error) for unit_id, payload, error in rows]
+
+    def counts(self):
+        """Get the number of units in every state.
+
+        Returns
+        -------
+        dict
+            Number of units by state.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT status, COUNT(*) FROM units GROUP BY status'
+            ).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(rows)
+
+        return counts
+
+    def is_done(self):
+        """Check if no unit is pending or leased
+        anymore, the units are done or failed.
+
+        Returns
+        -------
+        bool
+            Result of the check.
+        """
+        counts = self.counts()
+
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self):
+        """Get the results of the done units.
+
+        Returns
+        -------
+        list
+            Tuples of the payload and the result of
+            every done unit, ordered by unit id.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT payload, result FROM units WHERE status = ? '
+                'ORDER BY unit_id',
+                (DONE,)
+            ).fetchall()
+
+        return [(json.loads(payload), json.loads(result)) for payload, result in rows]
+
+    def close(self):
+
+        self._connection.close()
+
+
+class DirectoryQueue(object):
+
+    def __init__(self, path, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS):
+        """A queue of work units in a directory, that is
+        shared by workers on several machines, e.g. on
+        NFS.
+
+        Every unit, lease and result is a file that is
+        created atomically with os.link, which fails if
+        the file exists, also on network filesystems. A
+        worker claims a unit by creating the lease file of
+        its next attempt, so that every attempt is claimed
+        by one worker only. The worker renews the lease
+        while it works on the unit. If a worker dies, its
+        lease expires and the next attempt is claimed by
+        another worker. A unit that was claimed max_attempts
+        times without being done is failed. The clocks of
+        the machines have to be synchronized, e.g. by NTP.
+
+        Parameters
+        ----------
+        path: str
+            Path of the directory of the queue.
+        lease_time: float
+            Time in seconds after which the lease
+            of a unit expires if it is not renewed.
+        max_attempts: int
+            Number of times a unit is claimed
+            before it is failed.
+        """
+        self.path = path
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+        for directory in ('manifest', 'units', 'leases', DONE, FAILED):
+            os.makedirs(os.path.join(path, directory), exist_ok=True)
+
+    def _file(self, *parts):
+
+        return os.path.join(self.path, *parts)
+
+    def _create(self, path, value):
+        """Create a file with a value encoded as
+        JSON, only if it does not exist yet.
+
+        The file is written under a temporary name
+        and linked to its path, so that it is never
+        seen incomplete.
+
+        Returns
+        -------
+        bool
+            False if the file already existed.
+        """
+        temporary_path = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+        with open(temporary_path, 'w') as file:
+            json.dump(value, file)
+        try:
+            os.link(temporary_path, path)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(temporary_path)
+
+        return True
+
+    def _replace(self, path, value):
+        """Replace a file with a value encoded as JSON."""
+        temporary_path = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+        with open(temporary_path, 'w') as file:
+            json.dump(value, file)
+        os.replace(temporary_path, path)
+
+    def _read(self, path):
+        """Read a file with a value encoded as JSON,
+        None if the file does not exist."""
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _ids(self, *parts):
+        """Get the sorted ids of the JSON files
+        of a directory."""
+        return sorted(
+            int(name[:-len('.json')])
+            for name in os.listdir(self._file(*parts))
+            if name.endswith('.json')
+        )
+
+    def _lease(self, unit_id):
+        """Get the last attempt of a unit and its
+        lease, None if there is none."""
+        attempts = self._ids('leases', str(unit_id))
+        if len(attempts) == 0:
+            return 0, None
+
+        return attempts[-1], self._read(
+            self._file('leases', str(unit_id), '%d.json' % attempts[-1])
+        )
+
+    def _status(self, unit_id, now):
+
+        if os.path.exists(self._file(DONE, '%d.json' % unit_id)):
+            return DONE
+        if os.path.exists(self._file(FAILED, '%d.json' % unit_id)):
+            return FAILED
+        _, lease = self._lease(unit_id)
+        if lease is not None and lease['expires'] >= now:
+            return LEASED
+
+        return PENDING
+
+    def set_manifest(self, key, value):
+        """Save a value of the job manifest.
+
+        Parameters
+        ----------
+        key: str
+            Name of the value.
+        value: object
+            A value that can be encoded as JSON.
+        """
+        self._replace(self._file('manifest', '%s.json' % key), value)
+
+    def get_manifest(self, key):
+        """Get a value of the job manifest.
+
+        Parameters
+        ----------
+        key: str
+            Name of the value.
+
+        Returns
+        -------
+        object
+            The value, None if it is not set.
+        """
+        return self._read(self._file('manifest', '%s.json' % key))
+
+    def add(self, payloads):
+        """Add work units to the queue.
+
+        Parameters
+        ----------
+        payloads: iterable
+            The description of every unit, values
+            that can be encoded as JSON.
+
+        Returns
+        -------
+        list
+            The ids of the units.
+        """
+        unit_ids = list()
+        unit_id = max(self._ids('units'), default=0)
+        for payload in payloads:
+            while True:
+                unit_id += 1
+                os.makedirs(self._file('leases', str(unit_id)), exist_ok=True)
+                if self._create(self._file('units', '%d.json' % unit_id), payload):
+                    break
+            unit_ids.append(unit_id)
+
+        return unit_ids
+
+    def claim(self, worker):
+        """Claim the next pending unit, or a unit
+        whose lease has expired.
+
+        A unit whose lease has expired after its
+        last attempt is failed instead.
+
+        Parameters
+        ----------
+        worker: str
+            Name of the worker.
+
+        Returns
+        -------
+        tuple | None
+            The unit id and the payload of the
+            claimed unit, None if no unit is left.
+        """
+        now = time.time()
+        for unit_id in self._ids('units'):
+            if self._status(unit_id, now) != PENDING:
+                continue
+            attempt, _ = self._lease(unit_id)
+            if attempt >= self.max_attempts:
+                self._create(self._file(FAILED, '%d.json' % unit_id), 'lease expired')
+                continue
+            # another worker claimed the attempt first
+            if not self._create(
+                self._file('leases', str(unit_id), '%d.json' % (attempt + 1)),
+                {'worker': worker, 'expires': now + self.lease_time}
+            ):
+                continue
+            if os.path.exists(self._file(DONE, '%d.json' % unit_id)):
+                continue
+
+            return unit_id, self._read(self._file('units', '%d.json' % unit_id))
+
+        return None
+
+    def renew(self, unit_id, worker):
+        """Extend the lease of a unit.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker that holds the lease.
+
+        Returns
+        -------
+        bool
+            False if the worker does not hold
+            the lease anymore.
+        """
+        attempt, lease = self._lease(unit_id)
+        if lease is None or lease['worker'] != worker or \
+                self._status(unit_id, time.time()) != LEASED:
+            return False
+        self._replace(
+            self._file('leases', str(unit_id), '%d.json' % attempt),
+            dict(lease, expires=time.time() + self.lease_time)
+        )
+
+        return True
+
+    def complete(self, unit_id, worker, result):
+        """Mark a unit as done.
+
+        A unit that was already completed by another
+        worker, after the lease of this worker expired,
+        keeps its result.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker.
+        result: object
+            The result of the unit, a value that can
+            be encoded as JSON, e.g. a file path.
+
+        Returns
+        -------
+        bool
+            True if the result of the worker was kept.
+        """
+        return self._create(
+            self._file(DONE, '%d.json' % unit_id),
+            {'worker': worker, 'result': result}
+        )
+
+    def release(self, unit_id, worker, error=None):
+        """Give a claimed unit back to the
+        queue, e.g. after a failure.
+
+        A unit that was claimed max_attempts
+        times is failed instead.
+
+        Parameters
+        ----------
+        unit_id: int
+            Id of the unit.
+        worker: str
+            Name of the worker that holds the lease.
+        error: str | None
+            Description of the failure.
+
+        Returns
+        -------
+        bool
+            True if the unit was failed.
+        """
+        attempt, lease = self._lease(unit_id)
+        if lease is not None and lease['worker'] == worker:
+            if attempt >= self.max_attempts:
+                self._create(self._file(FAILED, '%d.json' % unit_id), error)
+            # an expired lease, the next attempt can be claimed
+            self._replace(
+                self._file('leases', str(unit_id), '%d.json' % attempt),
+                dict(lease, expires=0)
+            )
+
+        return os.path.exists(self._file(FAILED, '%d.json' % unit_id))
+
+    def retry_failed(self):
+        """Give the failed units back to the
+        queue with new attempts.
+
+        Returns
+        -------
+        int
+            Number of units that are pending again.
+        """
+        unit_ids = self._ids(FAILED)
+        for unit_id in unit_ids:
+            # the attempts are removed first, otherwise
+            # the unit would be failed again.
+            for attempt in self._ids('leases', str(unit_id)):
+                os.remove(self._file('leases', str(unit_id), '%d.json' % attempt))
+            os.remove(self._file(FAILED, '%d.json' % unit_id))
+
+        return len(unit_ids)
+
+    def failures(self):
+        """Get the failed units.
+
+        Returns
+        -------
+        list
+            Tuples of the unit id, the payload and
+            the error of every failed unit, ordered
+            by unit id.
+        """
+        return [
+            (
+                unit_id,
+                self._read(self._file('units', '%d.json' % unit_id)),
+                self._read(self._file(FAILED, '%d.json' % unit_id))
+            )
+            for unit_id in self._ids(FAILED)
+            if not os.path.exists(self._file(DONE, '%d.json' % unit_id))
+        ]
+
+    def counts(self):
+        """Get the number of units in every state.
+
+        Returns
+        -------
+        dict
+            Number of units by state.
+        """
+        now = time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for unit_id in self._ids('units'):
+            counts[self._status(unit_id, now)] += 1
+
+        return counts
+
+    def is_done(self):
+        """Check if no unit is pending or leased
+        anymore, the units are done or failed.
+
+        Returns
+        -------
+        bool
+            Result of the check.
+        """
+        counts = self.counts()
+
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self):
+        """Get the results of the done units.
+
+        Returns
+        -------
+        list
+            Tuples of the payload and the result of
+            every done unit, ordered by unit id.
+        """
+        return [
+            (
+                self._read(self._file('units', '%d.json' % unit_id)),
+                self._read(self._file(DONE, '%d.json' % unit_id))['result']
+            )
+            for unit_id in self._ids(DONE)
+        ]
+
+    def close(self):
+
+        pass
+
+
+def open_queue(path, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS):
+    """Open the queue of a path.
+
+    Parameters
+    ----------
+    path: str
+        Path of a SQLite queue, ending in .sqlite,
+        for the workers of one host, or any other path
+        of a directory queue, e.g. on shared storage
+        for workers on several machines.
+    lease_time: float
+        Time in seconds after which the lease
+        of a unit expires if it is not renewed.
+    max_attempts: int
+        Number of times a unit is claimed
+        before it is failed.
+
+    Returns
+    -------
+    WorkQueue | DirectoryQueue
+        The queue.
+    """
+    queue_class = WorkQueue if path.endswith(SQLITE_SUFFIX) else DirectoryQueue
+
+    return queue_class(path, lease_time=lease_time, max_attempts=max_attempts)
+
+
+def create_job(queue, config, task_ids=None, task_chunk_size=TASK_CHUNK_SIZE):
+    """Split a sweep into (flow group, task chunk)
+    work units and add them to a queue.
+
+    The runs of all the flows, and the ones using
+    RandomSearch, are listed once, so that every
+    unit knows the flows of its group that have
+    runs for any task of the sweep. The restrictions,
+    e.g. min_task_flow, are then checked against these
+    flows, as for src.driver, and not only against the
+    flows with runs for the tasks of the unit.
+
+    Parameters
+    ----------
+    queue: WorkQueue | DirectoryQueue
+        The queue of the job.
+    config: dict
+        The configuration, as given by
+        src.driver.load_config.
+    task_ids: iterable | None
+        The tasks of the sweep. If None, the tasks
+        of the task restrictions that have runs for
+        any flow of the configuration are listed.
+    task_chunk_size: int
+        Maximal number of tasks of a work unit.
+
+    Returns
+    -------
+    list
+        The ids of the work units.
+    """
+    groups = {
+        group: get_flow_ids(*flow_qualifiers)
+        for group, flow_qualifiers in config['groups'].items()
+    }
+    flow_ids = set().union(*groups.values())
+
+    task_restrictions = _listing_restrictions(config)
+    if task_ids is not None:
+        task_restrictions['task'] = sorted(set(task_ids))
+    run_index = ResultExtractor(*flow_ids, **task_restrictions).run_index
+    random_index = ResultExtractor(
+        *flow_ids,
+        # 903 is the uploader of the runs using RandomSearch
+        **dict(task_restrictions, uploader=[903])
+    ).run_index
+    if task_ids is None:
+        task_ids = run_index.tasks.tolist()
+
+    task_ids = sorted(set(task_ids))
+    flows = set(run_index.flows.tolist())
+    random_flows = set(random_index.flows.tolist())
+    queue.set_manifest('config', config)
+
+    return queue.add(
+        {
+            'group': group,
+            'flows': sorted(groups[group] & flows),
+            'random_flows': sorted(groups[group] & random_flows),
+            'tasks': task_ids[start:start + task_chunk_size]
+        }
+        for group in config['groups']
+        for start in range(0, len(task_ids), task_chunk_size)
+    )
+
+
+def _listing_restrictions(config):
+    """Get the task restrictions of a configuration
+    without min_task_flow, which work units check
+    against the flows of their group."""
+    return {
+        key: value
+        for key, value in config['task_restrictions'].items()
+        if key != 'min_task_flow'
+    }
+
+
+def _select_complete_tasks(run_index, flow_ids, lower_limit):
+    """Keep the tasks that have more than lower_limit
+    runs for every flow.
+
+    Parameters
+    ----------
+    run_index: src.run_index.RunIndex
+        The runs of the flows.
+    flow_ids: list
+        The flows that every task needs runs for,
+        also the ones without runs in the index.
+    lower_limit: int | None
+        The minimum number of runs. If None,
+        all the tasks are kept.
+
+    Returns
+    -------
+    src.run_index.RunIndex
+        The runs of the complete tasks.
+    """
+    if lower_limit is None:
+        return run_index
+
+    rows, _ = run_index.cell_positions()
+    nr_flows = np.bincount(
+        rows[run_index.counts > lower_limit],
+        minlength=len(run_index.tasks)
+    )
+
+    return run_index.select_tasks(run_index.tasks[nr_flows == len(flow_ids)])
+
+
+def process_unit(config, unit):
+    """Find the interesting tasks of a work unit.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration of the job.
+    unit: dict
+        The work unit, with the group, the flows
+        of the group with runs and with runs using
+        RandomSearch, and the tasks.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The aggregated fraction of runs in the minima
+        region for the tasks of the unit, without the
+        tasks that have missing values or are part
+        of OpenMLCC18.
+    """
+    algorithm = unit['group']
+    # without flow restrictions all the flows would be listed
+    if len(unit['flows']) == 0 or len(unit['random_flows']) == 0:
+        return pandas.DataFrame(columns=[algorithm])
+    lower_limit = config['task_restrictions'].get('min_task_flow')
+    task_restrictions = dict(_listing_restrictions(config), task=unit['tasks'])
+
+    results = _select_complete_tasks(
+        ResultExtractor(*unit['flows'], **task_restrictions).run_index,
+        unit['flows'],
+        lower_limit
+    )
+    random_index = _select_complete_tasks(
+        ResultExtractor(
+            *unit['random_flows'],
+            **dict(task_restrictions, uploader=[903])
+        ).run_index,
+        unit['random_flows'],
+        lower_limit
+    )
+    random_results = get_tasks_by_minima_region(
+        results,
+        set(unit['flows']),
+        threshold=config['threshold'],
+        detailed='Yes',
+        sparse=True,
+        random_results=random_index
+    )
+    aggregated_results = aggregate_results_for_flow(random_results, algorithm)
+
+    task_ids = aggregated_results.index.values.tolist()
+    undesired_tasks = get_tasks_missing_values(task_ids).union(
+        tasks_contained_in_openml_cc18(task_ids)
+    )
+
+    return aggregated_results.drop(undesired_tasks.intersection(task_ids))
+
+
+def _partial_path(config, unit_id):
+
+    return os.path.join(config['path'], 'partial', 'unit_%d.csv' % unit_id)
+
+
+def run_worker(queue, worker=None, max_units=None):
+    """Work on the units of a queue until
+    none is left.
+
+    The lease of the current unit is renewed in
+    the background. The partial result of every
+    unit is written as a CSV file in the partial
+    directory of the output path. A unit that raises
+    is given back to the queue, or failed after its
+    last attempt, and the worker goes on with the
+    next unit.
+
+    Parameters
+    ----------
+    queue: WorkQueue | DirectoryQueue
+        The queue of the job.
+    worker: str | None
+        Name of the worker. If None, the host
+        name and the process id are used.
+    max_units: int | None
+        Maximal number of units to work on.
+
+    Returns
+    -------
+    int
+        Number of completed units.
+    """
+    worker = worker if worker is not None else \
+        '%s-%d' % (socket.gethostname(), os.getpid())
+    config = queue.get_manifest('config')
+    nr_units = 0
+
+    while max_units is None or nr_units < max_units:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            break
+        unit_id, unit = claimed
+
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(queue.lease_time / 3):
+                queue.renew(unit_id, worker)
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            partial_results = process_unit(config, unit)
+            csv_path = _partial_path(config, unit_id)
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+            # the file is complete before it is visible,
+            # a unit that is run twice writes the same file.
+            temporary_path = '%s.%s.tmp' % (csv_path, worker)
+            partial_results.to_csv(temporary_path)
+            os.replace(temporary_path, csv_path)
+        except Exception as error:
+            failed = queue.release(unit_id, worker, repr(error))
+            logger.exception(
+                'Unit %d %s',
+                unit_id,
+                'failed' if failed else 'raised, it is given back to the queue'
+            )
+            continue
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+
+        queue.complete(unit_id, worker, csv_path)
+        nr_units += 1
+
+    return nr_units
+
+
+def reduce_results(queue, output_format='csv'):
+    """Merge the partial results of a finished
+    job into one sorted file per group.
+
+    Parameters
+    ----------
+    queue: WorkQueue | DirectoryQueue
+        The queue of the job.
+    output_format: str
+        'csv' or 'parquet'. Parquet needs one of
+        the Parquet engines of pandas.
+
+    Returns
+    -------
+    dict
+        The path of the file of every group.
+    """
+    counts = queue.counts()
+    if counts[PENDING] + counts[LEASED] + counts[FAILED] > 0:
+        raise RuntimeError('The job has units that are not done: %s' % counts)
+
+    config = queue.get_manifest('config')
+    partial_paths = dict()
+    for unit, result in queue.results():
+        partial_paths.setdefault(unit['group'], list()).append(result)
+
+    output_paths = dict()
+    for algorithm in config['groups']:
+        partial_results = [
+            pandas.read_csv(path, index_col=0, float_precision='round_trip')
+            for path in partial_paths.get(algorithm, list())
+        ]
+        # units without interesting tasks do
+        # not decide the types of the columns.
+        partial_results = [
+            partial_result
+            for partial_result in partial_results
+            if len(partial_result.index) > 0
+        ]
+        aggregated_results = pandas.concat(partial_results) \
+            if len(partial_results) > 0 else pandas.DataFrame(columns=[algorithm])
+        # sorted independently of the order
+        # in which the units were done.
+        aggregated_results = aggregated_results.astype(float).sort_index().sort_values(
+            by=[algorithm],
+            kind='mergesort'
+        )
+        aggregated_results.index = aggregated_results.index.astype(np.int64)
+
+        output_path = os.path.join(config['path'], '%s.%s' % (algorithm, output_format))
+        if output_format == 'csv':
+            aggregated_results.to_csv(output_path)
+        elif output_format == 'parquet':
+            aggregated_results.to_parquet(output_path)
+        else:
+            raise ValueError('Unknown output format: %s' % output_format)
+        output_paths[algorithm] = output_path
+
+    return output_paths
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Work queue for benchmark sweeps')
+    parser.add_argument(
+        'command',
+        help='create the job, work on it, reduce its results, show its '
+             'status or retry its failed units.',
+        choices=['create', 'work', 'reduce', 'status', 'retry'],
+        type=str
+    )
+    parser.add_argument(
+        '--queue',
+        help='Path of the queue. A path ending in .sqlite is a SQLite queue '
+             'on a local filesystem for the workers of one host, any other '
+             'path a directory queue, e.g. on shared storage for workers on '
+             'several machines.',
+        required=True,
+        type=str
+    )
+    parser.add_argument(
+        '--config',
+        help='Path of the JSON configuration, as for src.driver.',
+        default=None,
+        type=str
+    )
+    parser.add_argument(
+        '--task_chunk_size',
+        help='Maximal number of tasks of a work unit.',
+        default=TASK_CHUNK_SIZE,
+        type=int
+    )
+    parser.add_argument(
+        '--lease_time',
+        help='Time in seconds after which the lease of a dead worker expires.',
+        default=LEASE_TIME,
+        type=float
+    )
+    parser.add_argument(
+        '--max_attempts',
+        help='Number of times a unit is claimed before it is failed.',
+        default=MAX_ATTEMPTS,
+        type=int
+    )
+    parser.add_argument(
+        '--format',
+        help='Format of the reduced results.',
+        default='csv',
+        choices=['csv', 'parquet'],
+        type=str
+    )
+    add_openml_arguments(parser)
+    arguments = parser.parse_args()
+
+    # only the job creation and the workers access OpenML
+    if arguments.command in ('create', 'work'):
+        configure_openml(arguments)
+    queue = open_queue(
+        arguments.queue,
+        lease_time=arguments.lease_time,
+        max_attempts=arguments.max_attempts
+    )
+    if arguments.command == 'create':
+        unit_ids = create_job(
+            queue,
+            load_config(arguments.config),
+            task_chunk_size=arguments.task_chunk_size
+        )
+        print('%d work units' % len(unit_ids))
+    elif arguments.command == 'work':
+        print('%d work units done' % run_worker(queue))
+    elif arguments.command == 'reduce':
+        for algorithm, output_path in reduce_results(queue, arguments.format).items():
+            print('%s: %s' % (algorithm, output_path))
+    elif arguments.command == 'retry':
+        print('%d failed work units are pending again' % queue.retry_failed())
+    else:
+        print(queue.counts())
+        for unit_id, unit, error in queue.failures():
+            print('unit %d %s failed: %s' % (unit_id, unit, error))
+
+
+if __name__ == '__main__':
+    main()
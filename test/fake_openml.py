@@ -0,0 +1,175 @@
+import random
+from collections import Counter
+from contextlib import contextmanager
+
+from src.backend import Backend, get_backend, set_backend
+
+
+class FakeOpenML(Backend):
+
+    def __init__(self, n_tasks=20, flow_ids=(10, 11, 12), seed=0):
+        """A synthetic stand-in for the OpenML runs
+        and evaluations.
+
+        The tasks have the task type task_id % 3 + 1 and
+        the runs of the first flow are tagged 'weka', the
+        other runs 'mlr'.
+
+        Parameters
+        ----------
+        n_tasks: int
+            Number of tasks.
+        flow_ids: tuple
+            Ids of the flows.
+        seed: int
+            Seed for the generated runs.
+        """
+        rng = random.Random(seed)
+        self.flow_ids = flow_ids
+        # run_id: (task_id, flow_id, uploader, evaluations)
+        self.runs = dict()
+        # number of calls for every method
+        self.calls = Counter()
+        run_id = 1
+        for task_id in range(1, n_tasks + 1):
+            for flow_id in flow_ids:
+                for _ in range(rng.randint(0, 6)):
+                    evaluations = dict()
+                    if rng.random() > 0.1:
+                        evaluations['predictive_accuracy'] = round(rng.random(), 3)
+                    evaluations['kappa'] = round(rng.random(), 3)
+                    self.runs[run_id] = (
+                        task_id,
+                        flow_id,
+                        rng.choice([903, 1]),
+                        evaluations
+                    )
+                    run_id += 1
+
+    def list_runs(
+            self,
+            offset=None,
+            size=None,
+            id=None,
+            task=None,
+            flow=None,
+            uploader=None,
+            task_type=None,
+            tag=None,
+            **restrictions
+    ):
+        self.calls['list_runs'] += 1
+        runs = list()
+        for run_id, (task_id, flow_id, run_uploader, _) in sorted(self.runs.items()):
+            if flow is not None and flow_id not in flow:
+                continue
+            if uploader is not None and run_uploader not in uploader:
+                continue
+            if task is not None and task_id not in task:
+                continue
+            if id is not None and run_id not in id:
+                continue
+            if task_type is not None and self.task_type(task_id) != task_type:
+                continue
+            if tag is not None and self.tag(flow_id) != tag:
+                continue
+            runs.append(
+                (
+                    run_id,
+                    {
+                        'run_id': run_id,
+                        'task_id': task_id,
+                        'flow_id': flow_id,
+                        'uploader': run_uploader
+                    }
+                )
+            )
+        offset = offset if offset is not None else 0
+        runs = runs[offset:offset + size] if size is not None else runs[offset:]
+
+        return dict(runs)
+
+    def task_type(self, task_id):
+
+        return task_id % 3 + 1
+
+    def tag(self, flow_id):
+
+        return 'weka' if flow_id == self.flow_ids[0] else 'mlr'
+
+    def list_evaluations(self, function, runs):
+
+        self.calls['list_evaluations'] += 1
+
+        return {
+            run_id: self.runs[run_id][3][function]
+            for run_id in runs
+            if function in self.runs[run_id][3]
+        }
+
+    def get_run(self, run_id):
+
+        self.calls['get_run'] += 1
+        task_id, flow_id, _, evaluations = self.runs[run_id]
+
+        return {
+            'run_id': run_id,
+            'task_id': task_id,
+            'flow_id': flow_id,
+            'evaluations': dict(evaluations)
+        }
+
+    def list_flows(self, offset=None, size=None):
+
+        offset = offset if offset is not None else 0
+        flow_ids = self.flow_ids[offset:offset + size] \
+            if size is not None else self.flow_ids[offset:]
+
+        # every flow is a version of the fake flow
+        return {
+            flow_id: {
+                'id': flow_id,
+                'full_name': 'fake.flow(%d)' % flow_id,
+                'name': 'fake.flow',
+                'version': str(flow_id),
+                'external_version': '',
+                'uploader': 1
+            }
+            for flow_id in flow_ids
+        }
+
+    def list_tasks(self, task_ids):
+
+        tasks = {task_id for task_id, _, _, _ in self.runs.values()}
+
+        return {
+            task_id: {'task_id': task_id, 'dataset_id': task_id, 'qualities': dict()}
+            for task_id in task_ids
+            if task_id in tasks
+        }
+
+    def get_task(self, task_id):
+
+        return {'task_id': task_id, 'dataset_id': task_id}
+
+    def get_dataset(self, dataset_id):
+
+        return {'dataset_id': dataset_id, 'qualities': dict()}
+
+    def get_study(self, study_id):
+
+        return {
+            'study_id': study_id,
+            'tasks': sorted({task_id for task_id, _, _, _ in self.runs.values()})
+        }
+
+    @contextmanager
+    def patch(self):
+        """Use the fake as the backend for
+        all the OpenML access."""
+        backend = get_backend()
+        set_backend(self)
+        try:
+            yield self
+        finally:
+            set_backend(backend)
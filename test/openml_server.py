@@ -0,0 +1,234 @@
+import gzip
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+# Filters of the run listing and the
+# restriction of the backend they map to.
+_RUN_FILTERS = {'run': 'id', 'task': 'task', 'flow': 'flow', 'uploader': 'uploader'}
+
+
+def _element(name, value):
+
+    return '<oml:%s>%s</oml:%s>' % (name, escape(str(value)), name)
+
+
+def _document(name, body):
+
+    return '<oml:%s xmlns:oml="http://openml.org/openml">%s</oml:%s>' % (
+        name, body, name
+    )
+
+
+def _error(code, message):
+
+    return _document('error', _element('code', code) + _element('message', message))
+
+
+def _ids(text):
+
+    return [int(value) for value in text.split(',')]
+
+
+class OpenMLServer(object):
+
+    def __init__(self, backend):
+        """A local stand-in for the OpenML XML API that
+        serves the responses of a backend over HTTP.
+
+        The connections are kept alive and the
+        responses are gzip compressed if the client
+        accepts it.
+
+        Parameters
+        ----------
+        backend: src.backend.Backend
+            The backend that gives the responses.
+        """
+        self.backend = backend
+        # number of requests for every endpoint
+        self.requests = Counter()
+        # client addresses of the connections
+        self.connections = set()
+        self.compressed = 0
+        # (status, error code) of the next
+        # responses of every endpoint
+        self.errors = dict()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+
+                status, body = server.respond(self.path.split('?')[0].strip('/'))
+                body = body.encode('utf-8')
+                compress = 'gzip' in self.headers.get('Accept-Encoding', '')
+                if compress:
+                    body = gzip.compress(body)
+                with server._lock:
+                    server.connections.add(self.client_address)
+                    server.compressed += int(compress)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/xml')
+                if compress:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """Base url of the XML API."""
+        return 'http://127.0.0.1:%d/api/v1/xml' % self._server.server_address[1]
+
+    def __enter__(self):
+
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, *args):
+
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path):
+        """Get the status and the XML body
+        for a request path."""
+        parts = path.split('/')[3:]
+        endpoint = '/'.join(parts[:2]) if len(parts) > 1 and parts[1] in ('list', 'qualities') \
+            else parts[0]
+        with self._lock:
+            self.requests[endpoint] += 1
+            errors = self.errors.get(endpoint)
+            error = errors.pop(0) if errors else None
+        if error is not None:
+            status, code = error
+            return status, _error(code, 'Error')
+
+        if endpoint == 'run/list':
+            return self._list_runs(dict(zip(parts[2::2], parts[3::2])))
+        elif endpoint == 'evaluation/list':
+            filters = dict(zip(parts[2::2], parts[3::2]))
+            evaluations = self.backend.list_evaluations(
+                filters['function'],
+                _ids(filters['run'])
+            )
+            if len(evaluations) == 0:
+                return 412, _error(542, 'No results')
+            return 200, _document('evaluations', ''.join(
+                '<oml:evaluation>%s%s</oml:evaluation>' % (
+                    _element('run_id', run_id),
+                    _element('value', value)
+                )
+                for run_id, value in evaluations.items()
+            ))
+        elif endpoint == 'flow/list':
+            filters = dict(zip(parts[2::2], parts[3::2]))
+            flows = self.backend.list_flows(
+                offset=int(filters.get('offset', 0)),
+                size=int(filters['limit']) if 'limit' in filters else None
+            )
+            if len(flows) == 0:
+                # the code of the server for an empty flow listing
+                return 412, _error(500, 'No results')
+            return 200, _document('flows', ''.join(
+                '<oml:flow>%s</oml:flow>' % ''.join(
+                    _element(key, value) for key, value in flow.items()
+                )
+                for flow in flows.values()
+            ))
+        elif endpoint == 'task/list':
+            tasks = self.backend.list_tasks(_ids(parts[3]))
+            if len(tasks) == 0:
+                return 412, _error(482, 'No results')
+            return 200, _document('tasks', ''.join(
+                '<oml:task>%s%s%s</oml:task>' % (
+                    _element('task_id', task['task_id']),
+                    _element('did', task['dataset_id']),
+                    ''.join(
+                        '<oml:quality name="%s">%s</oml:quality>' % (name, value)
+                        for name, value in task['qualities'].items()
+                    )
+                )
+                for task in tasks.values()
+            ))
+        elif endpoint == 'run':
+            run = self.backend.get_run(int(parts[1]))
+            return 200, _document('run', ''.join([
+                _element('run_id', run['run_id']),
+                _element('task_id', run['task_id']),
+                _element('flow_id', run['flow_id']),
+                '<oml:output_data>%s</oml:output_data>' % ''.join(
+                    '<oml:evaluation>%s%s</oml:evaluation>'
+                    '<oml:evaluation>%s%s%s%s</oml:evaluation>' % (
+                        _element('name', name),
+                        _element('value', value),
+                        _element('name', name),
+                        _element('repeat', 0),
+                        _element('fold', 0),
+                        _element('value', 0)
+                    )
+                    for name, value in run['evaluations'].items()
+                )
+            ]))
+        elif endpoint == 'task':
+            task = self.backend.get_task(int(parts[1]))
+            return 200, _document('task', ''.join([
+                _element('task_id', task['task_id']),
+                '<oml:input name="source_data"><oml:data_set>%s</oml:data_set></oml:input>'
+                % _element('data_set_id', task['dataset_id'])
+            ]))
+        elif endpoint == 'data/qualities':
+            dataset_id = int(parts[2])
+            if dataset_id % 7 == 0:
+                return 412, _error(362, 'Dataset deactivated')
+            dataset = self.backend.get_dataset(dataset_id)
+            return 200, _document('data_qualities', ''.join(
+                '<oml:quality>%s%s</oml:quality>' % (
+                    _element('name', name),
+                    _element('value', value)
+                )
+                for name, value in dataset['qualities'].items()
+            ))
+        elif endpoint == 'study':
+            study = self.backend.get_study(int(parts[1]))
+            return 200, _document('study', '<oml:tasks>%s</oml:tasks>' % ''.join(
+                _element('task_id', task_id) for task_id in study['tasks']
+            ))
+
+        return 404, 'Not found'
+
+    def _list_runs(self, filters):
+
+        restrictions = {
+            restriction: _ids(filters[name])
+            for name, restriction in _RUN_FILTERS.items()
+            if name in filters
+        }
+        runs = self.backend.list_runs(
+            offset=int(filters.get('offset', 0)),
+            size=int(filters['limit']) if 'limit' in filters else None,
+            **restrictions
+        )
+        if len(runs) == 0:
+            return 412, _error(512, 'No results')
+
+        return 200, _document('runs', ''.join(
+            '<oml:run>%s</oml:run>' % ''.join(
+                _element(key, value) for key, value in run.items()
+            )
+            for run in runs.values()
+        ))
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+
+import pandas
+
+from fake_openml import FakeOpenML
+from src.backend import set_backend
+from src.result_extractor import ResultExtractor
+from src.operations import (
+    aget_tasks_by_best_score,
+    aget_tasks_by_measure,
+    aget_tasks_by_minima_region,
+    get_tasks_by_best_score,
+    get_tasks_by_measure,
+    get_tasks_by_minima_region
+)
+
+
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+
+        self.flow_ids = {10, 11, 12}
+        self.fake_openml = FakeOpenML()
+        set_backend(self.fake_openml)
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def test_abuild(self):
+
+        async def build():
+            return await asyncio.gather(
+                ResultExtractor.abuild(*self.flow_ids),
+                ResultExtractor.abuild(10, uploader=[903])
+            )
+
+        extractor, random_extractor = asyncio.run(build())
+        self.assertTrue(
+            extractor.results.equals(ResultExtractor(*self.flow_ids).results)
+        )
+        self.assertTrue(
+            random_extractor.results.equals(
+                ResultExtractor(10, uploader=[903]).results
+            )
+        )
+
+    def test_operations(self):
+
+        results = ResultExtractor(*self.flow_ids).results
+
+        async def analyse():
+            return await asyncio.gather(
+                aget_tasks_by_measure(results),
+                aget_tasks_by_best_score(results, measure='kappa'),
+                aget_tasks_by_minima_region(
+                    results,
+                    self.flow_ids,
+                    threshold=0.1
+                )
+            )
+
+        by_measure, by_best_score, by_minima_region = asyncio.run(analyse())
+        self.assertTrue(by_measure.equals(get_tasks_by_measure(results)))
+        self.assertTrue(
+            by_best_score.equals(
+                get_tasks_by_best_score(results, measure='kappa')
+            )
+        )
+        self.assertTrue(
+            by_minima_region.equals(
+                get_tasks_by_minima_region(
+                    results,
+                    self.flow_ids,
+                    threshold=0.1
+                )
+            )
+        )
+
+    def test_concurrent_operations(self):
+
+        results = ResultExtractor(*self.flow_ids).results
+        expected = get_tasks_by_best_score(results)
+
+        async def analyse(data_frame):
+            return await asyncio.gather(
+                *[aget_tasks_by_best_score(data_frame) for _ in range(4)]
+            )
+
+        # the lazily built lookup tables of the indexes
+        # of a new DataFrame are not shared by the threads
+        for _ in range(50):
+            data_frame = pandas.DataFrame(
+                results.values,
+                index=pandas.Index(results.index.values),
+                columns=pandas.Index(results.columns.values)
+            )
+            for by_best_score in asyncio.run(analyse(data_frame)):
+                self.assertTrue(by_best_score.equals(expected))
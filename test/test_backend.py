@@ -0,0 +1,215 @@
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+
+from openml.exceptions import OpenMLServerException
+
+from fake_openml import FakeOpenML
+from src.backend import (
+    BACKEND_METHODS,
+    Backend,
+    DispatchingBackend,
+    MemoizedBackend,
+    RecordingBackend,
+    ReplayBackend,
+    set_backend
+)
+from src.operations import get_tasks_by_measure
+from src.result_extractor import ResultExtractor
+from src.synthetic import SyntheticBackend
+from src.util import get_tasks_missing_values
+
+
+class _TaskBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=5, n_flows=1)
+
+    def get_task(self, task_id):
+
+        return {'task_id': task_id, 'dataset_id': task_id * 10}
+
+    def get_dataset(self, dataset_id):
+
+        if dataset_id == 30:
+            raise OpenMLServerException('Dataset deactivated', code=111)
+        return {
+            'dataset_id': dataset_id,
+            'qualities': {'NumberOfMissingValues': dataset_id % 20}
+        }
+
+    def list_tasks(self, task_ids):
+
+        # the dataset of task 3 is deactivated
+        return {
+            task_id: {
+                'task_id': task_id,
+                'dataset_id': task_id * 10,
+                'qualities': {'NumberOfMissingValues': task_id * 10 % 20}
+            }
+            for task_id in task_ids
+            if task_id != 3
+        }
+
+
+class TestBackend(unittest.TestCase):
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def test_record_replay(self):
+
+        fake_openml = FakeOpenML(n_tasks=5)
+        with tempfile.TemporaryDirectory() as directory:
+            set_backend(RecordingBackend(directory, fake_openml))
+            results = ResultExtractor(10, 11).results
+            recorded_results = get_tasks_by_measure(results)
+
+            # served offline from the fixtures
+            set_backend(ReplayBackend(directory))
+            replayed_results = get_tasks_by_measure(
+                ResultExtractor(10, 11).results
+            )
+            self.assertTrue(replayed_results.equals(recorded_results))
+
+            with self.assertRaises(KeyError):
+                ResultExtractor(12)
+
+    def test_record_errors(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            set_backend(RecordingBackend(directory, _TaskBackend()))
+            recorded_tasks = get_tasks_missing_values([1, 2, 3])
+            with self.assertRaises(OpenMLServerException):
+                RecordingBackend(directory, _TaskBackend()).get_dataset(30)
+
+            set_backend(ReplayBackend(directory))
+            with self.assertRaises(OpenMLServerException):
+                ReplayBackend(directory).get_dataset(30)
+            self.assertEqual(get_tasks_missing_values([1, 2, 3]), recorded_tasks)
+            self.assertEqual(recorded_tasks, {1})
+
+
+class _CallBackend(DispatchingBackend):
+
+    def _call(self, method, **kwargs):
+
+        return method, kwargs
+
+
+class TestDispatchingBackend(unittest.TestCase):
+
+    def test_dispatch(self):
+
+        with self.assertRaises(TypeError):
+            Backend()
+
+        backend = _CallBackend()
+        self.assertEqual(len(BACKEND_METHODS), 8)
+        # the arguments are passed by name
+        self.assertEqual(
+            backend.list_runs(5, flow=[1]),
+            ('list_runs', {'offset': 5, 'size': None, 'flow': [1]})
+        )
+        self.assertEqual(
+            backend.list_evaluations('kappa', runs=[1, 2]),
+            ('list_evaluations', {'function': 'kappa', 'runs': [1, 2]})
+        )
+        self.assertEqual(backend.get_study(99), ('get_study', {'study_id': 99}))
+
+
+class _SlowBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=5, n_flows=1)
+        self.calls = Counter()
+
+    def get_study(self, study_id):
+
+        self.calls['get_study'] += 1
+        time.sleep(0.1)
+        if study_id < 0:
+            raise OpenMLServerException('Unknown study', code=601)
+
+        return {'study_id': study_id, 'tasks': [1, 2, 3]}
+
+    def get_task(self, task_id):
+
+        self.calls['get_task'] += 1
+
+        return {'task_id': task_id, 'dataset_id': task_id}
+
+    def list_runs(self, offset=None, size=None, **restrictions):
+
+        self.calls['list_runs'] += 1
+
+        return dict()
+
+
+class TestMemoizedBackend(unittest.TestCase):
+
+    def test_memoized(self):
+
+        slow_backend = _SlowBackend()
+        backend = MemoizedBackend(slow_backend)
+        for _ in range(3):
+            self.assertEqual(backend.get_study(99)['tasks'], [1, 2, 3])
+            backend.list_runs(flow={1, 2})
+        self.assertEqual(slow_backend.calls['get_study'], 1)
+        # the run listings are not memoized
+        self.assertEqual(slow_backend.calls['list_runs'], 3)
+        self.assertEqual(backend.stats()['hits'], 2)
+        self.assertEqual(backend.stats()['misses'], 1)
+
+    def test_single_flight(self):
+
+        slow_backend = _SlowBackend()
+        backend = MemoizedBackend(slow_backend)
+        responses = list()
+        errors = list()
+
+        def call(study_id):
+            try:
+                responses.append(backend.get_study(study_id))
+            except OpenMLServerException as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=call, args=(study_id,))
+            for study_id in [99] * 5 + [-1] * 3
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(slow_backend.calls['get_study'], 2)
+        self.assertEqual(len(responses), 5)
+        # the error is given to all the
+        # callers and is not cached
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(backend.stats()['coalesced'], 6)
+        self.assertRaises(OpenMLServerException, backend.get_study, -1)
+        self.assertEqual(slow_backend.calls['get_study'], 3)
+
+    def test_eviction(self):
+
+        slow_backend = _SlowBackend()
+        backend = MemoizedBackend(slow_backend, max_size=2)
+        for task_id in [1, 2, 1, 3, 1, 2]:
+            backend.get_task(task_id)
+        # 2 is evicted by 3, as 1 was used more recently
+        self.assertEqual(slow_backend.calls['get_task'], 4)
+        self.assertEqual(backend.stats()['evictions'], 2)
+        self.assertEqual(backend.stats()['size'], 2)
+
+        backend = MemoizedBackend(slow_backend, ttl=0)
+        backend.get_task(1)
+        time.sleep(0.01)
+        backend.get_task(1)
+        self.assertEqual(slow_backend.calls['get_task'], 6)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.cache import EvaluationCache
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def test_get_put(self):
+
+        cache = EvaluationCache(':memory:')
+        found, missing = cache.get([1, 2, 3], 'predictive_accuracy')
+        self.assertEqual(found, dict())
+        self.assertEqual(missing, [1, 2, 3])
+
+        # run 3 does not have the measure
+        cache.put([1, 2, 3], 'predictive_accuracy', {1: 0.5, 2: 0.75})
+        found, missing = cache.get([1, 2, 3, 4], 'predictive_accuracy')
+        self.assertEqual(found, {1: 0.5, 2: 0.75, 3: None})
+        self.assertEqual(missing, [4])
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 4)
+
+        # entries are separated by measure
+        found, missing = cache.get([1], 'kappa')
+        self.assertEqual(missing, [1])
+
+    def test_ttl(self):
+
+        cache = EvaluationCache(':memory:', ttl=0.05)
+        cache.put([1], 'kappa', {1: 0.3})
+        self.assertEqual(cache.get([1], 'kappa')[0], {1: 0.3})
+        time.sleep(0.1)
+        self.assertEqual(cache.get([1], 'kappa')[1], [1])
+        self.assertEqual(len(cache), 0)
+
+    def test_negative_ttl(self):
+
+        cache = EvaluationCache(':memory:', negative_ttl=0.05)
+        cache.put([1, 2], 'kappa', {1: 0.3})
+        self.assertEqual(cache.get([1, 2], 'kappa')[0], {1: 0.3, 2: None})
+        # the run without a value is requested again
+        time.sleep(0.1)
+        self.assertEqual(cache.get([1, 2], 'kappa'), ({1: 0.3}, [2]))
+
+        cache = EvaluationCache(':memory:', negative_ttl=0)
+        cache.put([1, 2], 'kappa', {1: 0.3})
+        self.assertEqual(len(cache), 1)
+
+    def test_lru_eviction(self):
+
+        cache = EvaluationCache(':memory:', max_size=2)
+        cache.put([1], 'kappa', {1: 0.1})
+        time.sleep(0.01)
+        cache.put([2], 'kappa', {2: 0.2})
+        time.sleep(0.01)
+        # run 1 is now the most recently used
+        cache.get([1], 'kappa')
+        time.sleep(0.01)
+        cache.put([3], 'kappa', {3: 0.3})
+        self.assertEqual(len(cache), 2)
+        found, missing = cache.get([1, 2, 3], 'kappa')
+        self.assertEqual(missing, [2])
+
+    def test_persistence(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'evaluations.sqlite')
+            cache = EvaluationCache(path)
+            cache.put([1], 'kappa', {1: 0.1})
+            cache.close()
+            cache = EvaluationCache(path)
+            self.assertEqual(cache.get([1], 'kappa')[0], {1: 0.1})
+            cache.close()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+import unittest
+
+from src.backend import ReplayBackend, get_backend, set_backend
+from src.cli import add_openml_arguments, configure_openml
+from src.evaluations import get_cache, set_cache
+from src.executor import get_executor, set_executor
+from src.flow_catalog import get_flow_catalog, set_flow_catalog
+from src.task_metadata import get_metadata_cache, set_metadata_cache
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.parser = argparse.ArgumentParser()
+        add_openml_arguments(self.parser)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_executor(None)
+        set_cache(None)
+        set_metadata_cache(None)
+        set_flow_catalog(None)
+        self.directory.cleanup()
+
+    def test_configure_openml(self):
+
+        arguments = self.parser.parse_args([
+            '--backend', 'replay',
+            '--fixtures', self.directory.name,
+            '--workers', '4',
+            '--rate', '2',
+            '--cache', os.path.join(self.directory.name, 'evaluations.sqlite'),
+            '--task_cache', os.path.join(self.directory.name, 'tasks.sqlite'),
+            '--negative_cache_ttl', '0',
+            '--flow_catalog', os.path.join(self.directory.name, 'flows.json')
+        ])
+        configure_openml(arguments)
+
+        self.assertIsInstance(get_backend(), ReplayBackend)
+        self.assertEqual(get_executor().max_workers, 4)
+        self.assertEqual(get_cache().negative_ttl, 0)
+        self.assertEqual(get_metadata_cache().negative_ttl, 0)
+        self.assertEqual(
+            get_flow_catalog().path,
+            os.path.join(self.directory.name, 'flows.json')
+        )
+
+    def test_disabled_caches(self):
+
+        configure_openml(
+            self.parser.parse_args(['--cache', '', '--task_cache', '', '--flow_catalog', ''])
+        )
+
+        self.assertIsNone(get_cache())
+        self.assertIsNone(get_metadata_cache())
+        self.assertIsNone(get_flow_catalog().path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+
+import pandas
+
+from src.backend import set_backend
+from src.driver import load_config, run
+from src.flow_catalog import set_flow_catalog
+from src.operations import get_tasks_by_minima_region
+from src.result_extractor import ResultExtractor
+from src.synthetic import SyntheticBackend
+from src.util import (
+    aggregate_results_for_flow,
+    get_flow_ids,
+    get_tasks_missing_values,
+    tasks_contained_in_openml_cc18
+)
+
+
+class _DriverBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=30, n_flows=10, runs_per_cell=3, density=0.7)
+        self.listed_runs = 0
+
+    def list_runs(self, offset=None, size=None, **restrictions):
+
+        self.listed_runs += 1
+
+        return super().list_runs(offset, size, **restrictions)
+
+
+class TestDriver(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = _DriverBackend()
+        set_backend(self.backend)
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, 'config.json')
+        with open(self.config_path, 'w') as file:
+            file.write(
+                '{"path": "%s", "task_restrictions": {}, "threshold": 0.1, '
+                '"groups": {"A": ["synthetic.flow0_1", "synthetic.flow0_2"], '
+                '"B": ["synthetic.flow1"]}}'
+                % os.path.join(self.directory.name, 'output')
+            )
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def _single_algorithm(self, algorithm, flow_qualifiers, task_restrictions):
+        """The results of one algorithm as computed by benchmark.py."""
+        flow_ids = get_flow_ids(*flow_qualifiers)
+        results = ResultExtractor(*flow_ids, **task_restrictions).results
+        random_results = get_tasks_by_minima_region(
+            results,
+            flow_ids,
+            task_restrictions=dict(task_restrictions),
+            threshold=0.1,
+            detailed='Yes'
+        )
+        aggregated_results = aggregate_results_for_flow(random_results, algorithm)
+        task_ids = aggregated_results.index.values
+        undesired_tasks = get_tasks_missing_values(task_ids).union(
+            tasks_contained_in_openml_cc18(task_ids)
+        )
+
+        return aggregated_results.drop(undesired_tasks)
+
+    def test_load_config(self):
+
+        config = load_config(self.config_path)
+        self.assertEqual(list(config['groups']), ['A', 'B'])
+        self.assertEqual(config['threshold'], 0.1)
+
+    def test_run(self):
+
+        config = load_config(self.config_path)
+        csv_paths = run(config, processes=2)
+        # a single combined listing of the runs and
+        # one of the runs using RandomSearch
+        self.assertEqual(self.backend.listed_runs, 2)
+        self._check_results(config, csv_paths)
+
+    def test_run_min_task_flow(self):
+
+        # the minimum number of runs applies to the
+        # flows of every algorithm on their own
+        config = load_config(self.config_path)
+        config['task_restrictions'] = {'min_task_flow': 0}
+        self._check_results(config, run(config, processes=2))
+
+    def _check_results(self, config, csv_paths):
+
+        for algorithm, flow_qualifiers in config['groups'].items():
+            self.assertTrue(os.path.exists(csv_paths[algorithm]))
+            written_results = pandas.read_csv(csv_paths[algorithm], index_col=0)
+            expected_results = self._single_algorithm(
+                algorithm,
+                flow_qualifiers,
+                config['task_restrictions']
+            )
+            self.assertGreater(len(written_results.index), 0)
+            self.assertEqual(
+                sorted(written_results.index.tolist()),
+                sorted(expected_results.index.tolist())
+            )
+            self.assertTrue(
+                (
+                    written_results[algorithm].sort_index() -
+                    expected_results[algorithm].sort_index()
+                ).abs().max() < 1e-9
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+import pandas
+
+from src.engine import (
+    cell_best,
+    cell_count,
+    cell_count_at_most,
+    cell_keys,
+    cell_mean,
+    cell_sort,
+    evaluation_values,
+    frame_from_cells,
+    lookup_cells
+)
+from src.run_index import RunIndex
+
+
+class TestEngine(unittest.TestCase):
+
+    def setUp(self):
+
+        # cells: (1, 10) -> runs 1, 2
+        #        (1, 11) -> run 3
+        #        (2, 10) -> runs 4, 5, 6
+        self.run_index = RunIndex(
+            [1, 1, 1, 2, 2, 2],
+            [10, 10, 11, 10, 10, 10],
+            [1, 2, 3, 4, 5, 6]
+        )
+        self.values = evaluation_values(
+            self.run_index.run_ids,
+            {1: 0.5, 2: 0.7, 4: 0.2, 5: 0.4, 6: 0.9}
+        )
+
+    def test_evaluation_values(self):
+
+        np.testing.assert_array_equal(
+            self.values,
+            [0.5, 0.7, np.nan, 0.2, 0.4, 0.9]
+        )
+
+    def test_reductions(self):
+
+        np.testing.assert_array_equal(
+            cell_count(self.run_index, self.values),
+            [2, 0, 3]
+        )
+        np.testing.assert_allclose(
+            cell_mean(self.run_index, self.values),
+            [0.6, np.nan, 0.5]
+        )
+        np.testing.assert_array_equal(
+            cell_best(self.run_index, self.values),
+            [0.7, -1, 0.9]
+        )
+        np.testing.assert_array_equal(
+            cell_best(self.run_index, self.values, 'decreasing'),
+            [-1, -1, -1]
+        )
+
+    def test_cell_count_at_most(self):
+
+        sorted_values = cell_sort(self.run_index, self.values)
+        np.testing.assert_array_equal(
+            sorted_values,
+            [0.5, 0.7, np.nan, 0.2, 0.4, 0.9]
+        )
+        np.testing.assert_array_equal(
+            cell_count_at_most(self.run_index, sorted_values, [0.1, 0.4, 0.5, 1.0]),
+            [[0, 0, 1, 2], [0, 0, 0, 0], [0, 2, 2, 3]]
+        )
+
+    def test_lookup_cells(self):
+
+        keys = cell_keys(
+            self.run_index.cell_task_ids,
+            self.run_index.cell_flow_ids
+        )
+        np.testing.assert_array_equal(
+            lookup_cells(
+                keys,
+                np.array([1.0, 2.0, 3.0]),
+                cell_keys([2, 3, 1], [10, 10, 11])
+            ),
+            [3.0, np.nan, 2.0]
+        )
+
+    def test_frame_from_cells(self):
+
+        df = frame_from_cells(
+            self.run_index.cell_task_ids,
+            self.run_index.cell_flow_ids,
+            [1.0, 2.0, 3.0],
+            pandas.Index([2, 1]),
+            pandas.Index([11, 10])
+        )
+        expected = pandas.DataFrame.from_dict(
+            {2: {10: 3.0}, 1: {11: 2.0, 10: 1.0}},
+            orient='index'
+        )
+        self.assertTrue(df.equals(expected))
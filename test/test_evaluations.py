@@ -0,0 +1,80 @@
+import unittest
+from collections import defaultdict
+
+import pandas
+
+from src.backend import set_backend
+from src.cache import EvaluationCache
+from src.evaluations import (
+    get_cache,
+    get_evaluations,
+    get_run_ids,
+    set_cache
+)
+from src.synthetic import SyntheticBackend
+
+
+class _EvaluationBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=5, n_flows=1)
+        self.nr_calls = 0
+
+    def list_evaluations(self, function, runs):
+
+        self.nr_calls += 1
+        # every run has the measure, except
+        # the runs with an id divisible by 7
+        return {
+            run_id: run_id / 100
+            for run_id in runs
+            if run_id % 7 != 0
+        }
+
+
+class TestEvaluations(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = _EvaluationBackend()
+        set_backend(self.backend)
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def test_get_run_ids(self):
+
+        matrix = defaultdict(lambda: dict())
+        matrix[1][10] = {1, 2}
+        matrix[2][10] = {3}
+        matrix[2][11] = {4, 5}
+        df = pandas.DataFrame.from_dict(matrix, orient='index')
+        self.assertEqual(get_run_ids(df), {1, 2, 3, 4, 5})
+
+    def test_get_evaluations_batched(self):
+
+        evaluations = get_evaluations(
+            range(1, 26),
+            'predictive_accuracy',
+            batch_size=10
+        )
+
+        # 25 runs in batches of 10
+        self.assertEqual(self.backend.nr_calls, 3)
+        self.assertEqual(len(evaluations), 25 - 3)
+        self.assertNotIn(7, evaluations)
+        self.assertEqual(evaluations[12], 0.12)
+
+    def test_get_evaluations_cached(self):
+
+        set_cache(EvaluationCache(':memory:'))
+        try:
+            first = get_evaluations(range(1, 26), 'kappa')
+            second = get_evaluations(range(1, 26), 'kappa')
+            self.assertEqual(self.backend.nr_calls, 1)
+            self.assertEqual(first, second)
+            self.assertEqual(get_cache().hits, 25)
+        finally:
+            set_cache(None)
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from openml.exceptions import OpenMLServerError, OpenMLServerException
+
+from src.executor import OpenMLExecutor, TokenBucket
+
+
+class TestExecutor(unittest.TestCase):
+
+    def test_map_order(self):
+
+        def square(x):
+            # finish in a different order
+            time.sleep(0.001 * (10 - x))
+            return x * x
+
+        serial = OpenMLExecutor().map(square, range(10))
+        concurrent = OpenMLExecutor(max_workers=4).map(square, range(10))
+        self.assertEqual(serial, [x * x for x in range(10)])
+        self.assertEqual(serial, concurrent)
+
+    def test_max_in_flight(self):
+
+        lock = threading.Lock()
+        in_flight = [0]
+        max_in_flight = [0]
+
+        def call(x):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return x
+
+        OpenMLExecutor(max_workers=8, max_in_flight=3).map(call, range(20))
+        self.assertLessEqual(max_in_flight[0], 3)
+
+    def test_retry(self):
+
+        attempts = []
+
+        def flaky(x):
+            attempts.append(x)
+            if len(attempts) < 3:
+                raise OpenMLServerError('Temporary failure')
+            return x
+
+        executor = OpenMLExecutor(retries=3, backoff=0.001)
+        self.assertEqual(executor.map(flaky, [1]), [1])
+        self.assertEqual(len(attempts), 3)
+
+        # answers of the server are not retried
+        attempts.clear()
+
+        def deactivated(x):
+            attempts.append(x)
+            raise OpenMLServerException('Dataset deactivated', code=111)
+
+        with self.assertRaises(OpenMLServerException):
+            executor.map(deactivated, [1])
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(
+            executor.map(deactivated, [1, 2], ignore=(OpenMLServerError,)),
+            [None, None]
+        )
+
+    def test_token_bucket(self):
+
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # the first token is available immediately
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
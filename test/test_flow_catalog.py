@@ -0,0 +1,234 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.backend import MemoizedBackend, set_backend
+from src.flow_catalog import (
+    FlowCatalog,
+    get_flow_catalog,
+    parse_qualifier,
+    set_flow_catalog
+)
+from src.synthetic import SyntheticBackend
+from src.util import get_flow_ids
+
+
+class _FlowBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=5, n_flows=1)
+        self.flows = dict()
+        self.nr_calls = 0
+        # time in seconds that a listing takes
+        self.delay = 0
+        for name, versions in (
+            ('mlr.classif.ranger', 16),
+            ('mlr.classif.rpart', 3),
+            ('mlr.regr.ranger', 2),
+            ('weka.J48', 4)
+        ):
+            for version in range(1, versions + 1):
+                self.add(name, version)
+
+    def add(self, name, version):
+
+        flow_id = max(self.flows, default=0) + 1
+        self.flows[flow_id] = {
+            'id': flow_id,
+            'name': name,
+            'version': str(version)
+        }
+
+        return flow_id
+
+    def list_flows(self, offset=None, size=None):
+
+        self.nr_calls += 1
+        time.sleep(self.delay)
+        flow_ids = sorted(self.flows)[offset:offset + size]
+
+        return {flow_id: self.flows[flow_id] for flow_id in flow_ids}
+
+
+class TestFlowCatalog(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = _FlowBackend()
+        set_backend(self.backend)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def _flow_ids(self, name, *versions):
+
+        return {
+            flow_id
+            for flow_id, flow in self.backend.flows.items()
+            if flow['name'] == name and
+            (len(versions) == 0 or int(flow['version']) in versions)
+        }
+
+    def test_parse_qualifier(self):
+
+        self.assertEqual(parse_qualifier('mlr.classif.ranger_8'), ('mlr.classif.ranger', '8'))
+        self.assertEqual(parse_qualifier('mlr.classif.ranger'), ('mlr.classif.ranger', None))
+        self.assertEqual(parse_qualifier('weka.J48'), ('weka.J48', None))
+        self.assertEqual(parse_qualifier('mlr.classif.ranger_*'), ('mlr.classif.ranger', '*'))
+        self.assertEqual(parse_qualifier('mlr.classif.ranger_pow'), ('mlr.classif.ranger_pow', None))
+
+    def test_resolve(self):
+
+        catalog = FlowCatalog()
+        catalog.refresh(page_size=4)
+        self.assertEqual(len(catalog), len(self.backend.flows))
+
+        self.assertEqual(
+            catalog.resolve('mlr.classif.ranger_14'),
+            self._flow_ids('mlr.classif.ranger', 14)
+        )
+        self.assertEqual(
+            catalog.resolve('weka.J48'),
+            self._flow_ids('weka.J48')
+        )
+        self.assertEqual(catalog.resolve('mlr.classif.ranger_17'), set())
+        self.assertEqual(catalog.resolve('unknown'), set())
+        self.assertEqual(
+            catalog.resolve_all('mlr.classif.rpart_1', 'weka.J48_2'),
+            self._flow_ids('mlr.classif.rpart', 1) | self._flow_ids('weka.J48', 2)
+        )
+
+    def test_resolve_glob(self):
+
+        catalog = FlowCatalog()
+        catalog.refresh()
+
+        self.assertEqual(
+            catalog.resolve('mlr.classif.*'),
+            self._flow_ids('mlr.classif.ranger') | self._flow_ids('mlr.classif.rpart')
+        )
+        self.assertEqual(
+            catalog.resolve('mlr.*.ranger_2'),
+            self._flow_ids('mlr.classif.ranger', 2) | self._flow_ids('mlr.regr.ranger', 2)
+        )
+        self.assertEqual(catalog.resolve('sklearn.*'), set())
+
+    def test_resolve_version_glob(self):
+
+        catalog = FlowCatalog()
+        catalog.refresh()
+
+        # all the versions of the flow
+        self.assertEqual(
+            catalog.resolve('mlr.classif.ranger_*'),
+            self._flow_ids('mlr.classif.ranger')
+        )
+        self.assertEqual(len(catalog.resolve('mlr.classif.ranger_*')), 16)
+        self.assertEqual(
+            catalog.resolve('mlr.classif.ranger_1*'),
+            self._flow_ids('mlr.classif.ranger', 1, *range(10, 17))
+        )
+        self.assertEqual(
+            catalog.resolve('mlr.*.ranger_[12]'),
+            self._flow_ids('mlr.classif.ranger', 1, 2) | self._flow_ids('mlr.regr.ranger')
+        )
+        self.assertEqual(catalog.resolve('weka.J48_?'), self._flow_ids('weka.J48'))
+
+    def test_incremental_refresh(self):
+
+        catalog = FlowCatalog()
+        catalog.refresh(page_size=5)
+        nr_calls = self.backend.nr_calls
+
+        flow_id = self.backend.add('mlr.classif.ranger', 17)
+        self.assertEqual(catalog.refresh(page_size=5), 1)
+        # only the page after the listed flows
+        self.assertEqual(self.backend.nr_calls, nr_calls + 1)
+        self.assertEqual(catalog.resolve('mlr.classif.ranger_17'), {flow_id})
+
+    def test_refresh_after_deletions(self):
+
+        catalog = FlowCatalog()
+        catalog.refresh(page_size=5)
+
+        # the listing shifts by the deleted flows
+        del self.backend.flows[3]
+        del self.backend.flows[20]
+        flow_id = self.backend.add('mlr.classif.ranger', 17)
+        self.backend.add('mlr.classif.ranger', 18)
+        catalog.refresh(page_size=5)
+
+        self.assertEqual(catalog.flow_ids(), set(self.backend.flows))
+        self.assertEqual(catalog.listed_flows, len(self.backend.flows))
+        self.assertEqual(catalog.resolve('mlr.classif.ranger_17'), {flow_id})
+
+        # without deletions only the new flows are listed
+        nr_calls = self.backend.nr_calls
+        self.backend.add('mlr.classif.ranger', 19)
+        self.assertEqual(catalog.refresh(page_size=5), 1)
+        self.assertEqual(self.backend.nr_calls, nr_calls + 1)
+
+    def test_concurrent_refresh(self):
+
+        self.backend.delay = 0.05
+        set_backend(MemoizedBackend(self.backend, methods=('list_flows',)))
+        set_flow_catalog(FlowCatalog())
+        barrier = threading.Barrier(4)
+        flow_ids = list()
+
+        def resolve():
+            barrier.wait()
+            flow_ids.append(get_flow_ids('mlr.classif.*'))
+
+        threads = [threading.Thread(target=resolve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected_flow_ids = self._flow_ids('mlr.classif.ranger') | \
+            self._flow_ids('mlr.classif.rpart')
+        self.assertEqual(flow_ids, [expected_flow_ids] * 4)
+        # the catalog is listed once
+        catalog = get_flow_catalog()
+        self.assertEqual(len(catalog), len(self.backend.flows))
+        self.assertEqual(catalog.listed_flows, len(self.backend.flows))
+
+    def test_persistence(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'flows.json')
+            catalog = FlowCatalog(path)
+            catalog.refresh()
+
+            loaded_catalog = FlowCatalog(path, max_age=3600)
+            self.assertEqual(loaded_catalog.index, catalog.index)
+            self.assertFalse(loaded_catalog.is_stale())
+
+            # without a maximal age it is refreshed
+            # once, but only for the new flows
+            loaded_catalog = FlowCatalog(path)
+            self.assertTrue(loaded_catalog.is_stale())
+            self.assertEqual(loaded_catalog.refresh(), 0)
+
+    def test_get_flow_ids(self):
+
+        self.assertEqual(get_flow_ids(), set())
+        self.assertEqual(
+            get_flow_ids('mlr.classif.ranger_7', 'mlr.classif.ranger_14'),
+            self._flow_ids('mlr.classif.ranger', 7, 14)
+        )
+        nr_calls = self.backend.nr_calls
+        get_flow_ids('weka.J48')
+        # the catalog is listed only once
+        self.assertEqual(self.backend.nr_calls, nr_calls)
+        self.assertFalse(get_flow_catalog().is_stale())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import tempfile
+import unittest
+
+from fake_openml import FakeOpenML
+from src.backend import MemoizedBackend, get_backend, set_backend
+from src.cache import EvaluationCache
+from src.evaluations import set_cache
+from src.executor import OpenMLExecutor, set_executor
+from src.instrumentation import (
+    InstrumentedBackend,
+    get_report,
+    instrumentation,
+    stage
+)
+from src.operations import get_tasks_by_measure
+from src.result_extractor import ResultExtractor
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+
+        self.fake = FakeOpenML(n_tasks=10)
+        set_backend(self.fake)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_cache(None)
+        set_executor(None)
+
+    def test_disabled(self):
+
+        self.assertIsNone(get_report())
+        with stage('nothing'):
+            pass
+        self.assertIs(get_backend(), self.fake)
+
+    def test_report(self):
+
+        with instrumentation() as report:
+            self.assertIsInstance(get_backend(), InstrumentedBackend)
+            result_extractor = ResultExtractor(10, 11, page_size=20)
+            get_tasks_by_measure(result_extractor.results)
+
+        self.assertIs(get_backend(), self.fake)
+        self.assertIsNone(get_report())
+
+        build = report.stages['ResultExtractor.build']
+        self.assertEqual(build.count, 1)
+        self.assertEqual(
+            build.openml_calls['list_runs'],
+            self.fake.calls['list_runs']
+        )
+        self.assertEqual(build.rows, len(result_extractor.run_index))
+        self.assertGreater(build.bytes, 0)
+
+        evaluations = report.stages[
+            'get_tasks_by_measure/get_measure_evaluations'
+        ]
+        self.assertEqual(
+            evaluations.openml_calls['list_evaluations'],
+            self.fake.calls['list_evaluations']
+        )
+        self.assertGreaterEqual(
+            report.stages['get_tasks_by_measure'].wall_time,
+            evaluations.wall_time
+        )
+        self.assertEqual(
+            sum(report.openml_calls.values()),
+            sum(self.fake.calls.values())
+        )
+        self.assertIn('ResultExtractor.build', report.summary())
+
+    def test_cache_and_threads(self):
+
+        with tempfile.TemporaryDirectory() as path:
+            cache = EvaluationCache(path + '/evaluations.sqlite')
+            set_cache(cache)
+            set_executor(OpenMLExecutor(max_workers=4))
+            data_frame = ResultExtractor(10, 11, 12).results
+
+            with instrumentation() as report:
+                get_tasks_by_measure(data_frame)
+                get_tasks_by_measure(data_frame)
+            cache.close()
+
+        evaluations = report.stages[
+            'get_tasks_by_measure/get_measure_evaluations'
+        ]
+        self.assertEqual(evaluations.count, 2)
+        self.assertEqual(evaluations.cache_misses, evaluations.cache_hits)
+        # calls of the pool threads are counted for the stage
+        self.assertEqual(
+            evaluations.openml_calls['list_evaluations'],
+            self.fake.calls['list_evaluations']
+        )
+        self.assertNotIn('unstaged', report.stages)
+
+    def test_spans(self):
+
+        spans = list()
+        with instrumentation() as report:
+            report.span_callback = spans.append
+            ResultExtractor(10)
+            ResultExtractor(11)
+
+        self.assertEqual(
+            [span['name'] for span in spans],
+            ['ResultExtractor.build', 'ResultExtractor.build']
+        )
+        self.assertEqual(
+            sum(span['attributes']['rows'] for span in spans),
+            report.stages['ResultExtractor.build'].rows
+        )
+        for span in spans:
+            self.assertLessEqual(span['start_time'], span['end_time'])
+
+    def test_memoized_backend(self):
+
+        memoized_backend = MemoizedBackend(self.fake, methods=('list_runs',))
+        set_backend(memoized_backend)
+        with instrumentation() as report:
+            self.assertIs(get_backend(), memoized_backend)
+            ResultExtractor(10, 11, page_size=20)
+            ResultExtractor(10, 11, page_size=20)
+
+        # only the calls that are not served
+        # from the cache are counted
+        self.assertEqual(
+            report.openml_calls['list_runs'],
+            self.fake.calls['list_runs']
+        )
+        self.assertEqual(
+            memoized_backend.stats()['hits'],
+            self.fake.calls['list_runs']
+        )
+        self.assertIs(memoized_backend.backend, self.fake)
+
+
+if __name__ == '__main__':
+    unittest.main()
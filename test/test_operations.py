@@ -1,13 +1,18 @@
 import unittest
+import warnings
 
 from collections import defaultdict
 
+import numpy as np
 import pandas
 
+from fake_openml import FakeOpenML
+from src.backend import set_backend
 from src.result_extractor import ResultExtractor
-from src.util import get_flow_ids
 from src.operations import (
+    get_evaluation_report,
     get_tasks_by_minima_region,
+    get_tasks_by_minima_region_sweep,
     get_tasks_by_best_score,
     get_tasks_by_measure
 )
@@ -17,23 +22,55 @@ class TestOperations(unittest.TestCase):
 
     def setUp(self):
 
-        self.flow_ids = get_flow_ids('mlr.classif.xgboost_5')
+        self.fake_openml = FakeOpenML(n_tasks=12, seed=2)
+        set_backend(self.fake_openml)
+        self.flow_ids = {10, 11, 12}
         self.results = ResultExtractor(*self.flow_ids).results
+        # measure values of the runs of every
+        # task and flow combination
+        self.values = defaultdict(list)
+        self.random_values = defaultdict(list)
+        for task_id, flow_id, uploader, evaluations in self.fake_openml.runs.values():
+            value = evaluations.get('predictive_accuracy', np.nan)
+            self.values[(task_id, flow_id)].append(value)
+            if uploader == 903:
+                self.random_values[(task_id, flow_id)].append(value)
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def _frame(self, matrix):
+
+        return pandas.DataFrame.from_dict(matrix, orient='index').reindex(
+            index=self.results.index,
+            columns=self.results.columns
+        )
+
+    def _best_value(self, cell):
+
+        # the search starts from -1
+        return max([-1] + [value for value in self.values[cell] if not np.isnan(value)])
 
     def test_get_tasks_by_minima_region(self):
 
         random_results = get_tasks_by_minima_region(
             self.results,
-            self.flow_ids
+            self.flow_ids,
+            threshold=0.1
         )
         matrix = defaultdict(lambda: dict())
-        matrix[272][5963] = 1.0
-        matrix[282][5963] = 0.75
-        df = pandas.DataFrame.from_dict(
-            matrix,
-            orient='index'
+        for (task_id, flow_id), values in self.random_values.items():
+            best_value = self._best_value((task_id, flow_id))
+            matrix[task_id][flow_id] = np.mean(
+                [abs(value - best_value) <= 0.1 for value in values]
+            )
+        df = pandas.DataFrame.from_dict(matrix, orient='index').reindex(
+            index=random_results.index,
+            columns=random_results.columns
         )
-        self.assertTrue(df.equals(random_results))
+        self.assertEqual(set(random_results.index), set(matrix))
+        np.testing.assert_allclose(random_results.values, df.values)
 
     def test_get_tasks_by_best_score(self):
 
@@ -41,16 +78,9 @@ class TestOperations(unittest.TestCase):
             self.results
         )
         matrix = defaultdict(lambda: dict())
-        matrix[272][5963] = 0.730
-        matrix[282][5963] = 0.831461
-        matrix[3917][5963] = 0.864391
-        matrix[9983][5963] = 0.710881
-        matrix[34536][5963] = 0.977127
-        df = pandas.DataFrame.from_dict(
-            matrix,
-            orient='index'
-        )
-        self.assertTrue(df.equals(best_results))
+        for task_id, flow_id in self.values:
+            matrix[task_id][flow_id] = self._best_value((task_id, flow_id))
+        np.testing.assert_allclose(best_results.values, self._frame(matrix).values)
 
     def test_get_tasks_by_measure(self):
 
@@ -58,15 +88,168 @@ class TestOperations(unittest.TestCase):
             self.results
         )
         matrix = defaultdict(lambda: dict())
-        matrix[272][5963] = 0.730000
-        matrix[282][5963] = 0.735955
-        matrix[3917][5963] = 0.853016
-        matrix[9983][5963] = 0.604286
-        matrix[34536][5963] = 0.914947
-        df = pandas.DataFrame.from_dict(
-            matrix,
-            orient='index'
+        for (task_id, flow_id), values in self.values.items():
+            values = [value for value in values if not np.isnan(value)]
+            matrix[task_id][flow_id] = np.mean(values) if len(values) > 0 else np.nan
+        np.testing.assert_allclose(averaged_results.values, self._frame(matrix).values)
+
+
+class TestEvaluationReport(unittest.TestCase):
+
+    def test_get_evaluation_report(self):
+
+        fake_openml = FakeOpenML(n_tasks=8)
+        with fake_openml.patch():
+            results = ResultExtractor(10, 11, 12).results
+            report = get_evaluation_report(
+                results,
+                measures=['predictive_accuracy', 'kappa'],
+                aggregations=['mean', 'best', 'count', 0.5, 0, 1]
+            )
+            averaged_results = get_tasks_by_measure(results, 'kappa')
+            best_results = get_tasks_by_best_score(results, measure='kappa')
+
+        # the columns are sorted for the lookups
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', pandas.errors.PerformanceWarning)
+            self.assertEqual(report.columns.nlevels, 3)
+            self.assertEqual(report.index.tolist(), results.index.tolist())
+            np.testing.assert_allclose(
+                report['kappa', 'mean'].values,
+                averaged_results.reindex(
+                    index=report.index,
+                    columns=report['kappa', 'mean'].columns
+                ).values
+            )
+            # the quantiles 0 and 1 are the minimum and the maximum
+            self.assertTrue(
+                (report['kappa', 0].fillna(0) <= report['kappa', 1].fillna(0)).all().all()
+            )
+            np.testing.assert_allclose(
+                report['kappa', 'best'].values,
+                best_results.reindex(
+                    index=report.index,
+                    columns=report['kappa', 'best'].columns
+                ).values
+            )
+            self.assertEqual(
+                report['kappa', 'count'].sum().sum(),
+                len(fake_openml.runs)
+            )
+
+
+class TestMinimaRegionSweep(unittest.TestCase):
+
+    def test_get_tasks_by_minima_region_sweep(self):
+
+        thresholds = [0, 0.01, 0.1, 0.5, 1]
+        fake_openml = FakeOpenML(n_tasks=12)
+        with fake_openml.patch():
+            results = ResultExtractor(10, 11, 12).results
+            calls = sum(fake_openml.calls.values())
+            cube = get_tasks_by_minima_region_sweep(
+                results,
+                {10, 11, 12},
+                thresholds
+            )
+            # one fetch for all the thresholds
+            sweep_calls = sum(fake_openml.calls.values()) - calls
+
+            for threshold in thresholds:
+                calls = sum(fake_openml.calls.values())
+                region_results = get_tasks_by_minima_region(
+                    results,
+                    {10, 11, 12},
+                    threshold=threshold
+                )
+                self.assertEqual(
+                    sum(fake_openml.calls.values()) - calls,
+                    sweep_calls
+                )
+                self.assertTrue(cube[threshold].equals(region_results))
+                self.assertEqual(
+                    cube[threshold].index.tolist(),
+                    region_results.index.tolist()
+                )
+
+        self.assertEqual(cube.columns.levels[0].tolist(), thresholds)
+
+
+class TestSparseResults(unittest.TestCase):
+
+    def assertSameCells(self, sparse_results, dense_results):
+
+        dense_results = dense_results.astype(float)
+        self.assertEqual(
+            len(sparse_results.index),
+            dense_results.notna().sum().sum()
+        )
+        np.testing.assert_allclose(
+            sparse_results.unstack().reindex(
+                index=dense_results.index,
+                columns=dense_results.columns
+            ).values.astype(float),
+            dense_results.values
         )
-        # Somehow the DataFrames are equal
-        # but it is failing
-        # self.assertTrue(df.equals(averaged_results))
+
+    def test_sparse_results(self):
+
+        fake_openml = FakeOpenML(n_tasks=12)
+        with fake_openml.patch():
+            result_extractor = ResultExtractor(10, 11, 12)
+            results = result_extractor.results
+            run_index = result_extractor.results_index
+
+            self.assertSameCells(
+                get_tasks_by_measure(run_index, 'kappa', sparse=True),
+                get_tasks_by_measure(results, 'kappa')
+            )
+            self.assertSameCells(
+                get_tasks_by_best_score(run_index, sparse=True),
+                get_tasks_by_best_score(results)
+            )
+            self.assertSameCells(
+                get_tasks_by_minima_region(
+                    run_index,
+                    {10, 11, 12},
+                    threshold=0.1,
+                    sparse=True
+                ),
+                get_tasks_by_minima_region(results, {10, 11, 12}, threshold=0.1)
+            )
+            sparse_cube = get_tasks_by_minima_region_sweep(
+                run_index,
+                {10, 11, 12},
+                [0.01, 0.1],
+                sparse=True
+            )
+            cube = get_tasks_by_minima_region_sweep(results, {10, 11, 12}, [0.01, 0.1])
+            for threshold in [0.01, 0.1]:
+                self.assertSameCells(sparse_cube[threshold], cube[threshold])
+            sparse_report = get_evaluation_report(
+                run_index,
+                measures=['kappa'],
+                aggregations=['mean', 'count'],
+                sparse=True
+            )
+            report = get_evaluation_report(
+                results,
+                measures=['kappa'],
+                aggregations=['mean', 'count']
+            )
+            for key in [('kappa', 'mean'), ('kappa', 'count')]:
+                self.assertSameCells(sparse_report[key], report[key])
+
+            # dense results are only built on request
+            averaged_results = get_tasks_by_measure(run_index, 'kappa')
+            self.assertTrue(
+                averaged_results.sort_index().equals(
+                    get_tasks_by_measure(results, 'kappa').sort_index()
+                )
+            )
+
+        sparse_runs = result_extractor.sparse_results
+        self.assertEqual(sparse_runs.index.names, ['task_id', 'flow_id'])
+        self.assertEqual(len(sparse_runs), results.notna().sum().sum())
+        for (task_id, flow_id), run_ids in sparse_runs.items():
+            self.assertEqual(run_ids, results.at[task_id, flow_id])
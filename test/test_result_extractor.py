@@ -1,49 +1,390 @@
+import tempfile
 import unittest
+from collections import Counter
+from unittest.mock import patch
 
+import numpy as np
+
+from fake_openml import FakeOpenML
+from src.backend import get_backend, set_backend
+from src.flow_catalog import set_flow_catalog
+from src.operations import get_tasks_by_best_score, update_results
 from src.result_extractor import ResultExtractor
+from src.synthetic import SyntheticBackend
 from src.util import get_flow_ids
 
 
-# In case a unit test fails,
-# check that the number of tasks
-# for the filters has not changed.
 class TestResultExtractor(unittest.TestCase):
 
+    def setUp(self):
+
+        self.fake_openml = FakeOpenML(n_tasks=30, seed=1)
+        set_backend(self.fake_openml)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def _tasks(self, select=lambda task_id, flow_id, uploader: True):
+        """Tasks that have at least one run
+        selected by the given function."""
+        return {
+            task_id
+            for task_id, flow_id, uploader, _ in self.fake_openml.runs.values()
+            if select(task_id, flow_id, uploader)
+        }
+
     def test_flow_identifiers(self):
 
-        flow_identifier = 'weka.RandomForest_5'
-        flow_ids = get_flow_ids(flow_identifier)
+        set_backend(SyntheticBackend(n_tasks=30, n_flows=10, density=0.5))
+        flow_ids = get_flow_ids('synthetic.flow1_5')
+        self.assertEqual(flow_ids, {10})
         df = ResultExtractor(*flow_ids).results
-        self.assertEqual(len(df.index), 1199)
+        self.assertEqual(df.columns.tolist(), [10])
+        self.assertEqual(
+            set(df.index),
+            set(get_backend().run_tasks[get_backend().run_flows == 10].tolist())
+        )
 
     def test_task_filter_task_type(self):
 
         # filtering by type of task
         # 3 corresponds to learning curve
         df = ResultExtractor(task_type=3).results
-        self.assertEqual(len(df.index), 252)
+        self.assertEqual(
+            set(df.index),
+            self._tasks(lambda task_id, flow_id, uploader: task_id % 3 + 1 == 3)
+        )
 
     def test_task_filter_uploader(self):
 
         # filtering by uploader
-        df = ResultExtractor(uploader=[86]).results
-        self.assertEqual(len(df.index), 104)
+        df = ResultExtractor(uploader=[903]).results
+        self.assertEqual(
+            set(df.index),
+            self._tasks(lambda task_id, flow_id, uploader: uploader == 903)
+        )
 
     def test_task_filter_tag(self):
 
         # filtering by tag
         df = ResultExtractor(tag='weka').results
-        self.assertEqual(len(df.index), 1632)
+        self.assertEqual(df.columns.tolist(), [10])
+        self.assertEqual(
+            set(df.index),
+            self._tasks(lambda task_id, flow_id, uploader: flow_id == 10)
+        )
 
     def test_task_filter_combined(self):
 
-        flow_identifier = 'weka.RandomForest_5'
         task_type = 1
-        min_task_flow = 5
-        flow_ids = get_flow_ids(flow_identifier)
+        min_task_flow = 2
         df = ResultExtractor(
-            *flow_ids,
+            10,
+            11,
             task_type=task_type,
             min_task_flow=min_task_flow
         ).results
-        self.assertEqual(len(df.index), 968)
+        # tasks with more than min_task_flow
+        # runs for every flow
+        nr_runs = Counter(
+            (task_id, flow_id)
+            for task_id, flow_id, _, _ in self.fake_openml.runs.values()
+            if task_id % 3 + 1 == task_type and flow_id in (10, 11)
+        )
+        expected_tasks = {
+            task_id
+            for task_id, _ in nr_runs
+            if all(nr_runs[(task_id, flow_id)] > min_task_flow for flow_id in (10, 11))
+        }
+        self.assertGreater(len(expected_tasks), 0)
+        self.assertEqual(set(df.index), expected_tasks)
+
+
+class TestResultExtractorUpdate(unittest.TestCase):
+
+    def test_update(self):
+
+        fake_openml = FakeOpenML(n_tasks=10, seed=3)
+        all_runs = dict(fake_openml.runs)
+        run_ids = sorted(all_runs)
+        # only the older half of the runs
+        # is available at first
+        fake_openml.runs = {
+            run_id: all_runs[run_id]
+            for run_id in run_ids[:len(run_ids) // 2]
+        }
+
+        with fake_openml.patch():
+            result_extractor = ResultExtractor(10, 11, 12)
+            previous_results = get_tasks_by_best_score(result_extractor.results)
+            fake_openml.runs = all_runs
+            nr_new_runs = result_extractor.update()
+            full_result_extractor = ResultExtractor(10, 11, 12)
+
+            self.assertEqual(nr_new_runs, len(run_ids) - len(run_ids) // 2)
+            self.assertEqual(result_extractor.max_run_id, max(run_ids))
+            self.assertTrue(
+                result_extractor.results.equals(full_result_extractor.results)
+            )
+            new_cells = {
+                (all_runs[run_id][0], all_runs[run_id][1])
+                for run_id in run_ids[len(run_ids) // 2:]
+            }
+            self.assertEqual(result_extractor.dirty_cells, new_cells)
+
+            # only the dirty cells are recomputed
+            results = update_results(
+                previous_results,
+                result_extractor.results,
+                result_extractor.dirty_cells,
+                get_tasks_by_best_score
+            )
+            self.assertTrue(
+                results.equals(
+                    get_tasks_by_best_score(full_result_extractor.results)
+                )
+            )
+
+            # no new runs
+            result_extractor.clear_dirty_cells()
+            self.assertEqual(result_extractor.update(), 0)
+            self.assertEqual(result_extractor.dirty_cells, set())
+
+    def test_update_after_deletions(self):
+
+        fake_openml = FakeOpenML(n_tasks=10, seed=3)
+        all_runs = dict(fake_openml.runs)
+        run_ids = sorted(all_runs)
+
+        with fake_openml.patch():
+            result_extractor = ResultExtractor(10, 11, 12)
+            # more runs than the overlap are deleted
+            # before new runs are uploaded
+            fake_openml.runs = {
+                run_id: all_runs[run_id]
+                for run_id in run_ids[:2]
+            }
+            new_run_id = max(run_ids) + 1
+            fake_openml.runs[new_run_id] = all_runs[run_ids[0]]
+            with patch('src.result_extractor.UPDATE_OVERLAP', 1):
+                self.assertEqual(result_extractor.update(), 1)
+            self.assertEqual(result_extractor.max_run_id, new_run_id)
+
+
+class TestResultExtractorSnapshot(unittest.TestCase):
+
+    def test_save_load(self):
+
+        fake_openml = FakeOpenML(n_tasks=10)
+        with fake_openml.patch():
+            result_extractor = ResultExtractor(
+                10,
+                11,
+                uploader=[903],
+                min_task_flow=0
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            result_extractor.save(directory)
+            loaded_extractor = ResultExtractor.load(directory)
+
+            self.assertEqual(loaded_extractor.flow_ids, (10, 11))
+            self.assertEqual(loaded_extractor.uploader, [903])
+            self.assertEqual(
+                loaded_extractor.max_run_id,
+                result_extractor.max_run_id
+            )
+            self.assertTrue(
+                loaded_extractor.results.equals(result_extractor.results)
+            )
+            self.assertEqual(
+                loaded_extractor.results.index.tolist(),
+                result_extractor.results.index.tolist()
+            )
+            del loaded_extractor
+
+
+class TestResultExtractorResults(unittest.TestCase):
+
+    def test_min_task_flow(self):
+
+        fake_openml = FakeOpenML(n_tasks=15)
+        with fake_openml.patch():
+            result_extractor = ResultExtractor(10, 11, 12, min_task_flow=1)
+            results = result_extractor.results
+            # derived only once
+            self.assertIs(result_extractor.results, results)
+
+            for lower_limit in (None, 0, 1, 2, 6):
+                expected_results = ResultExtractor(
+                    10, 11, 12,
+                    min_task_flow=lower_limit
+                ).results
+                swept_results = result_extractor.get_results(lower_limit)
+                self.assertTrue(swept_results.equals(expected_results))
+                self.assertEqual(
+                    swept_results.index.tolist(),
+                    expected_results.index.tolist()
+                )
+                self.assertEqual(
+                    swept_results.dtypes.tolist(),
+                    expected_results.dtypes.tolist()
+                )
+
+            # new runs drop the derived results
+            fake_openml.runs[max(fake_openml.runs) + 1] = (1, 10, 1, {})
+            result_extractor.update()
+            self.assertIsNot(result_extractor.results, results)
+
+
+class TestResultExtractorSharded(unittest.TestCase):
+
+    def setUp(self):
+
+        set_backend(SyntheticBackend(n_tasks=60, n_flows=12, density=0.5, seed=3))
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def assertSameExtractor(self, result_extractor, sharded_extractor):
+
+        self.assertTrue(result_extractor.results.equals(sharded_extractor.results))
+        self.assertEqual(
+            result_extractor.results.index.tolist(),
+            sharded_extractor.results.index.tolist()
+        )
+        self.assertEqual(
+            result_extractor.results.columns.tolist(),
+            sharded_extractor.results.columns.tolist()
+        )
+        np.testing.assert_array_equal(
+            result_extractor.run_index.run_ids,
+            sharded_extractor.run_index.run_ids
+        )
+        self.assertEqual(result_extractor.listed_runs, sharded_extractor.listed_runs)
+        self.assertEqual(result_extractor.max_run_id, sharded_extractor.max_run_id)
+
+    def test_build_sharded(self):
+
+        flow_ids = list(range(1, 13))
+        result_extractor = ResultExtractor(*flow_ids, page_size=50)
+        self.assertSameExtractor(
+            result_extractor,
+            ResultExtractor.build_sharded(*flow_ids, processes=2, page_size=50)
+        )
+        # more shards than processes
+        self.assertSameExtractor(
+            result_extractor,
+            ResultExtractor.build_sharded(
+                *flow_ids,
+                processes=2,
+                shard_size=3,
+                page_size=50
+            )
+        )
+
+        task_ids = list(range(1, 41))
+        self.assertSameExtractor(
+            ResultExtractor(*flow_ids, task=task_ids, min_task_flow=1),
+            ResultExtractor.build_sharded(
+                *flow_ids,
+                processes=2,
+                shard_by='task',
+                task=task_ids,
+                min_task_flow=1
+            )
+        )
+
+    def test_build_sharded_catalog(self):
+
+        # without flows, the flows of
+        # the catalog are split
+        sharded_extractor = ResultExtractor.build_sharded(processes=2)
+        self.assertEqual(sharded_extractor.flow_ids, ())
+        self.assertSameExtractor(ResultExtractor(), sharded_extractor)
+
+        with self.assertRaises(ValueError):
+            ResultExtractor.build_sharded(processes=2, shard_by='task')
+
+
+class _QueryBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=30, n_flows=10, runs_per_cell=3)
+        self.calls = list()
+
+    def list_runs(self, offset=None, size=None, **restrictions):
+
+        self.calls.append(('list_runs', restrictions))
+
+        return super().list_runs(offset, size, **restrictions)
+
+    def list_tasks(self, task_ids):
+
+        self.calls.append(('list_tasks', task_ids))
+
+        return super().list_tasks(task_ids)
+
+
+class TestResultQuery(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = _QueryBackend()
+        set_backend(self.backend)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def test_lazy(self):
+
+        query = ResultExtractor.query().flows(1, 2).uploader(903).min_runs(2)
+        self.assertEqual(self.backend.calls, [])
+
+        result_extractor = query.collect()
+        expected_extractor = ResultExtractor(1, 2, uploader=[903], min_task_flow=1)
+        self.assertTrue(result_extractor.results.equals(expected_extractor.results))
+        # the restrictions are part of the listing
+        self.assertEqual(self.backend.calls[0][1]['flow'], (1, 2))
+        self.assertEqual(self.backend.calls[0][1]['uploader'], [903])
+
+        # restrictions return new queries
+        self.assertIsNot(query.tag('study_14'), query)
+        self.assertNotIn('tag', query._restrictions)
+
+    def test_flow_qualifiers(self):
+
+        result_extractor = ResultExtractor.query().flows('synthetic.flow0_2', 3).collect()
+        self.assertEqual(
+            set(result_extractor.run_index.flows.tolist()),
+            {2, 3}
+        )
+
+        self.backend.calls = list()
+        result_extractor = ResultExtractor.query().flows('unknown').collect()
+        self.assertEqual(len(result_extractor.run_index), 0)
+        self.assertNotIn('list_runs', [call[0] for call in self.backend.calls])
+
+    def test_where(self):
+
+        # the tasks are filtered before the listing
+        result_extractor = ResultExtractor.query().flows(1).tasks(*range(1, 11)) \
+            .where('NumberOfMissingValues > 0').collect()
+        self.assertEqual(self.backend.calls[0][0], 'list_tasks')
+        self.assertEqual(self.backend.calls[1][1]['task'], [5, 10])
+        self.assertEqual(set(result_extractor.results.index.tolist()), {5, 10})
+
+        # or the listed tasks are filtered afterwards
+        result_extractor = ResultExtractor.query().flows(1) \
+            .where('NumberOfMissingValues > 0').collect()
+        self.assertEqual(
+            set(result_extractor.results.index.tolist()),
+            set(range(5, 31, 5))
+        )
@@ -0,0 +1,55 @@
+import unittest
+from collections import defaultdict
+
+import numpy as np
+import pandas
+
+from src.run_index import RunIndex
+
+
+class TestRunIndex(unittest.TestCase):
+
+    def setUp(self):
+
+        # (run_id, flow_id, task_id) in listing order
+        self.runs = [
+            {'run_id': 1, 'flow_id': 5, 'task_id': 3},
+            {'run_id': 2, 'flow_id': 2, 'task_id': 9},
+            {'run_id': 3, 'flow_id': 5, 'task_id': 1},
+            {'run_id': 4, 'flow_id': 2, 'task_id': 3},
+            {'run_id': 5, 'flow_id': 5, 'task_id': 3},
+        ]
+        self.run_index = RunIndex.from_runs(self.runs)
+
+    def test_cells(self):
+
+        self.assertEqual(len(self.run_index), 5)
+        self.assertEqual(self.run_index.tasks.tolist(), [1, 3, 9])
+        self.assertEqual(self.run_index.flows.tolist(), [2, 5])
+        self.assertEqual(self.run_index.offsets.tolist(), [0, 1, 2, 4, 5])
+        self.assertEqual(self.run_index.run_ids.tolist(), [3, 4, 1, 5, 2])
+        np.testing.assert_array_equal(
+            self.run_index.count_matrix(),
+            [[0, 1], [1, 2], [1, 0]]
+        )
+
+    def test_to_frame(self):
+
+        matrix = defaultdict(lambda: defaultdict(set))
+        for run in self.runs:
+            matrix[run['flow_id']][run['task_id']].add(run['run_id'])
+        df = pandas.DataFrame.from_dict(data=matrix, orient='columns')
+
+        self.assertTrue(df.equals(self.run_index.to_frame()))
+        self.assertEqual(
+            df.index.tolist(),
+            self.run_index.to_frame().index.tolist()
+        )
+        self.assertTrue(df.equals(RunIndex.from_frame(df).to_frame()))
+
+    def test_empty(self):
+
+        run_index = RunIndex.from_runs([])
+        self.assertEqual(len(run_index), 0)
+        self.assertEqual(run_index.count_matrix().shape, (0, 0))
+        self.assertTrue(run_index.to_frame().empty)
@@ -0,0 +1,40 @@
+import unittest
+
+from fake_openml import FakeOpenML
+from src.backend import set_backend
+from src.result_extractor import ResultExtractor
+from src.runs import iter_runs
+
+
+class TestRuns(unittest.TestCase):
+
+    def setUp(self):
+
+        self.fake_openml = FakeOpenML()
+        set_backend(self.fake_openml)
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def test_iter_runs(self):
+
+        listed = list()
+        runs = list(iter_runs(page_size=10, progress=listed.append))
+
+        n_runs = len(self.fake_openml.runs)
+        self.assertEqual(
+            [run['run_id'] for run in runs],
+            sorted(self.fake_openml.runs)
+        )
+        self.assertEqual(
+            self.fake_openml.calls['list_runs'],
+            n_runs // 10 + 1
+        )
+        self.assertEqual(listed[-1], n_runs)
+
+    def test_paged_result_extractor(self):
+
+        df = ResultExtractor(10, 11).results
+        paged_df = ResultExtractor(10, 11, page_size=7).results
+        self.assertTrue(df.equals(paged_df))
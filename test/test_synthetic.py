@@ -0,0 +1,64 @@
+import unittest
+
+from src.backend import set_backend
+from src.result_extractor import ResultExtractor
+from src.synthetic import RANDOM_SEARCH_UPLOADER, SyntheticBackend
+
+
+class TestSyntheticBackend(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = SyntheticBackend(n_tasks=10, n_flows=4, runs_per_cell=3, seed=1)
+        set_backend(self.backend)
+
+    def tearDown(self):
+
+        set_backend(None)
+
+    def test_grid(self):
+
+        runs = self.backend.list_runs()
+        self.assertEqual(len(runs), len(self.backend))
+        self.assertEqual(sorted(runs), list(range(1, len(self.backend) + 1)))
+        for run in runs.values():
+            self.assertIn(run['task_id'], range(1, 11))
+            self.assertIn(run['flow_id'], range(1, 5))
+
+        # the same seed generates the same grid
+        other_backend = SyntheticBackend(n_tasks=10, n_flows=4, runs_per_cell=3, seed=1)
+        self.assertEqual(other_backend.list_runs(), runs)
+
+    def test_restrictions(self):
+
+        runs = self.backend.list_runs(flow=[2], uploader=[RANDOM_SEARCH_UPLOADER])
+        for run in runs.values():
+            self.assertEqual(run['flow_id'], 2)
+            self.assertEqual(run['uploader'], RANDOM_SEARCH_UPLOADER)
+
+        page = self.backend.list_runs(offset=5, size=5, flow=[2])
+        self.assertEqual(
+            list(page),
+            list(self.backend.list_runs(flow=[2]))[5:10]
+        )
+
+    def test_evaluations(self):
+
+        run_ids = list(self.backend.list_runs())
+        evaluations = self.backend.list_evaluations('predictive_accuracy', run_ids)
+        self.assertTrue(set(evaluations).issubset(run_ids))
+        for value in evaluations.values():
+            self.assertTrue(0 <= value <= 1)
+        self.assertEqual(self.backend.list_evaluations('area_under_roc_curve', run_ids), {})
+
+    def test_result_extractor(self):
+
+        result_extractor = ResultExtractor(1, 2, 3, 4)
+        self.assertEqual(
+            int(result_extractor.run_index.counts.sum()),
+            len(self.backend)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.backend import set_backend
+from src.cache import TaskMetadataCache
+from src.synthetic import SyntheticBackend
+from src.task_metadata import (
+    filter_tasks,
+    get_task_qualities,
+    set_metadata_cache
+)
+from src.util import get_tasks_missing_values
+
+
+class _CountingBackend(SyntheticBackend):
+
+    def __init__(self):
+
+        super().__init__(n_tasks=50, n_flows=2, runs_per_cell=1)
+        self.listed_tasks = list()
+
+    def list_tasks(self, task_ids):
+
+        self.listed_tasks.append(list(task_ids))
+
+        return super().list_tasks(task_ids)
+
+
+class _UnknownQualityBackend(SyntheticBackend):
+
+    def get_dataset(self, dataset_id):
+
+        dataset = super().get_dataset(dataset_id)
+        # the number of missing values
+        # of dataset 7 is not known
+        if dataset_id == 7:
+            dataset['qualities']['NumberOfMissingValues'] = float('nan')
+
+        return dataset
+
+
+class TestTaskMetadata(unittest.TestCase):
+
+    def setUp(self):
+
+        self.backend = _CountingBackend()
+        set_backend(self.backend)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_metadata_cache(None)
+
+    def test_get_task_qualities(self):
+
+        qualities = get_task_qualities([3, 1, 2, 60], batch_size=2)
+        # task 60 does not exist
+        self.assertEqual(qualities.index.tolist(), [1, 2, 3])
+        self.assertEqual(qualities['dataset_id'].tolist(), [1, 2, 3])
+        self.assertEqual(qualities['NumberOfInstances'].tolist(), [100, 200, 300])
+        self.assertEqual(self.backend.listed_tasks, [[1, 2], [3, 60]])
+
+    def test_filter_tasks(self):
+
+        task_ids = range(1, 51)
+        self.assertEqual(
+            filter_tasks(task_ids, 'NumberOfClasses == 2 and NumberOfInstances < 1000'),
+            {3, 6, 9}
+        )
+        self.assertEqual(
+            filter_tasks(task_ids, lambda qualities: qualities['NumberOfInstances'] > 4800),
+            {49, 50}
+        )
+        self.assertEqual(filter_tasks([], 'NumberOfClasses == 2'), set())
+        self.assertEqual(
+            get_tasks_missing_values(task_ids),
+            set(range(5, 51, 5))
+        )
+
+    def test_unknown_missing_values(self):
+
+        set_backend(_UnknownQualityBackend(n_tasks=10, n_flows=1))
+        self.assertEqual(get_tasks_missing_values(range(1, 11)), {5, 7, 10})
+
+    def test_cache(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TaskMetadataCache(os.path.join(directory, 'tasks.sqlite'))
+            set_metadata_cache(cache)
+            first_qualities = get_task_qualities([1, 2, 60])
+            second_qualities = get_task_qualities([1, 2, 3, 60])
+            cache.close()
+
+        # only task 3 is listed again, the missing
+        # task 60 is cached as well
+        self.assertEqual(self.backend.listed_tasks, [[1, 2, 60], [3]])
+        self.assertTrue(
+            second_qualities.loc[[1, 2]].equals(first_qualities)
+        )
+        self.assertEqual(cache.hits, 3)
+
+    def test_cache_negative_ttl(self):
+
+        set_metadata_cache(TaskMetadataCache(':memory:', negative_ttl=0.05))
+        get_task_qualities([1, 60])
+        get_task_qualities([1, 60])
+        time.sleep(0.1)
+        # task 60 is listed again, it might
+        # have been added in the meantime
+        get_task_qualities([1, 60])
+        self.assertEqual(self.backend.listed_tasks, [[1, 60], [60]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+
+from openml.exceptions import (
+    OpenMLServerError,
+    OpenMLServerException,
+    OpenMLServerNoResult
+)
+
+from openml_server import OpenMLServer
+from src.backend import HTTPBackend, set_backend
+from src.executor import OpenMLExecutor, set_executor
+from src.operations import get_tasks_by_measure
+from src.result_extractor import ResultExtractor
+from src.synthetic import SyntheticBackend
+from src.transport import OpenMLTransport
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+
+        self.synthetic_backend = SyntheticBackend(
+            n_tasks=30,
+            n_flows=8,
+            runs_per_cell=3,
+            density=0.7
+        )
+        self.server = OpenMLServer(self.synthetic_backend)
+        self.server.__enter__()
+        self.backend = HTTPBackend(
+            OpenMLTransport(self.server.url, api_key='', pool_size=4)
+        )
+
+    def tearDown(self):
+
+        self.backend.transport.close()
+        self.server.__exit__()
+        set_backend(None)
+        set_executor(None)
+
+    def test_listings(self):
+
+        self.assertEqual(
+            self.backend.list_runs(offset=10, size=50, flow={1, 2}, uploader=[903]),
+            self.synthetic_backend.list_runs(
+                offset=10,
+                size=50,
+                flow={1, 2},
+                uploader=[903]
+            )
+        )
+        run_ids = list(range(1, 200))
+        self.assertEqual(
+            self.backend.list_evaluations('kappa', run_ids),
+            self.synthetic_backend.list_evaluations('kappa', run_ids)
+        )
+        self.assertEqual(
+            self.backend.list_flows(offset=2, size=3),
+            self.synthetic_backend.list_flows(offset=2, size=3)
+        )
+        self.assertEqual(
+            self.backend.list_tasks([1, 2, 3, 100]),
+            self.synthetic_backend.list_tasks([1, 2, 3, 100])
+        )
+        # listings without results are empty
+        self.assertEqual(self.backend.list_runs(flow=[100]), dict())
+        self.assertEqual(self.backend.list_tasks([100]), dict())
+
+    def test_documents(self):
+
+        self.assertEqual(self.backend.get_run(5), self.synthetic_backend.get_run(5))
+        self.assertEqual(self.backend.get_task(5), self.synthetic_backend.get_task(5))
+        self.assertEqual(
+            self.backend.get_dataset(5),
+            self.synthetic_backend.get_dataset(5)
+        )
+        self.assertEqual(
+            self.backend.get_study(99),
+            self.synthetic_backend.get_study(99)
+        )
+
+    def test_errors(self):
+
+        # an error code of the server is final
+        with self.assertRaises(OpenMLServerException) as context:
+            self.backend.get_dataset(14)
+        self.assertEqual(context.exception.code, 362)
+
+        # other errors can be retried
+        with self.assertRaises(OpenMLServerError) as context:
+            self.backend.transport.get('unknown/1')
+        self.assertNotIsInstance(context.exception, OpenMLServerException)
+
+    def test_no_result_codes(self):
+
+        # the no result code of another listing is an error
+        self.server.errors['task/list'] = [(412, 512)]
+        with self.assertRaises(OpenMLServerException) as context:
+            self.backend.list_tasks([1, 2])
+        self.assertNotIsInstance(context.exception, OpenMLServerNoResult)
+        self.assertEqual(context.exception.code, 512)
+
+        # a failure of the server is retried
+        self.server.errors['run/list'] = [(500, 111), (500, 500)]
+        with self.assertRaises(OpenMLServerError) as context:
+            self.backend.list_runs(flow=[1])
+        self.assertNotIsInstance(context.exception, OpenMLServerException)
+        executor = OpenMLExecutor(max_workers=1, retries=1, backoff=0)
+        self.assertEqual(
+            executor.call(self.backend.list_runs, flow=[1]),
+            self.synthetic_backend.list_runs(flow=[1])
+        )
+        self.assertEqual(self.server.requests['run/list'], 3)
+
+    def test_pooled_connections(self):
+
+        set_backend(self.backend)
+        set_executor(OpenMLExecutor(max_workers=4))
+        result_extractor = ResultExtractor(*range(1, 9), page_size=20)
+        results = get_tasks_by_measure(result_extractor.results)
+
+        set_backend(self.synthetic_backend)
+        self.assertTrue(
+            result_extractor.results.equals(ResultExtractor(*range(1, 9)).results)
+        )
+        self.assertTrue(results.equals(get_tasks_by_measure(result_extractor.results)))
+
+        # the connections are kept alive and
+        # all the responses are compressed
+        nr_requests = sum(self.server.requests.values())
+        self.assertGreater(self.server.requests['run/list'], 1)
+        self.assertLessEqual(len(self.server.connections), 4)
+        self.assertEqual(self.server.compressed, nr_requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,58 +1,166 @@
 import unittest
 
-import openml
+import numpy as np
+import pandas
 
+from src.backend import get_backend, set_backend
+from src.flow_catalog import set_flow_catalog
+from src.synthetic import SyntheticBackend
+from src.util import aggregate_results_by_family
+from src.util import aggregate_results_for_flow
+from src.util import get_flow_families
 from src.util import get_flow_ids
 from src.util import get_tasks_missing_values
 
 
 class TestUtilities(unittest.TestCase):
 
+    def setUp(self):
+
+        # three flows with five versions each
+        set_backend(SyntheticBackend(n_tasks=30, n_flows=15))
+        set_flow_catalog(None)
+
+    def tearDown(self):
+
+        set_backend(None)
+        set_flow_catalog(None)
+
     def test_get_flow_ids(self):
 
-        # there are 10 versions of the flow
+        # there are 5 versions of the flow
         self.assertEqual(
-            len(get_flow_ids('mlr.classif.svm')),
-            10
+            len(get_flow_ids('synthetic.flow0')),
+            5
         )
         # should return only 1 item
         self.assertEqual(
-            len(get_flow_ids('mlr.classif.svm_2')),
+            len(get_flow_ids('synthetic.flow0_2')),
             1
         )
-        # there are 11 versions of xgboost
-        self.assertEqual(
-            len(get_flow_ids('mlr.classif.xgboost')),
-            11
-        )
         # there was a bug previously when adding
         # versioned flows. Trying both combinations
         # of the flows
         self.assertEqual(
             len(
                 get_flow_ids(
-                    'mlr.classif.xgboost',
-                    'mlr.classif.svm_4'
+                    'synthetic.flow1',
+                    'synthetic.flow0_4'
                 )
             ),
-            12
+            6
         )
         self.assertEqual(
             len(
                 get_flow_ids(
-                    'mlr.classif.svm_3',
-                    'mlr.classif.xgboost'
+                    'synthetic.flow0_3',
+                    'synthetic.flow1'
                 )
             ),
-            12
+            6
         )
 
     def test_get_tasks_missing_values(self):
 
         output = get_tasks_missing_values(
-            openml.study.get_study(99).tasks
+            get_backend().get_study(99)['tasks']
         )
-        expected_outcome = {
-            3904, 125920, 7592, 14954, 3021, 15, 146800, 29, 2079
-        }
+        # every third task is part of the study and
+        # every fifth dataset has missing values
+        expected_outcome = {10, 25}
         self.assertEqual(output, expected_outcome)
+
+
+class TestAggregation(unittest.TestCase):
+
+    def setUp(self):
+
+        self.results = pandas.DataFrame.from_dict(
+            {
+                1: {3: (0.5, 2), 4: (1.0, 1)},
+                2: {3: (0.25, 4), 5: (0.0, 3)},
+                3: {4: (0.5, 6)}
+            },
+            orient='columns'
+        )
+
+    def test_aggregate_results_by_family(self):
+
+        aggregated_results = aggregate_results_by_family(
+            self.results,
+            {1: 'A', 2: 'A', 3: 'B'}
+        )
+        self.assertEqual(aggregated_results.index.tolist(), [3, 4, 5])
+        self.assertEqual(aggregated_results.columns.tolist(), ['A', 'B'])
+        np.testing.assert_allclose(
+            aggregated_results.values,
+            [
+                [(0.5 * 2 + 0.25 * 4) / 6, np.nan],
+                [1.0, 0.5],
+                [0.0, np.nan]
+            ]
+        )
+        # the sparse results give the same aggregation
+        self.assertTrue(
+            aggregated_results.equals(
+                aggregate_results_by_family(
+                    self.results.stack(),
+                    {1: 'A', 2: 'A', 3: 'B'}
+                )
+            )
+        )
+        # flows without a family are not aggregated
+        self.assertEqual(
+            aggregate_results_by_family(self.results, {3: 'B'}).index.tolist(),
+            [4]
+        )
+        # the fractions alone are not enough
+        fractions = self.results.map(
+            lambda entry: entry[0] if isinstance(entry, tuple) else entry
+        )
+        with self.assertRaises(ValueError):
+            aggregate_results_by_family(fractions, {1: 'A', 2: 'A', 3: 'B'})
+        with self.assertRaises(ValueError):
+            aggregate_results_by_family(fractions.stack(), {1: 'A'})
+
+    def test_aggregate_results_for_flow(self):
+
+        aggregated_results = aggregate_results_for_flow(self.results, 'A')
+        self.assertEqual(aggregated_results.columns.tolist(), ['A'])
+        np.testing.assert_allclose(
+            aggregated_results['A'].values,
+            [(0.5 * 2 + 0.25 * 4) / 6, (1.0 + 0.5 * 6) / 7, 0.0]
+        )
+        # the sparse results give the same aggregation
+        self.assertTrue(
+            aggregated_results.equals(
+                aggregate_results_for_flow(self.results.stack(), 'A')
+            )
+        )
+        self.assertEqual(
+            len(aggregate_results_for_flow(pandas.DataFrame(), 'A').index),
+            0
+        )
+
+    def test_get_flow_families(self):
+
+        set_backend(SyntheticBackend(n_tasks=10, n_flows=10))
+        set_flow_catalog(None)
+        try:
+            flow_families = get_flow_families(
+                {
+                    'A': ['synthetic.flow0_1', 'synthetic.flow1'],
+                    'B': ['synthetic.flow0']
+                }
+            )
+        finally:
+            set_backend(None)
+            set_flow_catalog(None)
+
+        self.assertEqual(
+            flow_families,
+            {
+                1: 'A', 6: 'A', 7: 'A', 8: 'A', 9: 'A', 10: 'A',
+                2: 'B', 3: 'B', 4: 'B', 5: 'B'
+            }
+        )
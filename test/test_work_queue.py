@@ -0,0 +1,273 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas
+
+from src.backend import set_backend
+from src.driver import run
+from src.flow_catalog import set_flow_catalog
+from src.synthetic import SyntheticBackend
+from src.work_queue import (
+    DONE,
+    FAILED,
+    PENDING,
+    DirectoryQueue,
+    WorkQueue,
+    create_job,
+    open_queue,
+    reduce_results,
+    run_worker
+)
+
+
+def _work(queue_path, worker):
+
+    run_worker(open_queue(queue_path), worker)
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    suffix = '.sqlite'
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.directory.name, 'queue' + self.suffix)
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def test_open_queue(self):
+
+        self.assertIsInstance(
+            open_queue(self.queue_path),
+            WorkQueue if self.suffix else DirectoryQueue
+        )
+
+    def test_lease(self):
+
+        queue = open_queue(self.queue_path, lease_time=0.2)
+        unit_ids = queue.add([{'unit': 1}, {'unit': 2}])
+
+        self.assertEqual(queue.claim('a'), (unit_ids[0], {'unit': 1}))
+        self.assertEqual(queue.claim('b'), (unit_ids[1], {'unit': 2}))
+        self.assertIsNone(queue.claim('b'))
+        self.assertTrue(queue.complete(unit_ids[1], 'b', 'result'))
+
+        # the lease of a dead worker expires
+        time.sleep(0.3)
+        self.assertEqual(queue.claim('c'), (unit_ids[0], {'unit': 1}))
+        self.assertFalse(queue.renew(unit_ids[0], 'a'))
+        self.assertTrue(queue.renew(unit_ids[0], 'c'))
+        self.assertFalse(queue.is_done())
+
+        self.assertTrue(queue.complete(unit_ids[0], 'c', 'other result'))
+        # the first result is kept
+        self.assertFalse(queue.complete(unit_ids[0], 'a', 'late result'))
+        self.assertTrue(queue.is_done())
+        self.assertEqual(queue.counts()[DONE], 2)
+        self.assertEqual(
+            queue.results(),
+            [({'unit': 1}, 'other result'), ({'unit': 2}, 'result')]
+        )
+
+    def test_release(self):
+
+        queue = open_queue(self.queue_path)
+        unit_id, = queue.add([{'unit': 1}])
+        queue.claim('a')
+        queue.release(unit_id, 'a')
+        self.assertEqual(queue.claim('b'), (unit_id, {'unit': 1}))
+
+    def test_max_attempts(self):
+
+        queue = open_queue(self.queue_path, lease_time=0.2, max_attempts=2)
+        unit_ids = queue.add([{'unit': 1}, {'unit': 2}])
+
+        # a unit that raises is failed after its last attempt
+        queue.claim('a')
+        self.assertFalse(queue.release(unit_ids[0], 'a', 'error'))
+        self.assertEqual(queue.claim('a'), (unit_ids[0], {'unit': 1}))
+        self.assertTrue(queue.release(unit_ids[0], 'a', 'error'))
+
+        # a unit whose workers die is failed when its lease expires
+        self.assertEqual(queue.claim('b'), (unit_ids[1], {'unit': 2}))
+        time.sleep(0.3)
+        self.assertEqual(queue.claim('c'), (unit_ids[1], {'unit': 2}))
+        time.sleep(0.3)
+        self.assertIsNone(queue.claim('d'))
+
+        self.assertTrue(queue.is_done())
+        self.assertEqual(queue.counts()[FAILED], 2)
+        self.assertEqual(
+            queue.failures(),
+            [(unit_ids[0], {'unit': 1}, 'error'), (unit_ids[1], {'unit': 2}, 'lease expired')]
+        )
+
+        self.assertEqual(queue.retry_failed(), 2)
+        self.assertEqual(queue.counts()[PENDING], 2)
+        self.assertEqual(queue.claim('e'), (unit_ids[0], {'unit': 1}))
+
+
+class TestDirectoryQueue(TestWorkQueue):
+
+    suffix = ''
+
+
+class TestJob(unittest.TestCase):
+
+    suffix = '.sqlite'
+
+    def setUp(self):
+
+        set_backend(SyntheticBackend(n_tasks=40, n_flows=10, runs_per_cell=3, density=0.7))
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.directory.name, 'queue' + self.suffix)
+        self.config = {
+            'path': os.path.join(self.directory.name, 'job'),
+            'task_restrictions': {},
+            'threshold': 0.1,
+            'groups': {
+                'A': ['synthetic.flow0_1', 'synthetic.flow0_2'],
+                'B': ['synthetic.flow1']
+            }
+        }
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+        set_backend(None)
+        set_flow_catalog(None)
+
+    def test_job(self):
+
+        queue = open_queue(self.queue_path, lease_time=0.2)
+        unit_ids = create_job(queue, self.config, task_chunk_size=15)
+        # 40 tasks in 3 chunks for 2 groups
+        self.assertEqual(len(unit_ids), 6)
+        with self.assertRaises(RuntimeError):
+            reduce_results(queue)
+
+        # a worker that dies after claiming a unit
+        self.assertIsNotNone(queue.claim('dead'))
+        time.sleep(0.3)
+
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_work, args=(self.queue_path, 'worker%d' % i))
+            for i in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertTrue(queue.is_done())
+        output_paths = reduce_results(queue)
+
+        expected_paths = run(
+            dict(self.config, path=os.path.join(self.directory.name, 'driver')),
+            processes=2
+        )
+        for algorithm in self.config['groups']:
+            reduced_results = pandas.read_csv(output_paths[algorithm], index_col=0)
+            expected_results = pandas.read_csv(expected_paths[algorithm], index_col=0)
+            self.assertGreater(len(reduced_results.index), 0)
+            self.assertEqual(
+                sorted(reduced_results.index.tolist()),
+                sorted(expected_results.index.tolist())
+            )
+            self.assertTrue(
+                (
+                    reduced_results[algorithm].sort_index() -
+                    expected_results[algorithm].sort_index()
+                ).abs().max() < 1e-9
+            )
+            # sorted by the aggregated fraction
+            self.assertTrue(reduced_results[algorithm].is_monotonic_increasing)
+
+    def test_job_min_task_flow(self):
+
+        # the completeness of a task is checked against all
+        # the flows of the group, not only the ones with runs
+        # for the tasks of its unit.
+        set_backend(SyntheticBackend(n_tasks=40, n_flows=10, runs_per_cell=3, density=0.3))
+        config = dict(
+            self.config,
+            task_restrictions={'min_task_flow': 0},
+            groups={'A': ['synthetic.flow0_1', 'synthetic.flow0_2', 'synthetic.flow0_3']}
+        )
+        queue = open_queue(self.queue_path)
+        create_job(queue, config, task_chunk_size=1)
+        run_worker(queue, 'worker')
+        reduced_results = pandas.read_csv(reduce_results(queue)['A'], index_col=0)
+
+        expected_results = pandas.read_csv(
+            run(
+                dict(config, path=os.path.join(self.directory.name, 'driver')),
+                processes=1
+            )['A'],
+            index_col=0
+        )
+        self.assertEqual(
+            sorted(reduced_results.index.tolist()),
+            sorted(expected_results.index.tolist())
+        )
+
+        # with denser runs there are complete tasks
+        config['groups'] = {'A': ['synthetic.flow1_1', 'synthetic.flow1_2']}
+        set_backend(SyntheticBackend(n_tasks=40, n_flows=10, runs_per_cell=3, density=0.7))
+        set_flow_catalog(None)
+        queue = open_queue(os.path.join(self.directory.name, 'other' + self.suffix))
+        create_job(queue, config, task_chunk_size=3)
+        run_worker(queue, 'worker')
+        reduced_results = pandas.read_csv(reduce_results(queue)['A'], index_col=0)
+        expected_results = pandas.read_csv(
+            run(
+                dict(config, path=os.path.join(self.directory.name, 'driver')),
+                processes=1
+            )['A'],
+            index_col=0
+        )
+        self.assertGreater(len(expected_results.index), 0)
+        self.assertEqual(
+            sorted(reduced_results.index.tolist()),
+            sorted(expected_results.index.tolist())
+        )
+
+    def test_failing_unit(self):
+
+        queue = open_queue(self.queue_path)
+        create_job(queue, self.config, task_chunk_size=15)
+
+        def process_unit(config, unit):
+            if unit['group'] == 'B':
+                raise ValueError('unit of B')
+            return pandas.DataFrame({unit['group']: [0.5]}, index=[unit['tasks'][0]])
+
+        # the worker goes on with the other units
+        with patch('src.work_queue.process_unit', process_unit):
+            self.assertEqual(run_worker(queue, 'worker'), 3)
+
+        self.assertTrue(queue.is_done())
+        self.assertEqual(queue.counts()[DONE], 3)
+        self.assertEqual(queue.counts()[FAILED], 3)
+        for _, unit, error in queue.failures():
+            self.assertEqual(unit['group'], 'B')
+            self.assertIn('unit of B', error)
+        with self.assertRaises(RuntimeError):
+            reduce_results(queue)
+
+
+class TestJobDirectoryQueue(TestJob):
+
+    suffix = ''
+
+
+if __name__ == '__main__':
+    unittest.main()